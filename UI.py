@@ -1,5 +1,11 @@
+import queue
+import threading
+import time
 from game import game
-from PyQt5.QtWidgets import QApplication, QLabel, QMainWindow, QVBoxLayout, QWidget, QPushButton, QHBoxLayout
+from running import send_threshold
+from views import blitter, cell_blitter, field_view, scoreboard_view, box_score_view
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QLabel, QMainWindow, QVBoxLayout, QWidget, QPushButton, QHBoxLayout, QSpinBox, QCheckBox, QMessageBox
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
@@ -7,75 +13,268 @@ import matplotlib.pyplot as plt
 pos = [["Eddie Collins","Cy Young",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"],
        ["Eddie Collins","Christy Mathewson",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]]
 lineup = [[0,2,3,4,5,6,7,8,9],[0,2,3,4,5,6,7,8,9]]
-G = game(positions=pos, lineups=lineup)
 
+#Shortest time between repaints while plate appearances are being played, in seconds
+repaint_interval = 0.1
+
+class dialog_policy(QObject):
+    """Runner send policy for games played on a worker thread. Asks the user in a dialog on the main thread and waits for the answer.
+
+    Attributes:
+        ask (pyqtSignal): Emitted with the chance of success when a decision is needed.
+        auto (function or None): Policy used instead of asking, e.g. while fast-forwarding. None always asks.
+    """
+    ask = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.auto = None
+        self._answers = queue.Queue()
+
+    def __call__(self, chance, GS = None):
+        """Decides whether to send the runner. Called on the worker thread.
+
+        Args:
+            chance (int): Number from 1-20 indicating range of successful rolls
+            GS (game_state, optional): Current game state.
+
+        Returns:
+            bool: Whether or not the runner is sent.
+        """
+        if self.auto is not None:
+            return self.auto(chance, GS)
+        self.ask.emit(chance)
+        return self._answers.get()
+
+    def answer(self, send):
+        """Gives the user's answer to the waiting worker. Called on the main thread.
+
+        Args:
+            send (bool): Whether or not to send the runner.
+        """
+        self._answers.put(send)
+
+class PA_worker(QObject):
+    """Plays plate appearances on a worker thread.
+
+    The game is only changed while lock is held. Progress is signalled at most every repaint_interval seconds, so long runs don't wait on drawing. Runs stop between plate appearances once cancel is set.
+
+    Attributes:
+        G (game): Game played.
+        lock (threading.Lock): Held while a plate appearance is played.
+        cancel (threading.Event): Set to stop the current run, and any later one, after the plate appearance being played.
+        message (str): Last event logged by the game.
+        progress (pyqtSignal): Emitted at most every repaint_interval seconds while playing.
+        finished (pyqtSignal): Emitted when a run of plate appearances is over.
+    """
+    progress = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, G):
+        super().__init__()
+        self.G = G
+        self.lock = threading.Lock()
+        self.cancel = threading.Event()
+        self.message = ''
+
+    def log(self, *args, **kwargs):
+        """Event sink of the game. Keeps the last event for the status line.
+        """
+        self.message = ' '.join(str(arg) for arg in args)
+
+    def run(self, n, until):
+        """Plays plate appearances until a stopping point or the end of the game.
+
+        Args:
+            n (int): Largest number of plate appearances to play.
+            until (str): 'PA' to play n plate appearances, 'inning' to stop at the end of the half inning, 'game' to stop at the end of the game.
+        """
+        half = (self.G.GS.inning, self.G.GS.batting_team)
+        last = time.perf_counter()
+        for i in range(n):
+            if self.G.result is not None or self.cancel.is_set():
+                break
+            with self.lock:
+                self.G.PA()
+            if until == 'inning' and (self.G.GS.inning, self.G.GS.batting_team) != half:
+                break
+
+            #Coalesce repaints
+            if time.perf_counter() - last >= repaint_interval:
+                self.progress.emit()
+                last = time.perf_counter()
+        self.finished.emit()
 
 class MainWindow(QMainWindow):
+    #Starts a run on the worker: (number of plate appearances, stopping point)
+    start = pyqtSignal(int, str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Strat-O-Matic")
-        
+
+        #Game is played on a worker thread. The window draws it, so the game itself doesn't display
+        self.policy = dialog_policy()
+        self.worker = PA_worker(None)
+        self.worker.G = game(positions=pos, lineups=lineup, headless=True, policy=self.policy, log=self.worker.log)
+        self.thread = QThread()
+        self.worker.moveToThread(self.thread)
+        self.start.connect(self.worker.run)
+        self.worker.progress.connect(self.display_figure)
+        self.worker.finished.connect(self.run_finished)
+        self.policy.ask.connect(self.ask_send)
+        self.thread.start()
+        G = self.worker.G
+
         fig_scoreboard = Figure(figsize=[10, 1.8])
         self.ax_scoreboard = fig_scoreboard.add_subplot()
         self.ax_scoreboard.set_position([0.05,0,.9,1])
-        
+
         fig_field = Figure(figsize=[10, 6])
         self.ax_field = fig_field.add_subplot()  # Adjust subplot position
-        
+
         fig_boxscore = Figure(figsize=[10, 6])
         self.ax_boxscore = fig_boxscore.add_subplot()  # Adjust subplot position
-        
+
         self.canvas_scoreboard = FigureCanvas(fig_scoreboard)
         self.canvas_field = FigureCanvas(fig_field)
         self.canvas_boxscore = FigureCanvas(fig_boxscore)
-        
+
         self.button = QPushButton("Roll?")
-        self.button.clicked.connect(self.roll_button_clicked)
-        
+        self.button.clicked.connect(lambda: self.run(1, 'PA'))
+
+        #Fast-forward controls
+        self.n_PA = QSpinBox()
+        self.n_PA.setRange(1, 1000)
+        self.n_PA.setValue(10)
+        self.button_PA = QPushButton("Play PAs")
+        self.button_PA.clicked.connect(lambda: self.run(self.n_PA.value(), 'PA'))
+        self.button_inning = QPushButton("End of inning")
+        self.button_inning.clicked.connect(lambda: self.run(1000, 'inning'))
+        self.button_game = QPushButton("End of game")
+        self.button_game.clicked.connect(lambda: self.run(100000, 'game'))
+        self.auto_send = QCheckBox("Decide runners automatically when fast-forwarding")
+        self.auto_send.setChecked(True)
+        self.status = QLabel()
+
         layout = QVBoxLayout()
-        
+
         # Area 1: Scoreboard Area
         layout.addWidget(self.canvas_scoreboard)
-        
+
         # Area 2: Field and Box Score Area
         hbox = QHBoxLayout()
         hbox.addWidget(self.canvas_field)
         hbox.addWidget(self.canvas_boxscore)
         layout.addLayout(hbox)
-        
+
         # Area 3: Button Area
+        layout.addWidget(self.status)
         layout.addWidget(self.button)
-        
+        hbox = QHBoxLayout()
+        for control in [self.n_PA, self.button_PA, self.button_inning, self.button_game, self.auto_send]:
+            hbox.addWidget(control)
+        layout.addLayout(hbox)
+        self.controls = [self.button, self.n_PA, self.button_PA, self.button_inning, self.button_game]
+
         widget = QWidget()
         widget.setLayout(layout)
-        
+
         self.setCentralWidget(widget)
+
+        # Persistent artists, drawn once and updated in place on each roll
+        self.view_scoreboard = scoreboard_view(self.ax_scoreboard, G.SB)
+        self.view_field = field_view(self.ax_field)
+        self.view_boxscore = box_score_view(self.ax_boxscore, G.BS)
+        self.blit_scoreboard = cell_blitter(self.canvas_scoreboard, self.view_scoreboard.cells)
+        self.blit_field = blitter(self.canvas_field, self.view_field.artists)
+        self.blit_boxscore = cell_blitter(self.canvas_boxscore, self.view_boxscore.cells)
         self.display_figure()
 
     def display_figure(self):
-        
+        #Skip this repaint if a plate appearance is being played. Another follows when it's over.
+        if not self.worker.lock.acquire(blocking = False):
+            return
+        try:
+            changed = self.update_views()
+        finally:
+            self.worker.lock.release()
+        self.repaint(*changed)
+
+    def update_views(self):
+        """Updates the views to the game. The game must not change meanwhile: the caller either holds the worker's lock or knows the worker is waiting.
+
+        Returns:
+            list of matplotlib.table.Cell: Scoreboard cells that changed.
+            list of matplotlib.table.Cell: Box score cells that changed.
+        """
+        G = self.worker.G
+        changed_scoreboard = self.view_scoreboard.update(G.SB)
+        self.view_field.update(G.GS)
+        changed_boxscore = self.view_boxscore.update(G.BS)
+        self.status.setText(self.worker.message)
+        return changed_scoreboard, changed_boxscore
 
+    def repaint(self, changed_scoreboard, changed_boxscore):
+        """Repaints the views after update_views.
+
+        Args:
+            changed_scoreboard (list of matplotlib.table.Cell): Scoreboard cells that changed.
+            changed_boxscore (list of matplotlib.table.Cell): Box score cells that changed.
+        """
         # Area 1: Scoreboard Area
-        G.SB.display(ax = self.ax_scoreboard)
-        self.canvas_scoreboard.draw()
-        
+        self.blit_scoreboard.update(changed_scoreboard)
+
         # Area 2: Field Area
-        G.GS.display(ax=self.ax_field)
-        self.canvas_field.draw()
-        
+        self.blit_field.update()
+
         # Area 3: Box Score Area
-        G.BS.display(ax = self.ax_boxscore)
-        self.canvas_boxscore.draw()        
-
-    def roll_button_clicked(self):
-        G.PA()
-        self.ax_scoreboard.clear()
-        self.ax_field.clear()
-        self.ax_boxscore.clear()
+        self.blit_boxscore.update(changed_boxscore)
+
+    def run(self, n, until):
+        """Starts playing plate appearances on the worker, with the controls disabled until it's done.
+
+        Args:
+            n (int): Largest number of plate appearances to play.
+            until (str): Stopping point, as taken by PA_worker.run.
+        """
+        for control in self.controls:
+            control.setEnabled(False)
+        fast_forward = n > 1
+        self.policy.auto = send_threshold(14) if fast_forward and self.auto_send.isChecked() else None
+        self.start.emit(n, until)
+
+    def run_finished(self):
         self.display_figure()
+        if self.worker.G.result is None:
+            for control in self.controls:
+                control.setEnabled(True)
+        else:
+            self.status.setText('%s team wins!' % ('Away' if self.worker.G.result == 0 else 'Home'))
+
+    def ask_send(self, chance):
+        """Asks whether to send the runner, on behalf of the worker.
+
+        Args:
+            chance (int): Number from 1-20 indicating range of successful rolls
+        """
+        #The worker holds the lock for the plate appearance, but is waiting on this answer, so the game can't change while drawing
+        self.repaint(*self.update_views())
+        answer = QMessageBox.question(self, "Send runner?", "Would you like to send the runner? (%d)" % chance, QMessageBox.Yes | QMessageBox.No)
+        self.policy.answer(answer == QMessageBox.Yes)
 
-app = QApplication([])
-window = MainWindow()
-window.show()
-app.exec_()
+    def closeEvent(self, event):
+        #Stop the worker after the plate appearance being played, deciding any runners in it without asking. If it is waiting on a
+        #question, answer it: nothing is asked after this, so an answer nobody waits for is never read
+        self.worker.cancel.set()
+        self.policy.auto = send_threshold(14)
+        self.policy.answer(False)
+        self.thread.quit()
+        self.thread.wait()
+        super().closeEvent(event)
 
+if __name__ == '__main__':
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec_()
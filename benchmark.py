@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from player import batter, pitcher
+from dice import dice_source, diceroll_6, diceroll_20
+
+def legacy_result(B, P, roll, roll2):
+    """Resolves a card cell the way game.PA did before cards were parsed at load time.
+
+    Args:
+        B (batter): Current batter.
+        P (pitcher): Current pitcher.
+        roll (list of int): Result of diceroll_6.
+        roll2 (int): Result of diceroll_20, used if the cell is split.
+
+    Returns:
+        list: Play split into its name and arguments.
+    """
+    if roll[0] < 4:
+        result = B.batting[P.hand][roll[0]][roll[1]-2]
+    else:
+        result = P.pitching[B.hand if B.hand != 'S' else ('L' if P.hand == 'R' else 'R')][roll[0]][roll[1]-2]
+
+    try:
+        result = re.split('[_]', result)
+    except TypeError:
+        result = re.split('[_]', result[1]) if roll2 <= result[0] else re.split('[_]', result[2])
+
+    if result[-1] == '~':
+        result = ['S','**'] if P.tired else result[:-1]
+
+    for i in range(len(result)):
+        try:
+            result[i] = int(result[i])
+        except (IndexError,TypeError, ValueError): pass
+
+    return result
+
+def token_cell(B, P, roll):
+    """Looks up the card cell of a roll in the play tuples parsed at load time, as game.PA does.
+
+    Args:
+        B (batter): Current batter.
+        P (pitcher): Current pitcher.
+        roll (list of int): Result of diceroll_6.
+
+    Returns:
+        tuple or None: Tokenized cell, or None for a malformed cell, on which game.PA rolls again.
+    """
+    if roll[0] < 4:
+        return B.batting_plays[P.hand][roll[0]][roll[1]-2]
+    return P.pitching_plays[B.hand if B.hand != 'S' else ('L' if P.hand == 'R' else 'R')][roll[0]][roll[1]-2]
+
+def _played(B, P, roll, roll2):
+    """Whether or not a roll lands on a play, rather than on a malformed cell or above a one-sided d20 split, where game.PA rolls again.
+    """
+    cell = token_cell(B, P, roll)
+    if cell is None:
+        return False
+    return type(cell[0]) is not int or roll2 <= cell[0] or cell[2] is not None
+
+def token_result(B, P, roll, roll2):
+    """Resolves a card cell from the play tuples parsed at load time, as game.PA does.
+
+    Args:
+        B (batter): Current batter.
+        P (pitcher): Current pitcher.
+        roll (list of int): Result of diceroll_6.
+        roll2 (int): Result of diceroll_20, used if the cell is split.
+
+    Returns:
+        tuple: Play tuple.
+    """
+    result = token_cell(B, P, roll)
+
+    if type(result[0]) is int:
+        result = result[1] if roll2 <= result[0] else result[2]
+
+    if result[-1] == '~':
+        result = ('S','**') if P.tired else result[:-1]
+
+    return result
+
+def bench_play_parsing(n = 100000, seed = 0):
+    """Microbenchmark comparing per-PA cell resolution with and without pre-parsed play tuples.
+
+    Args:
+        n (int, default 100000): Number of rolls drawn. Rolls that game.PA would roll again are dropped, and times are per remaining plate appearance.
+        seed (int, default 0): Seed for the pre-drawn dice rolls.
+
+    Returns:
+        dict: Microseconds per PA for the legacy and tokenized paths, and the saving.
+    """
+    rng = np.random.default_rng(seed)
+    batters = [batter(name) for name in ["Ty Cobb", "George Davis", "Buck Ewing", "Eddie Collins"]]
+    pitchers = [pitcher(name) for name in ["Cy Young", "Jacob deGrom", "Christy Mathewson"]]
+
+    #Pre-draw matchups and dice so both paths resolve identical plate appearances
+    cases = [(batters[rng.integers(len(batters))], pitchers[rng.integers(len(pitchers))],
+              [int(rng.integers(1,7)), int(rng.integers(1,7) + rng.integers(1,7))], int(rng.integers(1,21))) for i in range(n)]
+    cases = [case for case in cases if _played(*case)] #game.PA rolls again on these
+
+
+    timings = {}
+    for label, func in [('legacy', legacy_result), ('tokens', token_result)]:
+        start = time.perf_counter()
+        for B, P, roll, roll2 in cases:
+            func(B, P, roll, roll2)
+        timings[label] = (time.perf_counter() - start) / len(cases) * 1e6
+
+    #Both paths must agree
+    for B, P, roll, roll2 in cases[:1000]:
+        assert tuple(legacy_result(B, P, roll, roll2)) == token_result(B, P, roll, roll2)
+
+    timings['saving'] = timings['legacy'] - timings['tokens']
+    return timings
+
+def bench_dice(n = 100000, seed = 0):
+    """Microbenchmark comparing per-call numpy dice rolls with a buffered dice_source.
+
+    Args:
+        n (int, default 100000): Number of d6 and d20 rolls.
+        seed (int, default 0): Seed for the dice_source.
+
+    Returns:
+        dict: Microseconds per d6 + d20 pair for the global numpy state and for dice_source.
+    """
+    timings = {}
+    for label, dice in [('numpy', None), ('dice_source', dice_source(seed))]:
+        start = time.perf_counter()
+        for i in range(n):
+            diceroll_6(dice)
+            diceroll_20(dice)
+        timings[label] = (time.perf_counter() - start) / len(cases) * 1e6
+    return timings
+
+#Run in a fresh interpreter: import the simulation modules and play one headless plate appearance
+_startup_script = """
+import resource, sys, time
+start = time.perf_counter()
+%s
+imported = time.perf_counter()
+from game import game
+names = ["Eddie Collins","Cy Young",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]
+G = game(positions = [list(names), list(names)], lineups = [[0,2,3,4,5,6,7,8,9]] * 2, headless = True)
+G.PA()
+first = time.perf_counter()
+heavy = [m for m in ['matplotlib', 'PIL', 'pandas', 'tabulate'] if m in sys.modules]
+print(imported - start, first - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, ','.join(heavy))
+"""
+
+def bench_startup(modules = ('game', 'simulate'), repeats = 5):
+    """Startup benchmark: time and memory for a fresh interpreter to import the simulation modules and play its first plate appearance, as a pool worker or command line run would.
+
+    Args:
+        modules (tuple of str, default ('game', 'simulate')): Modules imported before the game is created.
+        repeats (int, default 5): Number of fresh interpreters. The fastest run is reported.
+
+    Returns:
+        dict: Seconds to import the modules ('import') and to the end of the first PA ('first_PA'), peak RSS in MB ('rss'), and the display dependencies that were loaded ('loaded').
+    """
+    script = _startup_script % '\n'.join('import %s' % module for module in modules)
+    runs = []
+    for i in range(repeats):
+        output = subprocess.run([sys.executable, '-c', script], capture_output = True, text = True, check = True).stdout.split()
+        runs.append((float(output[0]), float(output[1]), int(output[2]) / 1024, output[3].split(',') if len(output) > 3 else []))
+    best = min(runs, key = lambda run: run[1])
+    return {'import': best[0], 'first_PA': best[1], 'rss': best[2], 'loaded': best[3]}
+
+#Teams used by the suite: the Deadball-era players of players.json
+suite_positions = [["Eddie Collins","Cy Young",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"],
+                   ["Eddie Collins","Christy Mathewson",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]]
+
+def _suite_game(seed, **kwargs):
+    """Headless seeded game between the suite teams.
+    """
+    from game import game
+    return game(positions = [list(suite_positions[0]), list(suite_positions[1])], lineups = [[0,2,3,4,5,6,7,8,9]] * 2,
+                headless = True, dice = dice_source(seed), **kwargs)
+
+def case_reference(n):
+    """Fixed interpreter workload of dict lookups, tuple packing and integer arithmetic, the kind of work game.PA does. Other cases are measured relative to it, so saved baselines hold across machines.
+    """
+    table = {(i, j): i * j for i in range(8) for j in range(24)}
+    total = 0
+    for i in range(n):
+        key = (i & 7, i % 24)
+        total += table[key] + len(key)
+        if total > 1 << 20:
+            total -= 1 << 20
+    return n
+
+def case_PA(n):
+    """Plays n plate appearances through game.PA, starting new games as they end.
+    """
+    seed = 0
+    G = _suite_game(seed)
+    for i in range(n):
+        if G.result is not None:
+            seed += 1
+            G = _suite_game(seed)
+        G.PA()
+    return n
+
+def case_game(n):
+    """Plays n full games through game.game.
+    """
+    for seed in range(n):
+        _suite_game(seed).game()
+    return n
+
+def case_X(n):
+    """Resolves n X chances through game_state.X, spread over every position.
+    """
+    GS = _suite_game(0).GS
+    for i in range(n):
+        GS.X(i % 9 + 1)
+    return n
+
+def case_cards(n):
+    """Loads every card of the store n times, with the parsed card cache cleared each time.
+    """
+    from player import player_data
+    with open('players.json', mode = 'r', encoding = 'utf-8') as read_file:
+        names = {name: dic['type'] for name, dic in json.load(read_file).items()}
+    for i in range(n):
+        player_data._cache.clear()
+        for name, typ in names.items():
+            batter(name) if typ == 'B' else pitcher(name)
+    return n * len(names)
+
+def case_redraw(n):
+    """Plays n plate appearances, repainting the UI views after each one on offscreen Agg canvases.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from views import blitter, cell_blitter, field_view, scoreboard_view, box_score_view
+
+    figures = [Figure(figsize = [10, 1.8]), Figure(figsize = [10, 6]), Figure(figsize = [10, 6])]
+    axes = [figure.add_subplot() for figure in figures]
+    axes[0].set_position([0.05,0,.9,1])
+    canvases = [FigureCanvasAgg(figure) for figure in figures]
+
+    seed = 0
+    G = _suite_game(seed)
+    views = [scoreboard_view(axes[0], G.SB), field_view(axes[1]), box_score_view(axes[2], G.BS)]
+    blitters = [cell_blitter(canvases[0], views[0].cells), blitter(canvases[1], views[1].artists), cell_blitter(canvases[2], views[2].cells)]
+    for i in range(n):
+        if G.result is not None:
+            seed += 1
+            G = _suite_game(seed)
+            views[0].table.remove()
+            views[2].batting.remove()
+            views[2].pitching.remove()
+            views[0], views[2] = scoreboard_view(axes[0], G.SB), box_score_view(axes[2], G.BS)
+            blitters[0].cells, blitters[2].cells = views[0].cells, views[2].cells
+            blitters[0].update(full = True)
+            blitters[2].update(full = True)
+        G.PA()
+        blitters[0].update(views[0].update(G.SB))
+        views[1].update(G.GS)
+        blitters[1].update()
+        blitters[2].update(views[2].update(G.BS))
+    return n
+
+#Suite cases: name -> (function, work size for timing, work size for allocation tracing, unit). reference is always run, first
+cases = {'reference': (case_reference, 2000000, 200000, 'loops'),
+         'PA': (case_PA, 20000, 2000, 'PA'),
+         'game': (case_game, 300, 30, 'games'),
+         'X': (case_X, 100000, 10000, 'chances'),
+         'cards': (case_cards, 50, 5, 'cards'),
+         'redraw': (case_redraw, 100, 10, 'redraws')}
+
+def run_case(name, repeats = 5):
+    """Runs one suite case in this process: a warm-up, timed runs, then a smaller run under tracemalloc.
+
+    Each timed run is paired with a run of the reference case, so the speed relative to it is measured under the same load and clock.
+
+    Args:
+        name (str): Name of the case.
+        repeats (int, default 5): Number of timed runs. The fastest is kept.
+
+    Returns:
+        dict: Units per second ('rate'), seconds of the fastest timed run ('wall'), rate as a multiple of the reference rate ('speed'), peak KB allocated during the traced run ('alloc'), peak RSS of the process in MB ('rss') and the unit.
+    """
+    func, n, n_traced, unit = cases[name]
+    func(max(1, n_traced // 10))
+    reference, n_reference = cases['reference'][:2]
+
+    #Best of repeats, which is the least disturbed by other load
+    wall = wall_reference = float('inf')
+    for i in range(repeats):
+        start = time.perf_counter()
+        reference(n_reference)
+        wall_reference = min(wall_reference, time.perf_counter() - start)
+        start = time.perf_counter()
+        count = func(n)
+        wall = min(wall, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(n_traced)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'rate': count / wall, 'wall': wall, 'speed': count / wall / (n_reference / wall_reference), 'alloc': peak / 1024,
+            'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 'unit': unit}
+
+def run_suite(names = None):
+    """Runs suite cases, each in a fresh interpreter so peak RSS is its own. The reference case is always run.
+
+    Args:
+        names (list of str, optional): Cases to run. Default runs all of them.
+
+    Returns:
+        dict: Results of run_case, keyed by case name.
+    """
+    results = {}
+    for name in ['reference'] + [name for name in (names if names is not None else cases) if name != 'reference']:
+        output = subprocess.run([sys.executable, '-c', 'import json, benchmark; print(json.dumps(benchmark.run_case(%r)))' % name],
+                                capture_output = True, text = True, check = True, cwd = os.path.dirname(os.path.abspath(__file__)))
+        results[name] = json.loads(output.stdout.splitlines()[-1])
+    return results
+
+def relative(results):
+    """Machine independent form of suite results, against the reference case.
+
+    Args:
+        results (dict): Results of run_suite, including the reference case.
+
+    Returns:
+        dict: For each case but the reference: rate as a multiple of the reference rate ('speed'), peak KB allocated ('alloc'), which doesn't depend on the machine, and MB of peak RSS above the reference process ('rss'), which leaves out the interpreter and shared imports. And the unit.
+    """
+    reference = results['reference']
+    return {name: {'speed': result['speed'], 'alloc': result['alloc'], 'rss': result['rss'] - reference['rss'], 'unit': result['unit']}
+            for name, result in results.items() if name != 'reference'}
+
+def save_baselines(results, path = 'benchmarks.json'):
+    """Saves suite results as baselines, in the relative form. Commits which change the numbers should save new baselines with them.
+
+    Args:
+        results (dict): Results of run_suite.
+        path (str, default 'benchmarks.json'): Baselines file.
+    """
+    baselines = {**load_baselines(path), **relative(results)}
+    with open(path, mode = 'w', encoding = 'utf-8') as write_file:
+        json.dump(baselines, write_file, indent = 2, sort_keys = True)
+        write_file.write('\n')
+
+def load_baselines(path = 'benchmarks.json'):
+    """Loads saved baselines.
+
+    Args:
+        path (str, default 'benchmarks.json'): Baselines file.
+
+    Returns:
+        dict: Saved results in the form of relative, or an empty dict if there is no baselines file.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, mode = 'r', encoding = 'utf-8') as read_file:
+        return json.load(read_file)
+
+def regressions(results, baselines, threshold = 0.3, alloc_slack = 64, rss_slack = 4):
+    """Compares results against baselines, both relative to their own run's reference.
+
+    Args:
+        results (dict): Results of run_suite.
+        baselines (dict): Saved baselines, as given by load_baselines.
+        threshold (float, default 0.3): Relative change beyond which a metric is flagged. Relative speeds vary by about 15% from run to run.
+        alloc_slack (float, default 64): KB of extra allocation always allowed, so small numbers don't flag on noise.
+        rss_slack (float, default 4): MB of extra RSS always allowed.
+
+    Returns:
+        list of str: Description of each metric that got worse by more than threshold: lower speed, or more allocation or RSS.
+    """
+    flagged = []
+    for name, result in relative(results).items():
+        if name not in baselines:
+            continue
+        base = baselines[name]
+        if result['speed'] < base['speed'] * (1 - threshold):
+            flagged.append('%s: %.4g x reference speed, baseline %.4g' % (name, result['speed'], base['speed']))
+        for metric, label, slack in [('alloc', 'KB peak allocated', alloc_slack), ('rss', 'MB peak RSS above reference', rss_slack)]:
+            if result[metric] > base[metric] * (1 + threshold) + slack:
+                flagged.append('%s: %.2f %s, baseline %.2f' % (name, result[metric], label, base[metric]))
+    return flagged
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmarks of the simulation engine.')
+    parser.add_argument('cases', nargs = '*', help = 'Suite cases to run (%s). Default runs all of them.' % ', '.join(cases))
+    parser.add_argument('--baselines', default = 'benchmarks.json', help = 'Baselines file.')
+    parser.add_argument('--save', action = 'store_true', help = 'Save the results as the new baselines.')
+    parser.add_argument('--threshold', type = float, default = 0.3, help = 'Relative change flagged as a regression.')
+    parser.add_argument('--micro', action = 'store_true', help = 'Also run the parsing, dice and startup microbenchmarks.')
+    args = parser.parse_args()
+
+    if args.micro:
+        timings = bench_play_parsing()
+        print('Cell resolution per PA: legacy %.2f us, tokens %.2f us, saving %.2f us (%.1fx)' % (timings['legacy'], timings['tokens'], timings['saving'], timings['legacy'] / timings['tokens']))
+        timings = bench_dice()
+        print('d6 + d20 per PA: numpy %.2f us, dice_source %.2f us' % (timings['numpy'], timings['dice_source']))
+        timings = bench_startup()
+        print('Startup to first PA: %.0f ms (imports %.0f ms), peak RSS %.0f MB, display modules loaded: %s' % (timings['first_PA'] * 1e3, timings['import'] * 1e3, timings['rss'], ', '.join(timings['loaded']) or 'none'))
+
+    results = run_suite(args.cases or None)
+    baselines = load_baselines(args.baselines)
+    speeds = relative(results)
+    for name, result in results.items():
+        line = '%-9s %10.0f %s/s  %7.3f s  %10.0f KB peak alloc  %6.1f MB RSS' % (name, result['rate'], result['unit'], result['wall'], result['alloc'], result['rss'])
+        if name in baselines:
+            line += '  (%+.1f%% speed vs baseline)' % ((speeds[name]['speed'] / baselines[name]['speed'] - 1) * 100)
+        print(line)
+
+    if args.save:
+        save_baselines(results, args.baselines)
+    else:
+        flagged = regressions(results, baselines, args.threshold)
+        for line in flagged:
+            print('REGRESSION ' + line)
+        sys.exit(1 if flagged else 0)
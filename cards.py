@@ -0,0 +1,229 @@
+import numpy as np
+
+#Fixed vocabulary of card outcomes. Every card cell (after resolving any d20 split) is one of these strings, with an optional trailing '_~' for results that depend on pitcher fatigue.
+outcomes = (['K', 'BB', 'HBP', 'HR', 'HRN', 'T',
+             'S_*', 'S_**', 'S_7', 'S_8', 'S_9',
+             'D_**', 'D_***', 'D_7', 'D_8', 'D_9']
+            + ['FB_%d_%s' % (pos, typ) for pos in range(1,10) for typ in ['A', 'B', 'B?', 'C']]
+            + ['GB_%d_%s' % (pos, typ) for pos in range(1,10) for typ in ['A', 'A+', 'B', 'B+', 'C', 'C+']]
+            + ['%s_%d' % (play, pos) for play in ['LO', 'PO', 'FO', 'lomax', 'X'] for pos in range(1,10)])
+
+#Dictionary connecting outcome strings to their index in the vocabulary
+outcome_index = {outcome: i for i, outcome in enumerate(outcomes)}
+
+#Probability of each sum (2-12) of two six-sided dice
+sum_weights = np.array([1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1]) / 36
+
+def check_cell(cell):
+    """Checks that a card cell can be played.
+
+    Args:
+        cell (str or list): Card cell. Either an outcome string, a list [n, a, b] giving outcome a on a d20 roll of 1-n and outcome b otherwise, or a one-sided list [n, a] with no outcome above n.
+
+    Raises:
+        ValueError: If the cell is a d20 split without a roll and one or two outcomes, or has an outcome which is not in the vocabulary.
+    """
+    if isinstance(cell, list):
+        if len(cell) not in [2, 3] or type(cell[0]) is not int or not 0 <= cell[0] <= 20:
+            raise ValueError("Malformed d20 split %s" % (cell,))
+        codes = cell[1:]
+    else:
+        codes = [cell]
+    for code in codes:
+        if type(code) is not str or (code[:-2] if code.endswith('_~') else code) not in outcome_index:
+            raise ValueError("Unknown card outcome %s" % (code,))
+
+def cell_outcomes(cell, tired = False):
+    """Splits a card cell into the outcomes it can produce and the probability of each.
+
+    Args:
+        cell (str or list): Card cell. Either an outcome string, a list [n, a, b] giving outcome a on a d20 roll of 1-n and outcome b otherwise, or a one-sided list [n, a].
+        tired (bool, default False): Whether or not the pitcher is tired. Outcomes ending in '~' become S_** if tired.
+
+    Returns:
+        list of tuple: (outcome, probability) pairs. Probabilities sum to 1, less the share of the rolls a one-sided split has no outcome for, which game.PA rolls again.
+    """
+
+    #Resolve d20 split
+    if isinstance(cell, list):
+        pairs = [(cell[1], cell[0] / 20)] + ([(cell[2], (20 - cell[0]) / 20)] if len(cell) == 3 else [])
+    else:
+        pairs = [(cell, 1.)]
+
+    #Resolve pitcher fatigue
+    result = []
+    for outcome, prob in pairs:
+        if outcome.endswith('_~'):
+            outcome = 'S_**' if tired else outcome[:-2]
+        if prob > 0:
+            result.append((outcome, prob))
+
+    return result
+
+def compile_columns(columns, tired = False):
+    """Compiles three columns of a card side into outcome probabilities.
+
+    Args:
+        columns (list of list): The three columns of the card side, each a list of 11 cells for the dice sums 2-12.
+        tired (bool, default False): Whether or not the pitcher is tired.
+
+    Returns:
+        numpy.ndarray: Array of shape (3, len(outcomes)). Row i is the outcome distribution given that column i was rolled. Malformed cells, as found by check_cell, and the missing side of one-sided d20 splits are left out, as game.PA rolls again when it lands on one, so such rows sum to less than 1.
+    """
+    table = np.zeros((3, len(outcomes)))
+
+    #Iterate over columns and dice sums
+    for e_col, column in enumerate(columns):
+        for e_roll, cell in enumerate(column):
+            try:
+                check_cell(cell)
+            except ValueError:
+                continue
+            for outcome, prob in cell_outcomes(cell, tired):
+                table[e_col, outcome_index[outcome]] += sum_weights[e_roll] * prob
+
+    return table
+
+def compile_batter(B, tired = False):
+    """Compiles the batting card of a batter into outcome probabilities.
+
+    Args:
+        B (batter): Batter whose card is compiled.
+        tired (bool, default False): Whether or not the pitcher is tired.
+
+    Returns:
+        dict: Arrays of shape (3, len(outcomes)) for columns 1-3, keyed by pitcher handedness ('L', 'R').
+    """
+    return {hand: compile_columns([B.batting[hand][col] for col in [1,2,3]], tired) for hand in ['L', 'R']}
+
+def compile_pitcher(P, tired = None):
+    """Compiles the pitching card of a pitcher into outcome probabilities.
+
+    Args:
+        P (pitcher): Pitcher whose card is compiled.
+        tired (bool, optional): Whether or not the pitcher is tired. Default is the pitcher's current tired status.
+
+    Returns:
+        dict: Arrays of shape (3, len(outcomes)) for columns 4-6, keyed by batter handedness ('L', 'R').
+    """
+    tired = tired if tired is not None else P.tired
+    return {hand: compile_columns([P.pitching[hand][col] for col in [4,5,6]], tired) for hand in ['L', 'R']}
+
+def side_vector(table):
+    """Converts a compiled card side into the probability of each outcome for a whole plate appearance.
+
+    Args:
+        table (numpy.ndarray): Compiled card side of shape (3, len(outcomes)).
+
+    Returns:
+        numpy.ndarray: Vector of length len(outcomes) summing to 0.5, since each card is rolled on half of all plate appearances, less the share of any malformed cells.
+    """
+    return table.sum(axis = 0) / 6
+
+def matchup_vector(B, P, batter_table = None, pitcher_table = None):
+    """Outcome distribution of a plate appearance between a batter and a pitcher, following the rules in game.PA.
+
+    HRN is resolved using the batter's power rating against the pitcher's hand. Malformed cells are rolled again, so the distribution is over the other cells of both cards.
+
+    Args:
+        B (batter): Current batter.
+        P (pitcher): Current pitcher.
+        batter_table (dict, optional): Compiled batting card of B. Compiled if not provided.
+        pitcher_table (dict, optional): Compiled pitching card of P. Compiled if not provided.
+
+    Returns:
+        numpy.ndarray: Vector of length len(outcomes) summing to 1.
+    """
+    batter_table = batter_table if batter_table is not None else compile_batter(B, P.tired)
+    pitcher_table = pitcher_table if pitcher_table is not None else compile_pitcher(P)
+
+    #Switch hitters bat from the side opposite the pitcher
+    if B.hand == 'S':
+        hand = 'L' if P.hand == 'R' else 'R'
+    else:
+        hand = B.hand
+
+    vector = side_vector(batter_table[P.hand]) + side_vector(pitcher_table[hand])
+
+    #N-homerun is a homerun for batters without weak power, otherwise a single
+    HRN = vector[outcome_index['HRN']]
+    vector[outcome_index['HRN']] = 0
+    if B.batting[P.hand]['pow'] == 'N':
+        vector[outcome_index['HR']] += HRN
+    else:
+        vector[outcome_index['S_**']] += HRN
+
+    return vector / vector.sum()
+
+def sample(vector, n = None, rng = None):
+    """Samples outcomes from an outcome distribution.
+
+    Args:
+        vector (numpy.ndarray): Outcome distribution of length len(outcomes).
+        n (int, optional): Number of samples. Default returns a single outcome.
+        rng (numpy.random.Generator, optional): Random number generator. Default uses a fresh generator.
+
+    Returns:
+        str or numpy.ndarray: Outcome string if n is None, else array of n outcome indices.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    idx = rng.choice(len(outcomes), size = n, p = vector / vector.sum())
+    return outcomes[idx] if n is None else idx
+
+#Columns of the card report: every outcome, then hits by type and the chance of a result that depends on pitcher fatigue
+report_columns = outcomes + ['1B', '2B', '3B', '~']
+_hit_columns = {'1B': [i for i, outcome in enumerate(outcomes) if outcome.startswith('S_')],
+                '2B': [i for i, outcome in enumerate(outcomes) if outcome.startswith('D_')],
+                '3B': [outcome_index['T']]}
+
+def card_report(data = None):
+    """Exact probability of every outcome on every card side of a card library, under the dice of game.PA.
+
+    Every card side is compiled with compile_columns for a rested and a tired pitcher, and the stacked tables are reduced with numpy. Results ending in '~' are counted under their outcome for a rested pitcher, and their share (the mass that turns into S_** when the pitcher is tired) also in the '~' column.
+
+    Args:
+        data (Mapping, optional): Card data keyed by player name, in the format of players.json. Default is every card in the card store.
+
+    Returns:
+        list of tuple: (name, hand) of each row, where hand is the hand of the opposing pitcher (batting cards) or batting side of the opposing batter (pitching cards).
+        numpy.ndarray: Array of shape (rows, len(report_columns)). Each row is the distribution of a card side given that the side is rolled, so its outcomes sum to 1. Malformed cells are left out, as game.PA rolls again when it lands on one.
+    """
+    if data is None:
+        from player import player_data
+        data = player_data
+
+    rows, tables = [], []
+    for name in data:
+        card = data[name]
+        side, columns = ('batting', ['1', '2', '3']) if card['type'] == 'B' else ('pitching', ['4', '5', '6'])
+        for hand in ['L', 'R']:
+            rows.append((name, hand))
+            tables.append([compile_columns([card[side][hand][column] for column in columns], tired) for tired in [False, True]])
+
+    #Array of shape (rows, rested or tired, len(outcomes)), each card side summed over its columns
+    tables = np.array(tables).reshape(len(rows), 2, 3, len(outcomes)).sum(axis = 2)
+    rested = tables[:, 0]
+    fatigue = rested - tables[:, 1]
+    fatigue[:, outcome_index['S_**']] = 0
+
+    report = np.zeros((len(rows), len(report_columns)))
+    report[:, :len(outcomes)] = rested
+    report[:, -1] = fatigue.sum(axis = 1)
+    report /= rested.sum(axis = 1, keepdims = True)
+    for column, indices in _hit_columns.items():
+        report[:, report_columns.index(column)] = report[:, indices].sum(axis = 1)
+    return rows, report
+
+def card_report_frame(data = None):
+    """Card report as a DataFrame, with only the columns of outcomes found on some card.
+
+    Args:
+        data (Mapping, optional): Card data keyed by player name. Default is every card in the card store.
+
+    Returns:
+        pandas.DataFrame: Probabilities indexed by (name, hand), as given by card_report.
+    """
+    import pandas as pd
+    rows, report = card_report(data)
+    df = pd.DataFrame(report, index = pd.MultiIndex.from_tuples(rows, names = ['name', 'hand']), columns = report_columns)
+    return df.loc[:, (df != 0).any(axis = 0)]
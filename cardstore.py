@@ -0,0 +1,286 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+
+#Version of the schema, kept in PRAGMA user_version. Stores of older versions are migrated when opened
+schema_version = 1
+
+#Schema of the card store. Card data is kept as the JSON of players.json, and is only parsed when a card is looked up.
+#A card is identified by name, team and season. Team and season may be NULL, which never compare equal, so the key replaces them with sentinels.
+schema = """
+CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    hand TEXT,
+    team TEXT,
+    season INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    card_id INTEGER NOT NULL REFERENCES cards(id),
+    pos INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS cards_key ON cards(name, COALESCE(team, ''), COALESCE(season, -1));
+CREATE INDEX IF NOT EXISTS cards_name ON cards(name);
+CREATE INDEX IF NOT EXISTS cards_team ON cards(team, season);
+CREATE INDEX IF NOT EXISTS cards_season ON cards(season);
+CREATE INDEX IF NOT EXISTS cards_type ON cards(type);
+CREATE INDEX IF NOT EXISTS positions_pos ON positions(pos, card_id);
+CREATE INDEX IF NOT EXISTS positions_card ON positions(card_id);
+"""
+
+#Version 0 declared UNIQUE (name, team, season), which let cards without a team or season be imported twice. Keep the latest copy of each.
+migrate_0 = """
+DELETE FROM cards WHERE id NOT IN (SELECT MAX(id) FROM cards GROUP BY name, COALESCE(team, ''), COALESCE(season, -1));
+DELETE FROM positions WHERE card_id NOT IN (SELECT id FROM cards);
+"""
+
+@contextmanager
+def immediate(conn):
+    """Runs a block in an immediate transaction, which takes the write lock on entry. Commits at the end of the block, or rolls back on an exception.
+
+    Args:
+        conn (sqlite3.Connection): Connection in autocommit mode.
+
+    Yields:
+        sqlite3.Connection: The connection.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+class card_store(Mapping):
+    """Indexed single-file store of player cards, backed by SQLite.
+
+    Cards are looked up by name (as player_data was), or searched by name, team, season, type and position. Only the cards that are looked up are read, and the stored data of at most cache_size cards is kept, so startup time and memory don't grow with the size of the library. Every lookup parses a new dict, so a caller changing the card it gets never changes what later lookups return.
+
+    Writes are made in immediate transactions, so processes sharing the store (such as simulate's workers on first run) import the source file once and never see half an import.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        source (str or None): JSON file imported into the store if the store is missing it or it has changed since.
+        cache_size (int): Largest number of cards whose stored data is kept in the least recently used cache.
+    """
+    def __init__(self, path = 'players.db', source = 'players.json', cache_size = 1024):
+        """Initialization function for card_store. The database is opened on first use.
+
+        Args:
+            path (str, default 'players.db'): Path of the SQLite database. Created if it doesn't exist.
+            source (str or None, default 'players.json'): JSON file in the format of players.json to import on first use if it is newer than the store. None disables the import.
+            cache_size (int, default 1024): Largest number of cards whose stored data is kept in memory.
+        """
+        self.path = path
+        self.source = source
+        self.cache_size = cache_size
+        self._conn = None
+        self._pid = None
+        self._cache = OrderedDict()
+
+    def _connect(self):
+        """Opens the database, once per process, importing the source file if necessary.
+
+        Returns:
+            sqlite3.Connection: Connection to the database.
+        """
+        if self._conn is None or self._pid != os.getpid(): #Connections can't be shared with forked workers
+            #Autocommit mode, so that transactions are only the ones begun here. Wait for other processes' imports rather than fail
+            conn = sqlite3.connect(self.path, timeout = 60, isolation_level = None)
+
+            #The source is checked under the write lock: a process waiting on another's import sees it done and skips it
+            with immediate(conn):
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < schema_version:
+                    if version == 0 and conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cards'").fetchone() is not None:
+                        for statement in migrate_0.strip().split(';\n'):
+                            conn.execute(statement)
+                    for statement in schema.strip().split(';\n'):
+                        conn.execute(statement)
+                    conn.execute("PRAGMA user_version = %d" % schema_version)
+
+                if self.source is not None and os.path.exists(self.source):
+                    row = conn.execute("SELECT mtime FROM sources WHERE path = ?", (os.path.abspath(self.source),)).fetchone()
+                    if row is None or row[0] < os.path.getmtime(self.source):
+                        self._import(conn, self.source)
+
+            self._conn = conn
+            self._pid = os.getpid()
+            self._cache.clear()
+        return self._conn
+
+    def _import(self, conn, path, team = None, season = None):
+        """Imports cards from a JSON file within the current transaction.
+
+        Args:
+            conn (sqlite3.Connection): Connection in a transaction.
+            path (str): Path of the JSON file.
+            team (str, optional): Team of all cards in the file.
+            season (int, optional): Season of all cards in the file.
+
+        Returns:
+            int: Number of cards imported.
+        """
+        with open(path, mode = "r", encoding = "utf-8") as read_file:
+            data = json.load(read_file)
+
+        for name, dic in data.items():
+            #Add the card if it's new, then overwrite it, so that a card keeps its id when replaced
+            key = (name, team, season)
+            conn.execute("INSERT OR IGNORE INTO cards (name, type, hand, team, season, data) VALUES (?, ?, ?, ?, ?, '')", (name, dic['type'], dic['hand'], team, season))
+            card_id, = conn.execute("SELECT id FROM cards WHERE name = ? AND COALESCE(team, '') = COALESCE(?, '') AND COALESCE(season, -1) = COALESCE(?, -1)", key).fetchone()
+            conn.execute("UPDATE cards SET type = ?, hand = ?, data = ? WHERE id = ?", (dic['type'], dic['hand'], json.dumps(dic), card_id))
+
+            #Batters list fielding under 'fielding', pitchers under 'field'
+            field = dic['fielding'] if dic['type'] == 'B' else dic['field']
+            conn.execute("DELETE FROM positions WHERE card_id = ?", (card_id,))
+            conn.executemany("INSERT INTO positions (card_id, pos) VALUES (?, ?)", [(card_id, int(pos)) for pos in field])
+
+        conn.execute("INSERT OR REPLACE INTO sources (path, mtime) VALUES (?, ?)", (os.path.abspath(path), os.path.getmtime(path)))
+        self._cache.clear()
+        return len(data)
+
+    def import_json(self, path, team = None, season = None):
+        """Imports cards from a JSON file in the format of players.json. Cards already in the store with the same name, team and season are replaced.
+
+        Args:
+            path (str): Path of the JSON file.
+            team (str, optional): Team of all cards in the file.
+            season (int, optional): Season of all cards in the file.
+
+        Returns:
+            int: Number of cards imported.
+        """
+        conn = self._connect()
+        with immediate(conn):
+            return self._import(conn, path, team, season)
+
+    def card_id(self, name, team = None, season = None):
+        """Finds the id of a player's card. If several cards match, the one from the latest season is used.
+
+        Args:
+            name (str): Player name.
+            team (str, optional): Team.
+            season (int, optional): Season.
+
+        Returns:
+            int: Id of the card.
+
+        Raises:
+            KeyError: If no card matches.
+        """
+        query = "SELECT id FROM cards WHERE name = ?"
+        args = [name]
+        for column, value in [('team', team), ('season', season)]:
+            if value is not None:
+                query += " AND %s = ?" % column
+                args.append(value)
+        row = self._connect().execute(query + " ORDER BY season DESC LIMIT 1", args).fetchone()
+        if row is None:
+            raise KeyError((name, team, season))
+        return row[0]
+
+    def key(self, card_id):
+        """Name, team and season of a card.
+
+        Args:
+            card_id (int): Id of the card.
+
+        Returns:
+            tuple: (name, team, season).
+
+        Raises:
+            KeyError: If there is no card with this id.
+        """
+        row = self._connect().execute("SELECT name, team, season FROM cards WHERE id = ?", (card_id,)).fetchone()
+        if row is None:
+            raise KeyError(card_id)
+        return tuple(row)
+
+    def find(self, name = None, team = None, season = None, type = None, position = None):
+        """Searches the store. All given criteria must match.
+
+        Args:
+            name (str, optional): Player name.
+            team (str, optional): Team.
+            season (int, optional): Season.
+            type (str, optional): 'B' for batters, 'P' for pitchers.
+            position (int, optional): Position the player can field (0 for DH).
+
+        Returns:
+            list of tuple: (id, name, team, season) of each matching card, ordered by name and season.
+        """
+        query = "SELECT DISTINCT cards.id, name, team, season FROM cards"
+        conditions, args = [], []
+        if position is not None:
+            query += " JOIN positions ON positions.card_id = cards.id"
+            conditions.append("positions.pos = ?")
+            args.append(position)
+        for column, value in [('name', name), ('team', team), ('season', season), ('type', type)]:
+            if value is not None:
+                conditions.append("%s = ?" % column)
+                args.append(value)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY name, season"
+        return self._connect().execute(query, args).fetchall()
+
+    def card(self, card_id):
+        """Loads a card by id.
+
+        Args:
+            card_id (int): Id of the card, as returned by find.
+
+        Returns:
+            dict: Card data in the format of players.json. A new dict on every lookup.
+
+        Raises:
+            KeyError: If there is no card with this id.
+        """
+        row = self._connect().execute("SELECT data FROM cards WHERE id = ?", (card_id,)).fetchone()
+        if row is None:
+            raise KeyError(card_id)
+        return json.loads(row[0])
+
+    def __getitem__(self, name):
+        """Loads a card by player name. If the player has cards from several seasons, the latest is used.
+
+        Args:
+            name (str): Player name.
+
+        Returns:
+            dict: Card data in the format of players.json. A new dict on every lookup.
+
+        Raises:
+            KeyError: If there is no card for this player.
+        """
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return json.loads(self._cache[name])
+
+        row = self._connect().execute("SELECT data FROM cards WHERE name = ? ORDER BY season DESC LIMIT 1", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        self._cache[name] = row[0]
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last = False)
+        return json.loads(row[0])
+
+    def __contains__(self, name):
+        return self._connect().execute("SELECT 1 FROM cards WHERE name = ? LIMIT 1", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        return (row[0] for row in self._connect().execute("SELECT DISTINCT name FROM cards ORDER BY name"))
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(DISTINCT name) FROM cards").fetchone()[0]
@@ -1,18 +1,95 @@
 import numpy as np
 
-def diceroll_6():
+class dice_source():
+    """Seedable source of dice rolls. Rolls are drawn from a numpy Generator in blocks and handed out one at a time, which avoids the overhead of a numpy call per roll. Blocks start small and double in size up to block, so short-lived sources (e.g. one per game) don't draw rolls they never use.
+
+    Attributes:
+        seed (numpy.random.SeedSequence): Seed sequence the rolls are drawn from. Used to fork independent sources.
+        rng (numpy.random.Generator): Random number generator the blocks are drawn from.
+        block (int): Largest number of rolls drawn at a time.
+    """
+    def __init__(self, seed = None, block = 4096):
+        """Initialization function for dice_source.
+
+        Args:
+            seed (int or numpy.random.SeedSequence, optional): Seed for the rolls. Default draws fresh entropy.
+            block (int, default 4096): Largest number of rolls drawn at a time.
+        """
+        self.seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed)
+        self.block = block
+
+        #Buffers of rolls, position of next roll in each, and size of next block
+        self._d6 = []
+        self._d6_pos = 0
+        self._d6_size = 64
+        self._d20 = []
+        self._d20_pos = 0
+        self._d20_size = 64
+
+    def d6(self):
+        """Rolls 3 six-sided dice, and sums the second 2.
+
+        Returns:
+            list of int: list of two int. first element is result of single six-sided die, second element is sum of roll of two other six-sided die.
+        """
+        if self._d6_pos == len(self._d6):
+            d = self.rng.integers(1, 7, (self._d6_size, 3))
+            self._d6 = np.stack([d[:,0], d[:,1] + d[:,2]], axis = 1).tolist()
+            self._d6_pos = 0
+            self._d6_size = min(2 * self._d6_size, self.block)
+        self._d6_pos += 1
+        return self._d6[self._d6_pos - 1]
+
+    def d20(self):
+        """Rolls a 20-sided die.
+
+        Returns:
+            int: Result of die roll.
+        """
+        if self._d20_pos == len(self._d20):
+            self._d20 = self.rng.integers(1, 21, self._d20_size).tolist()
+            self._d20_pos = 0
+            self._d20_size = min(2 * self._d20_size, self.block)
+        self._d20_pos += 1
+        return self._d20[self._d20_pos - 1]
+
+    def fork(self, n = None):
+        """Creates independent dice sources seeded from this one.
+
+        Args:
+            n (int, optional): Number of sources to create. Default creates one.
+
+        Returns:
+            dice_source or list of dice_source: New source, or list of n new sources.
+        """
+        if n is None:
+            return dice_source(self.seed.spawn(1)[0], self.block)
+        return [dice_source(seed, self.block) for seed in self.seed.spawn(n)]
+
+def diceroll_6(dice = None):
     """Function for rolling 3 six-sided dice, and summing the second 2.
 
+    Args:
+        dice (dice_source, optional): Source of the rolls. Default uses the global numpy random state.
+
     Returns:
         list of int: list of two int. first element is result of single six-sided die, second element is sum of roll of two other six-sided die.
     """
+    if dice is not None:
+        return dice.d6()
     d = np.random.randint(1,7,[3])
     return [d[0],d[1]+d[2]]
 
-def diceroll_20():
+def diceroll_20(dice = None):
     """Function for rolling 20-sided die.
 
+    Args:
+        dice (dice_source, optional): Source of the roll. Default uses the global numpy random state.
+
     Returns:
         int: Result of die roll.
     """
+    if dice is not None:
+        return dice.d20()
     return np.random.randint(1,21)
\ No newline at end of file
@@ -0,0 +1,385 @@
+import json
+import os
+import struct
+import warnings
+import zlib
+from game import box_score, scorecard, scoreboard
+
+#Fields of each plate appearance event recorded by game.PA, in order. moves gives, for the batter and the runners on first, second
+#and third at the start of the plate appearance, the base each ended up on: 0 if nobody was there, 1-3 for a base, 4 if scored, 5 if out.
+event_fields = ('batting_team', 'inning', 'batter', 'pitcher', 'roll', 'cell', 'roll2', 'chance', 'pre', 'pre_runs',
+                'play', 'runs', 'RBI', 'BS_arg', 'SC_arg', 'outs', 'bases', 'away_score', 'home_score', 'moves')
+
+#File layout: magic, then one frame per game. Each frame is a header (game id, payload length, flags) followed by the payload, compressed with zlib if flagged.
+magic = b'SOMEVT2\n'
+frame_header = struct.Struct('<QIB')
+compressed = 1
+
+#Payload layout: the game header as JSON, a table of strings, a table of values (play tuples and box score and scorecard arguments), then the events.
+#Names are stored as string ids, and the nested fields as value ids, so each event is one fixed-size record of event_struct.
+#Fields: batting_team, inning, batter, pitcher, roll (d6, 2d6), cell, roll2, chance, pre, pre_runs, play, runs, RBI, BS_arg, SC_arg, outs, bases, scores, moves (4).
+count = struct.Struct('<I')
+length = struct.Struct('<H')
+event_struct = struct.Struct('<BHHHBBHBHHHHHBHHBBHH4B')
+
+#Values are tagged: int, string id, tuple or list of values, None, True or False
+value_int = struct.Struct('<q')
+
+def _pack_value(value, strings, out):
+    """Appends the tagged encoding of a value. Only the types found in play tuples and box score and scorecard arguments are supported.
+
+    Args:
+        value (int, str, tuple, list, bool or None): Value to encode.
+        strings (dict): Id of each string in the string table, added to as new strings are found.
+        out (list of bytes): Encoded parts.
+
+    Raises:
+        TypeError: If the value, or anything in it, has another type.
+    """
+    if value is None or type(value) is bool:
+        out.append({None: b'N', True: b'T', False: b'F'}[value])
+    elif type(value) is int:
+        out.append(b'i' + value_int.pack(value))
+    elif type(value) is str:
+        out.append(b's' + length.pack(strings.setdefault(value, len(strings))))
+    elif type(value) in (tuple, list):
+        out.append((b't' if type(value) is tuple else b'l') + length.pack(len(value)))
+        for item in value:
+            _pack_value(item, strings, out)
+    else:
+        raise TypeError('Cannot encode %r in an event log' % (value,))
+
+def _unpack_value(data, pos, strings):
+    """Reads one tagged value.
+
+    Args:
+        data (bytes): Payload.
+        pos (int): Offset of the value.
+        strings (list of str): String table.
+
+    Returns:
+        Value, and the offset after it.
+
+    Raises:
+        ValueError: If the tag is unknown.
+    """
+    tag = data[pos:pos + 1]
+    pos += 1
+    if tag in (b'N', b'T', b'F'):
+        return {b'N': None, b'T': True, b'F': False}[tag], pos
+    if tag == b'i':
+        return value_int.unpack_from(data, pos)[0], pos + value_int.size
+    if tag == b's':
+        return strings[length.unpack_from(data, pos)[0]], pos + length.size
+    if tag in (b't', b'l'):
+        n, = length.unpack_from(data, pos)
+        pos += length.size
+        items = []
+        for i in range(n):
+            item, pos = _unpack_value(data, pos, strings)
+            items.append(item)
+        return (tuple(items) if tag == b't' else items), pos
+    raise ValueError('Unknown value tag %r in event log' % tag)
+
+def game_header(G):
+    """Everything needed besides the events to replay a game.
+
+    Args:
+        G (game): Game, normally finished.
+
+    Returns:
+        dict: Teams, player names at each position, lineups by position number, result and final score.
+    """
+    positions = [[player.name for player in G.GS.positions[team]] for team in [0,1]]
+    lineups = [[G.GS.positions[team].index(B) for B in G.GS.lineup[team]] for team in [0,1]]
+    return {'teams': list(G.SB.teams), 'positions': positions, 'lineups': lineups, 'result': G.result, 'score': list(G.GS.score)}
+
+def encode_game(header, events, compress = True):
+    """Packs a game into a frame payload. Can be run in worker processes, so frames are compressed in parallel.
+
+    Args:
+        header (dict): Game header, as given by game_header.
+        events (list of tuple): Plate appearance events of the game.
+        compress (bool, default True): Compress the payload with zlib.
+
+    Returns:
+        bytes: Payload.
+        int: Frame flags.
+    """
+    strings = {}
+    values = {}
+    value_parts = []
+
+    def value_id(value):
+        #Values repeat from event to event (the same plays and arguments), so each distinct one is stored once
+        key = (type(value), repr(value))
+        if key not in values:
+            values[key] = len(values)
+            _pack_value(value, strings, value_parts)
+        return values[key]
+
+    def string_id(string):
+        return strings.setdefault(string, len(strings))
+
+    records = []
+    for (batting_team, inning, B, P, roll, cell, roll2, chance, pre, pre_runs, play, runs, RBI, BS_arg, SC_arg,
+         outs, bases, away_score, home_score, moves) in events:
+        records.append(event_struct.pack(batting_team, inning, string_id(B), string_id(P), roll[0], roll[1], value_id(cell), roll2,
+                                         value_id(chance), string_id(pre), value_id(pre_runs), value_id(play), value_id(runs), RBI,
+                                         value_id(BS_arg), value_id(SC_arg), outs, bases, away_score, home_score, *moves))
+
+    header = json.dumps(header).encode('utf-8')
+    string_parts = [length.pack(len(encoded)) + encoded for encoded in (string.encode('utf-8') for string in strings)]
+    payload = b''.join([count.pack(len(header)), header,
+                        count.pack(len(strings)), *string_parts,
+                        count.pack(len(values)), *value_parts,
+                        count.pack(len(records)), *records])
+    if compress:
+        return zlib.compress(payload, 6), compressed
+    return payload, 0
+
+def decode_game(payload, flags):
+    """Unpacks a frame payload.
+
+    Args:
+        payload (bytes): Payload, as given by encode_game.
+        flags (int): Frame flags.
+
+    Returns:
+        dict: Game header.
+        list of tuple: Plate appearance events.
+
+    Raises:
+        ValueError: If the payload is malformed.
+    """
+    if flags & compressed:
+        payload = zlib.decompress(payload)
+
+    try:
+        n, = count.unpack_from(payload, 0)
+        header = json.loads(payload[count.size:count.size + n].decode('utf-8'))
+        pos = count.size + n
+
+        n, = count.unpack_from(payload, pos)
+        pos += count.size
+        strings = []
+        for i in range(n):
+            size, = length.unpack_from(payload, pos)
+            strings.append(payload[pos + length.size:pos + length.size + size].decode('utf-8'))
+            pos += length.size + size
+
+        n, = count.unpack_from(payload, pos)
+        pos += count.size
+        values = []
+        for i in range(n):
+            value, pos = _unpack_value(payload, pos, strings)
+            values.append(value)
+
+        n, = count.unpack_from(payload, pos)
+        pos += count.size
+        if len(payload) != pos + n * event_struct.size:
+            raise ValueError('Event log payload has %d bytes of events, expected %d' % (len(payload) - pos, n * event_struct.size))
+        events = []
+        for (batting_team, inning, B, P, d6, sum2d6, cell, roll2, chance, pre, pre_runs, play, runs, RBI, BS_arg, SC_arg,
+             outs, bases, away_score, home_score, *moves) in event_struct.iter_unpack(payload[pos:]):
+            events.append((batting_team, inning, strings[B], strings[P], (d6, sum2d6), values[cell], roll2, values[chance], strings[pre],
+                           values[pre_runs], values[play], values[runs], bool(RBI), values[BS_arg], values[SC_arg],
+                           outs, bases, away_score, home_score, tuple(moves)))
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError('Malformed event log payload: %s' % e) from e
+    return header, events
+
+class event_log():
+    """Append-only play-by-play log of many games in one binary file. Frames are buffered and written in batches.
+
+    Attributes:
+        path (str): Path of the log file.
+        compress (bool): Whether or not frames are compressed.
+        flush_bytes (int): Buffered bytes above which frames are written to the file.
+        next_id (int): Game id given to the next game written without one.
+    """
+    def __init__(self, path, compress = True, flush_bytes = 1 << 20):
+        """Initialization function for event_log. Opens the file for appending, creating it if it doesn't exist.
+
+        Args:
+            path (str): Path of the log file.
+            compress (bool, default True): Compress frames with zlib.
+            flush_bytes (int, default 1 MiB): Buffered bytes above which frames are written to the file.
+        """
+        self.path = path
+        self.compress = compress
+        self.flush_bytes = flush_bytes
+        self._buffer = []
+        self._buffered = 0
+
+        #Continue numbering after the games already in the file. A frame cut off by a crash is dropped, so new frames follow the last whole one
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            reader = event_reader(path)
+            ids = reader.index
+            if reader.truncated:
+                with open(path, 'r+b') as f:
+                    f.truncate(reader.end)
+        else:
+            ids = {}
+        self.next_id = max(ids) + 1 if ids else 0
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(magic)
+
+    def append(self, game_id, payload, flags):
+        """Appends an encoded game.
+
+        Args:
+            game_id (int or None): Id of the game. None uses next_id.
+            payload (bytes): Payload, as given by encode_game.
+            flags (int): Frame flags, as given by encode_game.
+
+        Returns:
+            int: Id of the game.
+        """
+        if game_id is None:
+            game_id = self.next_id
+        self.next_id = max(self.next_id, game_id + 1)
+
+        self._buffer.append(frame_header.pack(game_id, len(payload), flags))
+        self._buffer.append(payload)
+        self._buffered += frame_header.size + len(payload)
+        if self._buffered >= self.flush_bytes:
+            self.flush()
+        return game_id
+
+    def write_game(self, G, game_id = None):
+        """Appends a recorded game.
+
+        Args:
+            G (game): Game played with record = True.
+            game_id (int, optional): Id of the game. Default is next_id.
+
+        Returns:
+            int: Id of the game.
+        """
+        return self.append(game_id, *encode_game(game_header(G), G.events, self.compress))
+
+    def flush(self):
+        """Writes all buffered frames to the file in one write.
+        """
+        if self._buffer:
+            self._file.write(b''.join(self._buffer))
+            self._file.flush()
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        """Flushes and closes the file.
+        """
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class event_reader():
+    """Random access reader of an event log. Only frame headers are read when opening, and games are decoded when looked up.
+
+    A final frame cut off mid-write (e.g. by a crash) is left out of the index, with a warning.
+
+    Attributes:
+        path (str): Path of the log file.
+        index (dict): (offset, length, flags) of the payload of each game, keyed by game id. If a game id was written twice, the last is used.
+        end (int): Offset of the end of the last whole frame.
+        truncated (int): Number of bytes of a cut off final frame after end. 0 if the log is whole.
+    """
+    def __init__(self, path):
+        """Initialization function for event_reader. Builds the index by skipping from frame header to frame header.
+
+        Args:
+            path (str): Path of the log file.
+
+        Raises:
+            ValueError: If the file is not an event log of this version.
+        """
+        self.path = path
+        self.index = {}
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            if f.read(len(magic)) != magic:
+                raise ValueError('%s is not an event log' % path)
+            self.end = f.tell()
+            while self.end + frame_header.size <= size:
+                game_id, length, flags = frame_header.unpack(f.read(frame_header.size))
+                if self.end + frame_header.size + length > size:
+                    break
+                self.index[game_id] = (self.end + frame_header.size, length, flags)
+                self.end = f.seek(length, 1)
+        self.truncated = size - self.end
+        if self.truncated:
+            warnings.warn('%s ends with %d bytes of a cut off frame, which were ignored' % (path, self.truncated), stacklevel = 2)
+
+    def __getitem__(self, game_id):
+        """Loads a game.
+
+        Args:
+            game_id (int): Id of the game.
+
+        Returns:
+            dict: Game header.
+            list of tuple: Plate appearance events.
+        """
+        offset, length, flags = self.index[game_id]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return decode_game(f.read(length), flags)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+def replay(header, events):
+    """Rebuilds the box score, scorecard and scoreboard of a game from its events, exactly as game.PA updated them.
+
+    Args:
+        header (dict): Game header.
+        events (list of tuple): Plate appearance events.
+
+    Returns:
+        box_score: Box score of the game.
+        scorecard: Scorecard of the game.
+        scoreboard: Scoreboard of the game.
+    """
+    positions = header['positions']
+    lineups = header['lineups']
+    BS = box_score(positions = [list(positions[0]), list(positions[1])], lineups = lineups)
+    SC = scorecard(positions = [list(positions[0]), list(positions[1])], lineups = lineups)
+    SB = scoreboard(list(header['teams']))
+
+    half = (1, 0)
+    SB.inning_start(*half)
+    for event in events:
+        batting_team, inning, B, P, roll, cell, roll2, chance, pre, pre_runs, play, runs, RBI, BS_arg, SC_arg = event[:15]
+
+        #New half inning
+        if (inning, batting_team) != half:
+            half = (inning, batting_team)
+            SB.inning_start(*half)
+
+        #Runs on a wild pitch or passed ball before the play
+        if len(pre_runs) > 0:
+            BS.batter_runs(batting_team, B, list(pre_runs), False)
+            BS.pitcher_runs(batting_team, P, list(pre_runs))
+            SB.runs(list(pre_runs), inning, batting_team)
+
+        BS.batter_runs(batting_team, B, list(runs), RBI)
+        BS.pitcher_runs(batting_team, P, list(runs))
+        SB.runs(list(runs), inning, batting_team)
+
+        BS.plays[play[0]](batting_team, B, P, *BS_arg)
+        SB.plays[play[0]](inning, batting_team)
+        SC.plays[play[0]](B, inning, batting_team, *SC_arg)
+
+    return BS, SC, SB
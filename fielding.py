@@ -1,8 +1,124 @@
 import json
+import numpy as np
+from playcodes import tokenize_cell
 
 #Load json of fielding chart
 with open("Adv_FieldingChart.json", mode = "r", encoding = "utf-8") as read_file:
     fieldingchart = json.load(read_file)
 
 #Convert keys of fielding chart to int if possible
-fieldingchart = {int(pos): {int(rating) if rating != "E" else rating: res if rating != "E" else {int(num): errors for num, errors in res.items()} for rating, res in chart.items()} for pos, chart in fieldingchart.items()}
\ No newline at end of file
+fieldingchart = {int(pos): {int(rating) if rating != "E" else rating: res if rating != "E" else {int(num): errors for num, errors in res.items()} for rating, res in chart.items()} for pos, chart in fieldingchart.items()}
+
+#Fielding chart with every result parsed into play tuples
+fieldingplays = {pos: {rating: tuple(tokenize_cell(res) for res in results) if rating != "E" else {num: tuple(tokenize_cell(res) for res in errors) for num, errors in results.items()} for rating, results in chart.items()} for pos, chart in fieldingchart.items()}
+
+#Vocabulary of every result of the fielding chart, with E (go to the error sub-table) first
+chance_results = [('E',)]
+for chart in fieldingplays.values():
+    for rating, results in chart.items():
+        for res in (results if rating != "E" else [res for errors in results.values() for res in errors]):
+            for play in ([res] if type(res[0]) is not int else res[1:]):
+                if play not in chance_results:
+                    chance_results.append(play)
+chance_index = {play: i for i, play in enumerate(chance_results)}
+error_code = chance_index[('E',)]
+
+#Range table: result index by [pos, rating, d20 - 1]. Error table: result index by [pos, error rating, 2d6 - 2, d6 - 1]. Unused entries are -1.
+max_error = max(num for chart in fieldingplays.values() for num in chart['E'])
+range_table = np.full((10, 6, 20), -1, dtype = np.int16)
+error_table = np.full((10, max_error + 1, 11, 6), -1, dtype = np.int16)
+for pos, chart in fieldingplays.items():
+    for rating, results in chart.items():
+        if rating != "E":
+            range_table[pos, rating] = [chance_index[res] for res in results]
+            continue
+        for num, errors in results.items():
+            for e_roll, res in enumerate(errors):
+                if type(res[0]) is int: #Third die: first result if it is at most n
+                    error_table[pos, num, e_roll, :res[0]] = chance_index[res[1]]
+                    error_table[pos, num, e_roll, res[0]:] = chance_index[res[2]]
+                else:
+                    error_table[pos, num, e_roll] = chance_index[res]
+
+def resolve_chances(pos, rating, E_n, d20, d6, sum2d6):
+    """Resolves a batch of X chances at once, with the same dice as game_state.X.
+
+    All arguments are arrays of the same shape (or scalars). d6 and sum2d6 are only used for chances sent to the error sub-table.
+
+    Args:
+        pos (numpy.ndarray): Position the ball was hit to.
+        rating (numpy.ndarray): Range rating of the fielder at that position.
+        E_n (numpy.ndarray): Error rating of the fielder at that position.
+        d20 (numpy.ndarray): Range roll.
+        d6 (numpy.ndarray): Single six-sided die, as element 0 of diceroll_6.
+        sum2d6 (numpy.ndarray): Sum of two six-sided dice, as element 1 of diceroll_6.
+
+    Returns:
+        numpy.ndarray: Index of each result in chance_results.
+    """
+    pos, rating, E_n, d20, d6, sum2d6 = np.broadcast_arrays(pos, rating, E_n, d20, d6, sum2d6)
+    result = range_table[pos, rating, d20 - 1]
+    error = result == error_code
+    result[error] = error_table[pos[error], E_n[error], sum2d6[error] - 2, d6[error] - 1]
+    return result
+
+def sample_chances(pos, rating, E_n, rng = None):
+    """Rolls and resolves a batch of X chances.
+
+    Args:
+        pos (numpy.ndarray): Position the ball was hit to.
+        rating (numpy.ndarray): Range rating of the fielder at that position.
+        E_n (numpy.ndarray): Error rating of the fielder at that position.
+        rng (numpy.random.Generator, optional): Random generator. Default is a new unseeded generator.
+
+    Returns:
+        numpy.ndarray: Index of each result in chance_results.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    shape = np.broadcast(pos, rating, E_n).shape
+    return resolve_chances(pos, rating, E_n, rng.integers(1, 21, shape), rng.integers(1, 7, shape),
+                           rng.integers(1, 7, shape) + rng.integers(1, 7, shape))
+
+#Probability of each (d20, 2d6, d6) roll, in the layout of error_table
+_error_weights = np.array([6 - abs(e_roll - 5) for e_roll in range(11)])[:, None] / 36 / 6 * np.ones(6)
+
+def chance_vectors(pos, rating, E_n):
+    """Exact distributions of the results of X chances, for many fielders at once.
+
+    Args:
+        pos (numpy.ndarray): Array of shape (N,) of positions.
+        rating (numpy.ndarray): Array of shape (N,) of range ratings.
+        E_n (numpy.ndarray): Array of shape (N,) of error ratings.
+
+    Returns:
+        numpy.ndarray: Array of shape (N, len(chance_results)) of result probabilities.
+    """
+    pos, rating, E_n = (np.atleast_1d(a) for a in np.broadcast_arrays(pos, rating, E_n))
+    n = len(pos)
+    vectors = np.zeros((n, len(chance_results)))
+
+    #Range roll
+    rows = np.repeat(np.arange(n), 20)
+    results = range_table[pos, rating].ravel()
+    np.add.at(vectors, (rows, results), 1 / 20)
+
+    #Error sub-table, reached with the probability of an E result
+    p_error = vectors[:, error_code].copy()
+    vectors[:, error_code] = 0
+    rows = np.repeat(np.arange(n), 66)
+    results = error_table[pos, E_n].reshape(n, -1)
+    np.add.at(vectors, (rows, results.ravel()), (p_error[:, None] * _error_weights.ravel()).ravel())
+    return vectors
+
+def chance_distribution(player, pos):
+    """Exact distribution of the results of an X chance, as resolved by game_state.X.
+
+    Args:
+        player (batter or pitcher): Fielder the ball was hit to.
+        pos (int): Position the ball was hit to.
+
+    Returns:
+        dict: Probability of each result, keyed by play tuple.
+    """
+    vector = chance_vectors(pos, player.field[pos][0], player.field[pos][1])[0]
+    return {chance_results[i]: vector[i] for i in np.nonzero(vector)[0]}
@@ -1,14 +1,45 @@
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
-from PIL import Image
 from player import pitcher, batter
-import pandas as pd
-from dice import diceroll_6, diceroll_20
-import re 
-from running import runner_advancement
-from fielding import fieldingchart
-from tabulate import tabulate
+from registry import registry
+from dice import diceroll_6, diceroll_20, dice_source
+from running import runner_advancement, ask_user, send_threshold, quiet
+from fielding import fieldingplays
+
+#matplotlib, PIL, pandas and tabulate are only imported by the display functions, so headless games start without them
+
+#Decoded images of the baseball diamond, keyed by largest size, loaded on first use
+_diamond = {}
+
+def diamond_image(max_size = 1000):
+    """Image of the baseball diamond, decoded and scaled down once and shared by every display.
+
+    The source image is about 3000 pixels square, far more than any display draws it at. Drawn at full size, each redraw of the figure resampled it through several float copies of about 280 MB.
+
+    Args:
+        max_size (int, default 1000): Largest width or height of the image, in pixels.
+
+    Returns:
+        numpy.ndarray: RGB image array.
+    """
+    if max_size not in _diamond:
+        from PIL import Image
+        image = Image.open('diamonddiagram.jpg')
+        image.thumbnail((max_size, max_size))
+        _diamond[max_size] = np.asarray(image)
+    return _diamond[max_size]
+
+#Positions on the diamond image, in axes coordinates, shared by game_state.display and the views of the interface
+base_corners = [[[0.7210526315789474,0.35452793834296725], [0.7535087719298246,0.31888246628131023], [0.7842105263157895,0.35452793834296725], [0.7535087719298246,0.3901734104046243]],
+                [[0.46842105263157896,0.6358381502890174], [0.5008771929824561,0.6001926782273603], [0.5333333333333333,0.6358381502890174], [0.5008771929824561,0.6714836223506744]],
+                [[0.21929824561403508,0.35452793834296725], [0.25,0.31888246628131023], [0.2807017543859649,0.35452793834296725], [0.25,0.3901734104046243]]]
+runner_spots = [(0.8,0.33), (0.5,0.65), (0.2,0.33)]
+fielder_spots = {1: (0.5,0.38), 2: (0.5,0.03), 3: (0.75,0.42), 4: (0.65,0.55), 5: (0.25,0.42), 6: (0.35,0.55), 7: (0.2,0.68), 8: (0.5,0.85), 9: (0.8,0.68)}
+#Batter's spot and text alignment, by the side of the plate they stand on
+batter_spots = {'R': (0.47, 0.1, 'right'), 'L': (0.53, 0.1, 'left')}
+
+#Box styles used to list fielder and runner names
+bbox_fielder = {'boxstyle': 'round','alpha': 0.8, 'pad' : 0.2, 'ec' : 'k', 'fc' : 'w'}
+bbox_runner = {'boxstyle': 'round','alpha': 0.8, 'pad' : 0.2, 'ec' : 'r', 'fc' : 'w'}
 
 #Class for the state of the current game - players, score, outs, etc.
 class game_state():
@@ -27,11 +58,19 @@ class game_state():
         lineup_pos (list of int, default [0,0]): list of 2 int describing current spot in the order of each lineup.
         IF_pos (int, default 0): int describing infield position. 0 for normal, 1 for corners in, 2 for infield in.
         hold (bool, default False): Whether or not runners are being held.
+        policy (function, default ask_user): Decision policy deciding whether to send runners. Called with the chance of success and the game state.
+        decision (str or None, default None): Send decision being made, one of running.decisions, set just before the policy is called.
+        log (function, default print): Event sink for dice rolls and play outcomes.
+        dice (dice_source or None, default None): Source of all dice rolls. None uses the global numpy random state.
         plays (dict): A dictionary connecting play strings to their corresponding functions.
     """
-     
+
+    #Fixed set of attributes, so game states are compact and can't silently gain new ones
+    __slots__ = ('batting_team', 'runners', 'score', 'outs', 'inning', 'positions', 'lineup', 'lineup_pos', 'pitcher', 'batter',
+                 'IF_pos', 'hold', 'policy', 'decision', 'log', 'dice', 'plays')
+
     def __init__(self, bat_team=0, runners=None, score=None, outs=0, inning = None,
-                 positions=None, lineups=None, lineup_pos=None, IF_pos = None, hold = None):
+                 positions=None, lineups=None, lineup_pos=None, IF_pos = None, hold = None, policy = None, log = None, dice = None):
         """Initialization function for game_state class.
 
         Arguments:
@@ -45,6 +84,9 @@ class game_state():
             lineup_pos (list of int, default [0,0]): list of 2 int describing current spot in the order of each lineup.
             IF_pos (int, default 0): int describing infield position. 0 for normal, 1 for corners in, 2 for infield in.
             hold (bool, default False): Whether or not runners are being held.
+            policy (function, default ask_user): Decision policy deciding whether to send runners. Called with the chance of success and the game state.
+            log (function, default print): Event sink for dice rolls and play outcomes.
+            dice (dice_source, optional): Source of all dice rolls. Default uses the global numpy random state.
         """
 
         self.batting_team = bat_team #0 for away, 1 for home
@@ -55,32 +97,8 @@ class game_state():
         self.positions = positions if positions is not None else [[None, None, None, None, None, None, None, None, None, None], 
                                                                   [None, None, None, None, None, None, None, None, None, None]] #Positions (0 is DH)
         
-        #Convert strings in positions to batter or pitcher class
-        for j in [0,1]:
-            for i in range(10):
-                if type(self.positions[j][i]) is str:
-                    if i == 1: self.positions[j][i] = pitcher(self.positions[j][i])
-                    else: self.positions[j][i] = batter(self.positions[j][i])
-
-                #Ensure no non-player elements were provided.
-                assert isinstance(self.positions[j][i], pitcher) or isinstance(self.positions[j][i], batter)
-        
-        #Set lineup
-        if lineups is not None:
-            try: #If lineup was provided by position number
-                self.lineup = [[self.positions[0][i] for i in lineups[0]], 
-                       [self.positions[1][i] for i in lineups[1]]]
-            except TypeError: #If lineup was provided 
-                self.lineup = lineups
-
-                #Ensure all players are of batter class and are listed in positions
-                for i in [0,1]:
-                    for j in range(10):
-                        assert isinstance(lineups[i][j], batter)
-                        assert lineups[i][j] in positions[i]
-        else: #Default
-            self.lineup = [[self.positions[0][i] for i in [0,2,3,4,5,6,7,8,9]],
-                           [self.positions[1][i] for i in [0,2,3,4,5,6,7,8,9]]] 
+        #Convert players given by name to shared cards, and set lineup
+        self.positions, self.lineup = registry.resolve(self.positions, lineups)
         
         
         self.lineup_pos = lineup_pos if lineup_pos is not None else [0, 0] #Current batter position in each lineup
@@ -88,6 +106,10 @@ class game_state():
         self.batter = self.lineup[self.batting_team][self.lineup_pos[self.batting_team]] #Current batter
         self.IF_pos = IF_pos if IF_pos is not None else 0 #Infield position (0 for normal, 1 for corners in, 2 for infield in)
         self.hold = hold if hold is not None else False #Holding runners
+        self.policy = policy if policy is not None else ask_user #Runner send decisions
+        self.decision = None #Send decision being made
+        self.log = log if log is not None else print #Event sink
+        self.dice = dice #Source of dice rolls
 
         self.plays = {"K": self.K, "BB": self.BB, "HBP": self.BB, 
                               "HR": self.HR, "S": self.S, "D": self.D, "T": self.T,
@@ -99,14 +121,41 @@ class game_state():
         """
         self.pitcher = self.positions[1-self.batting_team][1] #Set pitcher
         self.batter = self.lineup[self.batting_team][self.lineup_pos[self.batting_team]] #Set batter
+
+    @property
+    def bases(self):
+        """int: Occupied bases as a bitmask (1 for first, 2 for second, 4 for third)."""
+        return (self.runners[0] is not None) | (self.runners[1] is not None) << 1 | (self.runners[2] is not None) << 2
+
+    def snapshot(self):
+        """Captures the game situation as a flat tuple of int, using registry ids for the runners. Snapshots are hashable, so they can key transposition tables in look-ahead search.
+
+        Players, lineups and the policy, log and dice are not included, as plays don't change them.
+
+        Returns:
+            tuple of int: (batting_team, inning, outs, away score, home score, away lineup_pos, home lineup_pos, bases, runner ids on first, second and third (-1 if empty), IF_pos, hold).
+        """
+        return (int(self.batting_team), self.inning, self.outs, self.score[0], self.score[1], self.lineup_pos[0], self.lineup_pos[1], self.bases,
+                *[registry.player_id(runner) if runner is not None else -1 for runner in self.runners], self.IF_pos, int(self.hold))
+
+    def restore(self, snapshot):
+        """Returns the game to a situation captured by snapshot.
+
+        Args:
+            snapshot (tuple of int): Snapshot given by snapshot, for this game.
+        """
+        self.batting_team, self.inning, self.outs, away, home, away_pos, home_pos, bases, first, second, third, self.IF_pos, hold = snapshot
+        self.score = [away, home]
+        self.lineup_pos = [away_pos, home_pos]
+        self.runners = [registry.cards[i] if i >= 0 else None for i in (first, second, third)]
+        self.hold = bool(hold)
+        self.update_pitcher_batter()
     
     def display(self, ax = None):
         """A function for displaying the current game state."""
 
-        #Define dictionaries containing information about the box styles used to list fielder and runner names.
-        bbox_fielder = {'boxstyle': 'round','alpha': 0.8, 'pad' : 0.2, 'ec' : 'k', 'fc' : 'w'}
-        bbox_runner = {'boxstyle': 'round','alpha': 0.8, 'pad' : 0.2, 'ec' : 'r', 'fc' : 'w'}
-
+        import matplotlib
+        import matplotlib.pyplot as plt
         if ax is None:
             #Create figure and axis
             fig = plt.figure(figsize = [8,8])
@@ -116,49 +165,23 @@ class game_state():
         ax.text(0.02,0.98, "%s%d\n%d Outs" % ("T" if self.batting_team == 0 else "B", self.inning,self.outs), ha = 'left', va = 'top', transform = ax.transAxes, fontsize = 14)
 
         #Plot image of baseball diamond
-        img = np.asarray(Image.open('diamonddiagram.jpg'))
-        ax.imshow(img)
+        ax.imshow(diamond_image())
         ax.axis('off')
 
-        #If runners occupt bases, colour base black and write runner name
-        if self.runners[0] is not None:
-            ax.add_patch(matplotlib.patches.Polygon([[0.7210526315789474,0.35452793834296725],
-                                [0.7535087719298246,0.31888246628131023],
-                                [0.7842105263157895,0.35452793834296725],
-                                [0.7535087719298246,0.3901734104046243]], fc = 'k', transform = ax.transAxes))
-            ax.text(0.8,0.33,self.runners[0].name,ha = 'center',va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
-
-
-        if self.runners[1] is not None:
-            ax.add_patch(matplotlib.patches.Polygon([[0.46842105263157896,0.6358381502890174],
-                                [0.5008771929824561,0.6001926782273603],
-                                [0.5333333333333333,0.6358381502890174],
-                                [0.5008771929824561,0.6714836223506744]], fc = 'k', transform = ax.transAxes))
-            ax.text(0.5,0.65,self.runners[1].name,ha = 'center',va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
-
-        if self.runners[2] is not None:
-            ax.add_patch(matplotlib.patches.Polygon([[0.21929824561403508,0.35452793834296725],
-                                [0.25,0.31888246628131023],
-                                [0.2807017543859649,0.35452793834296725],
-                                [0.25,0.3901734104046243]], fc = 'k', transform = ax.transAxes))
-            ax.text(0.2,0.33,self.runners[2].name,ha = 'center',va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
+        #If runners occupy bases, colour base black and write runner name
+        for runner, corners, (x, y) in zip(self.runners, base_corners, runner_spots):
+            if runner is not None:
+                ax.add_patch(matplotlib.patches.Polygon(corners, fc = 'k', transform = ax.transAxes))
+                ax.text(x,y,runner.name,ha = 'center',va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
 
         #Write all fielder names in respective positions
-        ax.text(0.5,0.38,self.positions[1-self.batting_team][1].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.5,0.03,self.positions[1-self.batting_team][2].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.75,0.42,self.positions[1-self.batting_team][3].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.65,0.55,self.positions[1-self.batting_team][4].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.35,0.55,self.positions[1-self.batting_team][6].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.25,0.42,self.positions[1-self.batting_team][5].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.2,0.68,self.positions[1-self.batting_team][7].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.5,0.85,self.positions[1-self.batting_team][8].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        ax.text(0.8,0.68,self.positions[1-self.batting_team][9].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
-        
+        for pos, (x, y) in fielder_spots.items():
+            ax.text(x,y,self.positions[1-self.batting_team][pos].name,ha = 'center', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_fielder)
+
         #Write batter name on proper side of plate
-        if self.batter.hand == 'R' or (self.batter.hand == 'S' and self.pitcher.hand == 'L'):
-            ax.text(0.47,0.1,self.batter.name, ha = 'right', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
-        else:
-            ax.text(0.53,0.1,self.batter.name, ha = 'left', va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
+        side = 'R' if self.batter.hand == 'R' or (self.batter.hand == 'S' and self.pitcher.hand == 'L') else 'L'
+        x, y, ha = batter_spots[side]
+        ax.text(x,y,self.batter.name, ha = ha, va = 'center', fontsize = 6,transform = ax.transAxes, bbox = bbox_runner)
         
     
     def S(self, typ):
@@ -211,7 +234,8 @@ class game_state():
                 chance = min([20,max([1,speed + arm + 2*outs2])])
 
                 #Run runner_advancement
-                res = runner_advancement(chance)
+                self.decision = 'S_2'
+                res = runner_advancement(chance, self.policy, self, self.log, self.dice)
                 
                 if res == 0: #If out: remove runner from second then single, 2-base advance
                     self.outs += 1
@@ -237,12 +261,13 @@ class game_state():
                 chance = min([20,max([1,speed + arm + 2*outs2 + extra])])
                 
                 #Run runner advancement for runner on first going to third, to fielder it was hit to
-                res = runner_advancement(chance)
+                self.decision = 'S_1'
+                res = runner_advancement(chance, self.policy, self, self.log, self.dice)
                 
                 if res == 0: #If out: remove runner from first then single, 2-base advance
                     self.outs += 1
                     self.runners[0] = None
-                    self.S('**')
+                    runs = self.S('**')[0]
                     BS_arg = ['out']
                 elif res == 2:#If safe: single, 2-base advance
                     runs = self.S('**')[0]
@@ -302,15 +327,18 @@ class game_state():
                 chance = min([20,max([1,speed + arm + 2*outs2])])
 
                 #Run runner_advancement
-                res = runner_advancement(chance)
+                self.decision = 'D_1'
+                res = runner_advancement(chance, self.policy, self, self.log, self.dice)
                 
                 if res == 0: #If out: remove runner from first, then double, 2-base advance
                     self.outs += 1
-                    self.runners[2] = None
+                    self.runners[0] = None
                     runs = self.D('**')[0]
                     BS_arg = ['out']
-                if res == 2: #If safe: double, 3-base advance
+                elif res == 2: #If safe: double, 3-base advance
                     runs = self.D('***')[0]
+                else: #If held: double, 2-base advance
+                    runs = self.D('**')[0]
 
             else: #If no runner on first: double, 2-base advance
                 runs = self.D('**')[0]
@@ -404,7 +432,8 @@ class game_state():
                         chance = min([20,max([1,speed + arm + 2])])
 
                         #Run runner_advancement
-                        res = runner_advancement(chance)
+                        self.decision = 'FB_3'
+                        res = runner_advancement(chance, self.policy, self, self.log, self.dice)
 
                         if res == 0: #If out: Set as 'dp'
                             self.outs += 1
@@ -439,21 +468,22 @@ class game_state():
                         chance = min([20,max([1,speed + arm + 2])])
 
                         #Abnormal runner_advancement: Runner only out on exactly 20
-                        if input('Would you like to send the runner? (%d) ' % chance) == "Y":
+                        self.decision = 'FB_2'
+                        if self.policy(chance, self):
             
                             #Roll dice
-                            res = diceroll_20() #Dice roll
-                            print(res)
+                            res = diceroll_20(self.dice) #Dice roll
+                            self.log(res)
                             if res <= chance: #Safe if less than chance
-                                print("Safe!")
+                                self.log("Safe!")
                                 self.runners[2] = self.runners[1]
                                 self.runners[1] = None
                             elif res == 20: #Out if 20
-                                print("Out!")
+                                self.log("Out!")
                                 self.outs += 1
                                 self.runners[1] = None
                             else: #Else holds
-                                print('Runner holds')
+                                self.log('Runner holds')
         
         return runs, True, [typ2], [pos,typ2]
 
@@ -481,16 +511,18 @@ class game_state():
             if 'A' in typ: #Double play
                 if self.runners[0] is not None: #Double play
                     self.outs += 1 #Increase outs by 1
+
+                    #Runner on first is out, even when the double play ends the inning
+                    self.runners[0] = None
                     if self.outs < 3:#If inning continues
 
                         #Runner on third scores
                         runs = [self.runners[2].name] if self.runners[2] is not None else []
                         self.score[self.batting_team] += len(runs)
 
-                        #Runner on second advances to third. Other runners out
+                        #Runner on second advances to third
                         self.runners[2] = self.runners[1]
                         self.runners[1] = None
-                        self.runners[0] = None
 
                     #Runs are not RBIs 
                     return runs, False, ['dp'], [pos,'dp']
@@ -663,44 +695,37 @@ class game_state():
             pos (int): position that ball was hit to.
 
         Returns:
-            list: outcome plus any additional arguments needed to describe the outcome
+            tuple: play tuple giving the outcome plus any additional arguments needed to describe the outcome
         """
         
         #Determine player ball was hit to
         player = self.positions[1-self.batting_team][pos]
-        print(player.name)
+        self.log(player.name)
 
         #Determine fielding rating
         rating = player.field[pos][0]
-        print(rating)
+        self.log(rating)
 
         #Determine Roll
-        roll = diceroll_20()
-        print(roll)
+        roll = diceroll_20(self.dice)
+        self.log(roll)
         
         #Get result
-        result = fieldingchart[pos][rating][roll-1]
-        if result == 'E': #If result is E, more rolls necessary
+        result = fieldingplays[pos][rating][roll-1]
+        if result == ('E',): #If result is E, more rolls necessary
 
             #Determine error rating
             E_n = player.field[pos][1]
-            print(E_n)
+            self.log(E_n)
 
             #Roll two six-sided dice
-            roll2 = diceroll_6()
-            print(roll2)
+            roll2 = diceroll_6(self.dice)
+            self.log(roll2)
 
             #Get result
-            result = fieldingchart[pos]['E'][E_n][roll2[1]-2]
-            if type(result) is list: #Some results require a roll of another six-sided die
+            result = fieldingplays[pos]['E'][E_n][roll2[1]-2]
+            if type(result[0]) is int: #Some results require a roll of another six-sided die
                 result = result[1] if roll2[0] <= result[0] else result[2] 
-        
-        #Split result into outcome plus arguments
-        result = re.split('[_]', result)
-        for i in range(len(result)):
-            try:
-                result[i] = int(result[i])
-            except (TypeError,IndexError, ValueError): pass
 
         return result
 
@@ -753,34 +778,8 @@ class box_score():
                                                                   [None, None, None, None, None, None, None, None, None, None]] #Positions (0 is DH)
         
         
-        #Convert strings in positions to batter or pitcher class
-        for j in [0,1]:
-            for i in range(10):
-                if type(self.positions[j][i]) is str:
-                    if i == 1: self.positions[j][i] = pitcher(self.positions[j][i])
-                    else: self.positions[j][i] = batter(self.positions[j][i])
-
-                #Ensure no non-player elements were provided.
-                assert isinstance(self.positions[j][i], pitcher) or isinstance(self.positions[j][i], batter)
-
-        #Set lineup
-        if lineups is not None:
-            try: #If lineup was provided by position number
-                self.lineup = [[self.positions[0][i] for i in lineups[0]], 
-                               [self.positions[1][i] for i in lineups[1]]]
-            
-            except TypeError: #If lineup was provided 
-                self.lineup = lineups
-
-                #Ensure all players are of batter class and are listed in positions
-                for i in [0,1]:
-                    for j in range(10):
-                        assert isinstance(lineups[i][j], batter)
-                        assert lineups[i][j] in positions[i]
-        
-        else: #Default
-            self.lineup = [[self.positions[0][i] for i in [0,2,3,4,5,6,7,8,9]],
-                           [self.positions[1][i] for i in [0,2,3,4,5,6,7,8,9]]]                 
+        #Convert players given by name to shared cards, and set lineup
+        self.positions, self.lineup = registry.resolve(self.positions, lineups)
         
         #Dictionary converting position numbers to position labels
         self.pos_keys = {0: "DH", 1:"P", 2:"C", 3:"1B", 4:"2B", 5:"3B", 6:"SS", 7:"LF", 8:"CF", 9:"RF"}
@@ -809,6 +808,8 @@ class box_score():
             away (bool, optional, default True): Whether or not to show away team info.
         """
 
+        import matplotlib.pyplot as plt
+        import pandas as pd
         if ax is None:
             fig = plt.figure(figsize = [4,6])
             ax = fig.add_subplot()
@@ -995,7 +996,7 @@ class box_score():
         """
 
         #Same effect on box score as single
-        self.S(batting_team,batter,pitcher)
+        self.S(batting_team,batter,pitcher,'')
     
     def FB(self, batting_team,batter,pitcher, typ):
         """Updates box score on a fly ball.
@@ -1118,34 +1119,8 @@ class scorecard():
                                                                   [None, None, None, None, None, None, None, None, None, None]] #Positions (0 is DH)
         
         
-        #Convert strings in positions to batter or pitcher class
-        for j in [0,1]:
-            for i in range(10):
-                if type(self.positions[j][i]) is str:
-                    if i == 1: self.positions[j][i] = pitcher(self.positions[j][i])
-                    else: self.positions[j][i] = batter(self.positions[j][i])
-
-                #Ensure no non-player elements were provided.
-                assert isinstance(self.positions[j][i], pitcher) or isinstance(self.positions[j][i], batter)
-
-        #Set lineup
-        if lineups is not None:
-            try: #If lineup was provided by position number
-                self.lineup = [[self.positions[0][i] for i in lineups[0]], 
-                               [self.positions[1][i] for i in lineups[1]]]
-            
-            except TypeError: #If lineup was provided 
-                self.lineup = lineups
-
-                #Ensure all players are of batter class and are listed in positions
-                for i in [0,1]:
-                    for j in range(10):
-                        assert isinstance(lineups[i][j], batter)
-                        assert lineups[i][j] in positions[i]
-        
-        else: #Default
-            self.lineup = [[self.positions[0][i] for i in [0,2,3,4,5,6,7,8,9]],
-                           [self.positions[1][i] for i in [0,2,3,4,5,6,7,8,9]]]
+        #Convert players given by name to shared cards, and set lineup
+        self.positions, self.lineup = registry.resolve(self.positions, lineups)
             
         #Dictionary connecting numbers 0-9 to corresponding position labels
         self.pos_keys = {0: "DH", 1:"P", 2:"C", 3:"1B", 4:"2B", 5:"3B", 6:"SS", 7:"LF", 8:"CF", 9:"RF"}
@@ -1170,17 +1145,19 @@ class scorecard():
             away (bool, optional, default True): Whether or not to show away team.
             home (bool, optional, default True): Whether or not to show home team.
         """
+        import pandas as pd
+        from tabulate import tabulate
 
         if away:
             #Display away hitters
             print('Away:')
-            print(tabulate(pd.DataFrame(data = self.hitters[0].values(),columns = ['Pos'] + list(range(1,10)),index = self.hitters[0].keys()), 
+            print(tabulate(pd.DataFrame(data = self.hitters[0].values(),columns = ['Pos'] + list(range(1,len(list(self.hitters[0].values())[0]))),index = self.hitters[0].keys()), 
                                     headers = 'keys', tablefmt = 'fancy_grid'))
         
         if home:
             #Display home hitters
             print('Home:')
-            print(tabulate(pd.DataFrame(data = self.hitters[1].values(),columns = ['Pos'] + list(range(1,10)),index = self.hitters[1].keys()), 
+            print(tabulate(pd.DataFrame(data = self.hitters[1].values(),columns = ['Pos'] + list(range(1,len(list(self.hitters[1].values())[0]))),index = self.hitters[1].keys()), 
                                     headers = 'keys', tablefmt = 'fancy_grid'))
     
     def result(self,batter,inning,batting_team,outcome):
@@ -1193,17 +1170,22 @@ class scorecard():
             outcome (str): String describing outcome of given plate appearance.
         """
 
+        #Add columns for extra innings
+        while len(self.hitters[batting_team][batter]) <= inning:
+            for hitter in self.hitters[batting_team].values():
+                hitter.append(self.empty)
+
         #If first PA of inning, set corresponding element to outcome
         if self.hitters[batting_team][batter][inning] == self.empty:
             self.hitters[batting_team][batter][inning] = outcome
 
         #If second PA of inning, set corresponding element to list of len 2 with both outcomes
-        elif self.hitters[batting_team][batter][inning] is str:
-            self.hitters[batting_team,batter][inning] = [self.hitters[batting_team,batter][inning], outcome]
+        elif type(self.hitters[batting_team][batter][inning]) is str:
+            self.hitters[batting_team][batter][inning] = [self.hitters[batting_team][batter][inning], outcome]
         
         #If third or higher PA of inning, append outcome to list.
         else:
-            self.hitters[batting_team,batter][inning] += [outcome]
+            self.hitters[batting_team][batter][inning] += [outcome]
     
     def K(self, batter, inning, batting_team):
         """Function for updating score card after strikeout.
@@ -1408,12 +1390,13 @@ class scoreboard():
         self.score[1]['E'] = 0
         
         #Set plays
-        self.plays = {"GB": self.N, "FB": self.N, "PO": self.N, "FO": self.N, "lomax": self.N, "LO": self.N, "BB": self.N, "K": self.N,
+        self.plays = {"GB": self.N, "FB": self.N, "PO": self.N, "FO": self.N, "lomax": self.N, "LO": self.N, "BB": self.N, "HBP": self.N, "K": self.N,
                    "S": self.H, "D": self.H, "T": self.H, "HR": self.H, "E": self.E}
         
     def display(self, ax=None):
         """Function for displaying scoreboard.
         """
+        import matplotlib.pyplot as plt
         if ax is None:
             fig = plt.figure(figsize = [10,1.2])
             ax = fig.add_subplot()
@@ -1497,23 +1480,42 @@ class game():
 
     Attributes:
         GS (game_state): current game_state
-        BS (box_score): current box_score
+        BS (box_score or stat_table): current box_score, or the stat_table given to accumulate into
         SC (scorecard): current scorecard
         SB (scoreboard): current scoreboard
         result (int or None, default None): result of game (0 for away win, 1 for home win). None represents unfinished
+        headless (bool, default False): If True, the game state is never displayed and nothing is printed or asked of the user.
+        log (function): Event sink for dice rolls and play outcomes. print unless headless.
+        events (list of tuple or None): Event of each plate appearance so far, as described in eventlog.py. None unless recording.
+        profile (play_profiler or None): Profiler timing each stage and play of every plate appearance, from profiling.py. None unless profiling.
     """
-    def __init__(self,teams = None,positions = None,lineups = None):
+    def __init__(self,teams = None,positions = None,lineups = None, headless = False, policy = None, log = None, dice = None, record = False, stats = None, profile = None):
         """Initialization function for game class.
 
         Args:
             teams (list of str, default ['Away', 'Home']): Name of teams competing.
             positions (list of player): A list of shape (2,10) indicating the players at each position for each team. The first list of 10 is for the away team, and the second list of 10 is for the home team. Within each list of 10, the index i indicates the player at position i (0 for DH). Provided list may include batter/pitcher classes or str of player names.
             lineups (list of int): List of batter of shape (2,9) giving lineups for each team. May be either a (2,9) list of batter, or a (2,9) list of int describing the position played by each lineup spot.
+            headless (bool, default False): Run without display, printing or input prompts.
+            policy (function, optional): Decision policy deciding whether to send runners. Called with the chance of success and the game state. Default asks the user, or sends the runner when the chance is at least 14 if headless.
+            log (function, optional): Event sink for dice rolls and play outcomes. Default print, or quiet if headless.
+            dice (dice_source, optional): Source of all dice rolls. Default uses the global numpy random state, or a dice_source seeded from it if headless.
+            record (bool, default False): Record every plate appearance in events, in the format of eventlog.py.
+            stats (stat_table, optional): Columnar accumulator from stats.py to keep the box score in, in place of a new box_score. Used to accumulate many games into one table.
+            profile (play_profiler, optional): Profiler from profiling.py to time plate appearances into. May be shared by many games.
         """
 
+        #Headless games never prompt or print unless told otherwise
+        self.headless = headless
+        if headless:
+            policy = policy if policy is not None else send_threshold(14)
+            log = log if log is not None else quiet
+            dice = dice if dice is not None else dice_source(np.random.randint(2**31))
+        self.log = log if log is not None else print
+
         #Initialize game state, box score, and scorecard with corresponding positions and lineups
-        self.GS = game_state(positions = positions, lineups = lineups)
-        self.BS = box_score(positions=positions,lineups = lineups)
+        self.GS = game_state(positions = positions, lineups = lineups, policy = policy, log = self.log, dice = dice)
+        self.BS = box_score(positions=positions,lineups = lineups) if stats is None else stats
         self.SC = scorecard(positions=positions, lineups = lineups)
 
         #Initialize scoreboard with teams, start first inning
@@ -1522,107 +1524,141 @@ class game():
 
         #Initialize result to None
         self.result = None
+
+        #Plate appearance events, if recording
+        self.events = [] if record else None
+
+        #Profiler, if profiling
+        self.profile = profile
         
     def PA(self):
         """Function for executing a plate appearance and updating game state, box score, scoreboard and scorecard.
         """
 
         #Display game state
-        self.GS.display()
+        if not self.headless:
+            self.GS.display()
+
+        #Time one in every few plate appearances, if profiling
+        prof = self.profile
+        timed = prof is not None and prof.start()
 
         #Get current pitcher and batter
         B = self.GS.batter
         P = self.GS.pitcher
+
+        #Batter, runners and outs before the plate appearance, to record where each one ends up
+        before = ([B] + self.GS.runners, self.GS.outs) if self.events is not None else None
         
         #Ask for roll
         # input("Roll?")
 
-        #Roll dice
-        roll = diceroll_6()
-        print(roll)
-
-        #Get result of roll
-        if roll[0] < 4:
-            result = B.batting[P.hand][roll[0]][roll[1]-2]
-        else:
-            if B.hand == 'S':
-                result = P.pitching['L' if P.hand == 'R' else 'R'][roll[0]][roll[1]-2]
+        #Roll dice and get play tuple given by roll. Malformed cells are skipped (None), and one-sided d20 splits have no play above their range, so roll again on either
+        result = None
+        while result is None:
+            roll = diceroll_6(self.GS.dice)
+            roll2 = 0
+            self.log(roll)
+            if roll[0] < 4:
+                cell = B.batting_plays[P.hand][roll[0]][roll[1]-2]
             else:
-                result = P.pitching[B.hand][roll[0]][roll[1]-2]
-
-        #Try to split result by _
-        try:
-            result = re.split('[_]', result)
-
-        except TypeError: #If element is a list, need to roll D20
-            print(result)
-
-            #Roll dice
-            roll2 = diceroll_20()
-            print(roll2)
-
-            #Take result given by diceroll
-            if roll2 <= result[0]:
-                result = re.split('[_]', result[1])
-            else:
-                result = re.split('[_]', result[2])
+                if B.hand == 'S':
+                    cell = P.pitching_plays['L' if P.hand == 'R' else 'R'][roll[0]][roll[1]-2]
+                else:
+                    cell = P.pitching_plays[B.hand][roll[0]][roll[1]-2]
+            result = cell
+
+            #If cell is split, need to roll D20
+            if cell is not None and type(cell[0]) is int:
+                self.log(cell)
+
+                #Roll dice
+                roll2 = diceroll_20(self.GS.dice)
+                self.log(roll2)
+
+                #Take result given by diceroll
+                result = cell[1] if roll2 <= cell[0] else cell[2]
+        chance = None
+        pre = ''
+        runs_0 = []
+        if timed:
+            prof.lap('dice')
 
         #If result ends in ~ and pitcher is tired. Convert result to S**
         if result[-1] == '~':
             if P.tired: 
-                result = ['S','**']
+                result = ('S','**')
             else:
                 result = result[:-1]
-
-        #Convert all numbers in result to ints
-        for i in range(len(result)):
-            try:
-                result[i] = int(result[i])
-            except (IndexError,TypeError, ValueError): pass
+        if timed:
+            prof.lap('card')
 
         #If result is X, execute GS.X function to determine result
         if result[0] == 'X':
-            print(result)
+            self.log(result)
+            chance = result
             result = self.GS.plays[result[0]](*result[1:])
+            if timed:
+                prof.lap('X')
 
         #If result is PB or WP, execute GS function and 
         if result[0] in ['PB', 'WP']:
-            print(result[0])
+            self.log(result[0])
+            pre = result[0]
             runs_0 = self.GS.plays[result[0]]()[0]
             result = result[1:]
             if len(runs_0) > 0:
                 self.BS.batter_runs(self.GS.batting_team,B.name,runs_0,False)
                 self.BS.pitcher_runs(self.GS.batting_team,P.name,runs_0)
                 self.SB.runs(runs_0,self.GS.inning, self.GS.batting_team)
+            if timed:
+                prof.lap('WP/PB')
 
         #If result is HRN, change to S** if batter power weak
         if result[0] == 'HRN':
             if B.batting[P.hand]['pow'] == "N":
-                result = ['HR']
+                result = ('HR',)
             else:
-                result = ['S', '**']
+                result = ('S', '**')
         
         #If + in result and infield in, change to S**
-        try:
-            if '+' in result[-1] and self.GS.IF_pos == 2:
-                result = ['S', '**']
-        except:
-            pass
+        if self.GS.IF_pos == 2 and type(result[-1]) is str and '+' in result[-1]:
+            result = ('S', '**')
 
         #Exceute play
-        print(result)
+        self.log(result)
         runs, RBI, BS_arg, SC_arg = self.GS.plays[result[0]](*result[1:])
+        self.log(runs, RBI, BS_arg, SC_arg)
+        if timed:
+            prof.lap('state')
 
-        #Update box score and scoreboard with runs scored
-        print(runs, RBI, BS_arg, SC_arg)
+        #Update box score with runs scored and play
         self.BS.batter_runs(self.GS.batting_team,B.name,runs,RBI)
         self.BS.pitcher_runs(self.GS.batting_team,P.name,runs)
-        self.SB.runs(runs,self.GS.inning, self.GS.batting_team)
-    
-        #Update box score, and scoreboard and scorecard with play
         self.BS.plays[result[0]](self.GS.batting_team,B.name,P.name,*BS_arg)
+        if timed:
+            prof.lap('box_score')
+
+        #Update scoreboard with runs scored and play
+        self.SB.runs(runs,self.GS.inning, self.GS.batting_team)
         self.SB.plays[result[0]](self.GS.inning,self.GS.batting_team)
+        if timed:
+            prof.lap('scoreboard')
+
+        #Update scorecard with play
         self.SC.plays[result[0]](B.name, self.GS.inning, self.GS.batting_team,*SC_arg)
+        if timed:
+            prof.lap('scorecard')
+
+        #Record plate appearance, with the base (or 4 if scored, 5 if out) each player at bat or on base ended up at.
+        #Play functions take every runner put out off the bases, so a runner neither on base nor scored is out
+        if self.events is not None:
+            scored = list(runs_0) + list(runs)
+            moves = tuple(0 if player is None else
+                          next((base + 1 for base, runner in enumerate(self.GS.runners) if runner is player), 4 if player.name in scored else 5)
+                          for player in before[0])
+            self.events.append((self.GS.batting_team, self.GS.inning, B.name, P.name, tuple(roll), cell, roll2, chance, pre, tuple(runs_0),
+                                result, tuple(runs), RBI, tuple(BS_arg), tuple(SC_arg), self.GS.outs, self.GS.bases, self.GS.score[0], self.GS.score[1], moves))
 
         #Update lineup position
         self.GS.lineup_pos[self.GS.batting_team] = (self.GS.lineup_pos[self.GS.batting_team] + 1) % 9
@@ -1635,12 +1671,12 @@ class game():
 
                 #If the away team was up, and home team winning, home team wins
                 if self.GS.batting_team == 0 and self.GS.score[1] > self.GS.score[0]:
-                    print('Home team wins!')
+                    self.log('Home team wins!')
                     self.result = 1
 
                 #If the home team was up, and away team winning, away team wins
                 elif self.GS.batting_team == 1 and self.GS.score[0] > self.GS.score[1]:
-                    print('Away team wins!')
+                    self.log('Away team wins!')
                     self.result = 0
 
             if self.result is None: #If game proceeds
@@ -1663,11 +1699,18 @@ class game():
         #If home team batting, and inning >= 9, check for walk-off win
         elif self.GS.inning >= 9 and self.GS.batting_team == 1 and self.GS.score[1] > self.GS.score[0]:
             if self.GS.batting_team == 1 and self.GS.score[1] > self.GS.score[0]:
-                print('Walk Off Win!')
+                self.log('Walk Off Win!')
                 self.result = 1
 
         #Update pitcher and batter
         self.GS.update_pitcher_batter()
+
+        #Count plate appearance under its play, and under the X chance or wild pitch/passed ball it went through
+        if prof is not None:
+            if chance is None and not pre:
+                prof.end(timed, result)
+            else:
+                prof.end(timed, result, *([chance[:2]] if chance is not None else []), *([pre] if pre else []))
     
     def game(self):
         """Function for executing entire game.
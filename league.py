@@ -0,0 +1,281 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import json
+import os
+from dice import dice_source
+from lockstep import lockstep
+from player import player_data
+from simulate import play_batch
+from stats import stat_table
+
+def load_rosters(path):
+    """Loads team rosters from a JSON file.
+
+    The file maps each team name to {'positions': [10 player names, DH first and pitcher at index 1], 'lineup': [9 position numbers in batting order], 'rotation': [names of starting pitchers]}. 'lineup' is optional and defaults to increasing order of position number. 'rotation' is optional and defaults to the pitcher in positions.
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        dict: Rosters keyed by team name, with defaults filled in.
+    """
+    with open(path, mode = 'r', encoding = 'utf-8') as read_file:
+        data = json.load(read_file)
+    return {team: {'positions': list(roster['positions']),
+                   'lineup': list(roster.get('lineup', [0,2,3,4,5,6,7,8,9])),
+                   'rotation': list(roster.get('rotation', [roster['positions'][1]]))} for team, roster in data.items()}
+
+def roster_from_store(team, season = None, store = None, starters = 5):
+    """Builds the roster of a team from the cards filed under it in the card store.
+
+    Positions 2-9 are filled in order of position number, each by the unassigned batter with the best range at that position. The best remaining batter by position count is the DH. The rotation is the team's pitchers in name order.
+
+    Args:
+        team (str): Team, as given to card_store.import_json.
+        season (int, optional): Season of the cards.
+        store (card_store, optional): Card store. Default is the store of player.py.
+        starters (int, default 5): Largest number of pitchers in the rotation.
+
+    Returns:
+        dict: Roster in the format of load_rosters.
+
+    Raises:
+        ValueError: If the team has no pitcher, or no batter for some position.
+    """
+    store = store if store is not None else player_data
+    pitchers = [name for card_id, name, t, s in store.find(team = team, season = season, type = 'P')]
+    batters = {name: store.card(card_id)['fielding'] for card_id, name, t, s in store.find(team = team, season = season, type = 'B')}
+    if not pitchers:
+        raise ValueError('%s has no pitcher' % team)
+
+    positions = [None, pitchers[0]] + [None] * 8
+    for pos in range(2, 10):
+        candidates = [(fielding[str(pos)][0], name) for name, fielding in batters.items() if str(pos) in fielding and name not in positions]
+        if not candidates:
+            raise ValueError('%s has no batter for position %d' % (team, pos))
+        positions[pos] = min(candidates)[1]
+
+    DH = [name for name in batters if name not in positions]
+    if not DH:
+        raise ValueError('%s has no batter left to DH' % team)
+    positions[0] = max(DH, key = lambda name: len(batters[name]))
+
+    return {'positions': positions, 'lineup': [0,2,3,4,5,6,7,8,9], 'rotation': pitchers[:starters]}
+
+def round_robin(teams, games = 162):
+    """Generates a balanced schedule where every team plays every other team in turn, alternating home and away.
+
+    Full cycles, where every team plays every other once, are generated in rounds by the circle method, with home and away swapped every other cycle. The games left over are made up by pairing each team with the teams 1, 2, ... places after it in the list.
+
+    Args:
+        teams (list of str): Team names.
+        games (int, default 162): Games played by each team.
+
+    Returns:
+        list of tuple: (away, home) of each game, in order of play.
+
+    Raises:
+        ValueError: If every team can't play the same number of games, i.e. the number of teams and games are both odd.
+    """
+    teams = list(teams)
+    n = len(teams)
+    if n < 2 or n % 2 and games % 2:
+        raise ValueError('%d teams can\'t all play %d games' % (n, games))
+
+    #Full cycles. With an odd number of teams, one sits out each round.
+    cycles, extra = divmod(games, n - 1)
+    schedule = []
+    for cycle in range(cycles):
+        circle = teams + ([None] if n % 2 else [])
+        for r in range(len(circle) - 1):
+            for i in range(len(circle) // 2):
+                a, b = circle[i], circle[-1 - i]
+                #Fixed team alternates each round. The others alternate as they move between the two rows of the circle
+                if a is not None and b is not None:
+                    schedule.append((a, b) if ((r if i == 0 else 1) + cycle) % 2 else (b, a))
+            circle = [circle[0], circle[-1]] + circle[1:-1]
+
+    #Leftover games: each distance pairs every team twice, and half way around the list pairs it once
+    for d in range(1, extra // 2 + 1):
+        schedule.extend((teams[i], teams[(i + d) % n]) for i in range(n))
+    if extra % 2:
+        schedule.extend((teams[i], teams[i + n // 2]) for i in range(n // 2))
+    return schedule
+
+class season():
+    """A season of a league: rosters, a schedule, starting rotations, and the standings and box score totals as games are played.
+
+    Games are played headless in batches over a process pool. Every game gets its own dice source forked from one master seed, as in simulate.py, so results are identical whatever the number of workers. Each batch returns only its game summaries and one stat_table, which are folded into the standings and totals as soon as the batch is done, so memory doesn't grow with the number of games.
+
+    play_lockstep plays the whole schedule at once with lockstep.lockstep instead, for standings only.
+
+    Starting pitchers go through each team's rotation in schedule order.
+
+    Attributes:
+        rosters (dict): Rosters keyed by team name, in the format of load_rosters.
+        schedule (list of tuple): (away, home) of each game.
+        standings (dict): Keyed by team name. Each team has 'W', 'L', 'RS' (runs scored) and 'RA' (runs allowed).
+        stats (stat_table): Box score totals of all games played. Rows are per player, so a player on several rosters accumulates into one row.
+        played (int): Number of games played so far.
+    """
+    def __init__(self, rosters, schedule = None, games = 162):
+        """Initialization function for season.
+
+        Args:
+            rosters (dict): Rosters keyed by team name, in the format of load_rosters.
+            schedule (list of tuple, optional): (away, home) of each game. Default is round_robin of the teams.
+            games (int, default 162): Games played by each team in the default schedule.
+        """
+        self.rosters = rosters
+        self.schedule = schedule if schedule is not None else round_robin(list(rosters), games)
+        self.standings = {team: {'W': 0, 'L': 0, 'RS': 0, 'RA': 0} for team in rosters}
+        players = {name for roster in rosters.values() for name in roster['positions'] + roster['rotation']}
+        self.stats = stat_table(sorted(players))
+        self.played = 0
+
+    def starters(self):
+        """Starting pitcher of each team in every game of the schedule.
+
+        Returns:
+            list of tuple: (away starter, home starter) of each game.
+        """
+        starts = {team: 0 for team in self.rosters}
+        starters = []
+        for game in self.schedule:
+            pair = []
+            for team in game:
+                rotation = self.rosters[team]['rotation']
+                pair.append(rotation[starts[team] % len(rotation)])
+                starts[team] += 1
+            starters.append(tuple(pair))
+        return starters
+
+    def jobs(self, seed = None, policy = None):
+        """Jobs of every game of the schedule, as taken by simulate.play_game.
+
+        Args:
+            seed (int, optional): Master seed. Default draws fresh entropy.
+            policy (function, optional): Runner send policy for all games. Must be picklable.
+
+        Returns:
+            list of tuple: Job of each game.
+        """
+        sources = dice_source(seed).fork(len(self.schedule))
+        jobs = []
+        for (away, home), starters, dice in zip(self.schedule, self.starters(), sources):
+            positions = []
+            for team, starter in zip([away, home], starters):
+                side = list(self.rosters[team]['positions'])
+                side[1] = starter
+                positions.append(side)
+            lineups = [self.rosters[away]['lineup'], self.rosters[home]['lineup']]
+            jobs.append(([away, home], positions, lineups, policy, dice, False))
+        return jobs
+
+    def add(self, summaries, stats = None):
+        """Folds the results of a batch into the standings and totals.
+
+        Args:
+            summaries (list of dict): Game summaries, as returned by simulate.play_game.
+            stats (stat_table, optional): Box score totals of the batch, over the same players. Default leaves the totals as they are.
+        """
+        for summary in summaries:
+            for side in [0,1]:
+                line = self.standings[summary['teams'][side]]
+                line['W' if summary['result'] == side else 'L'] += 1
+                line['RS'] += summary['score'][side]
+                line['RA'] += summary['score'][1 - side]
+        if stats is not None:
+            self.stats.merge(stats)
+        self.played += len(summaries)
+
+    def play(self, seed = None, workers = None, batch = 50, policy = None, callback = None):
+        """Plays the whole schedule.
+
+        Args:
+            seed (int, optional): Master seed. Default draws fresh entropy.
+            workers (int, optional): Number of worker processes. 1 plays all games in this process. Default uses all cores.
+            batch (int, default 50): Games per batch sent to a worker.
+            policy (function, optional): Runner send policy for all games. Must be picklable.
+            callback (function, optional): Called with this season after each batch is folded in, e.g. to show live standings.
+        """
+        jobs = self.jobs(seed, policy)
+        batches = [(self.stats.players, jobs[i:i + batch]) for i in range(0, len(jobs), batch)]
+        del jobs
+
+        workers = workers if workers is not None else os.cpu_count()
+        if workers == 1:
+            for part in batches:
+                self.add(*play_batch(part))
+                if callback is not None:
+                    callback(self)
+            return
+
+        #Keep a few batches per worker in flight, and fold in each as soon as it's done
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            pending = set()
+            batches = iter(batches)
+            while True:
+                for part in batches:
+                    pending.add(executor.submit(play_batch, part))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    self.add(*future.result())
+                    if callback is not None:
+                        callback(self)
+
+    def play_lockstep(self, seed = None, policy = None):
+        """Plays the whole schedule side by side with lockstep.lockstep, in this process.
+
+        Each team with each of its starting pitchers is one team of the lockstep, and every game of the schedule is played between the two due to meet. Lockstep games keep no box scores, so only the standings and games played are updated, and stats is left as it is. The dice differ from those of play, so results only agree with it statistically.
+
+        Args:
+            seed (int, optional): Seed of the dice. Default draws fresh entropy.
+            policy (function, optional): Runner send policy for all games, as taken by lockstep.lockstep.
+        """
+        sides = {}
+        matchups = []
+        for game, starters in zip(self.schedule, self.starters()):
+            matchups.append([sides.setdefault(side, len(sides)) for side in zip(game, starters)])
+        positions, lineups = [], []
+        for team, starter in sides:
+            side = list(self.rosters[team]['positions'])
+            side[1] = starter
+            positions.append(side)
+            lineups.append(self.rosters[team]['lineup'])
+
+        results = lockstep(positions, lineups, policy).play(len(self.schedule), seed, matchups)
+        self.add([{'teams': list(game), 'result': int(result), 'score': score.tolist()}
+                  for game, result, score in zip(self.schedule, results['result'], results['score'])])
+
+    def table(self):
+        """Standings, best record first.
+
+        Returns:
+            list of tuple: (team, W, L, winning percentage, games behind, RS, RA) of each team.
+        """
+        lines = sorted(self.standings.items(), key = lambda item: (item[1]['W'] - item[1]['L'], item[1]['RS'] - item[1]['RA']), reverse = True)
+        if not lines:
+            return []
+        lead = lines[0][1]['W'] - lines[0][1]['L']
+        return [(team, line['W'], line['L'], line['W'] / max(1, line['W'] + line['L']), (lead - line['W'] + line['L']) / 2, line['RS'], line['RA'])
+                for team, line in lines]
+
+    def display(self):
+        """Prints the standings.
+        """
+        print('%-12s %4s %4s %6s %5s %5s %5s' % ('Team', 'W', 'L', 'Pct', 'GB', 'RS', 'RA'))
+        for team, W, L, pct, GB, RS, RA in self.table():
+            print('%-12s %4d %4d %6.3f %5s %5d %5d' % (team, W, L, pct, '-' if GB == 0 else '%g' % GB, RS, RA))
+
+if __name__ == '__main__':
+    lineup = ["Eddie Collins","Cy Young",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]
+    rotation = ["Cy Young","Christy Mathewson","Joe McGinnity","Pete Alexander"]
+    rosters = {team: {'positions': lineup, 'lineup': [0,2,3,4,5,6,7,8,9], 'rotation': rotation[i:] + rotation[:i]}
+               for i, team in enumerate(['Boston', 'New York', 'Brooklyn', 'Philadelphia'])}
+    league = season(rosters)
+    league.play(seed = 0)
+    league.display()
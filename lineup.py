@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from math import factorial
+import os
+import numpy as np
+import markov
+
+#Plate appearances followed within an inning before the remaining probability (well under 1e-6) is dropped
+max_inning_PA = 27
+
+def _inning_values(matrices, runs, first):
+    """Expected runs and next leadoff of an inning, for every batting order starting with a given batter.
+
+    Plate appearances are propagated as a distribution over base-out states. The first nine plate appearances only depend on the order so far, so they are computed once for every partial order and shared by all orders extending it.
+
+    Args:
+        matrices (numpy.ndarray): Array of shape (9, 24, 25) of transition matrices of each batter.
+        runs (numpy.ndarray): Array of shape (9, 24) of expected runs of each batter from each base-out state.
+        first (int): Batter leading off.
+
+    Returns:
+        numpy.ndarray: Array of shape (8!, 9) of batting orders.
+        numpy.ndarray: Array of shape (8!,) of expected runs in an inning started by the first batter in each order.
+        numpy.ndarray: Array of shape (8!, 9). Element [i, j] is the probability that the next inning starts with lineup spot j.
+    """
+    n = len(matrices)
+
+    #Partial orders, with the state distribution, runs scored and next leadoff probabilities of each
+    orders = np.array([[first]])
+    states = np.zeros((1, markov.n_states))
+    states[0, 0] = 1
+    expected = np.zeros(1)
+    leadoff = np.zeros((1, n))
+
+    def step(rows, batter, PA):
+        new = states[rows] @ matrices[batter]
+        expected[rows] += states[rows] @ runs[batter]
+        leadoff[rows, PA % n] += new[:, markov.end_of_inning]
+        states[rows] = new[:, :markov.n_states]
+
+    step(np.arange(1), first, 1)
+
+    #Extend partial orders one lineup spot at a time
+    for PA in range(2, n + 1):
+        new_orders, parents = [], []
+        for batter in range(n):
+            rows = np.nonzero((orders != batter).all(axis = 1))[0]
+            new_orders.append(np.column_stack([orders[rows], np.full(len(rows), batter)]))
+            parents.append(rows)
+        parents = np.concatenate(parents)
+        orders = np.concatenate(new_orders)
+        states, expected, leadoff = states[parents], expected[parents], leadoff[parents]
+        for batter in range(n):
+            step(np.nonzero(orders[:, -1] == batter)[0], batter, PA)
+
+    #Continue around the order until the inning is over
+    for PA in range(n + 1, max_inning_PA + 1):
+        spot = (PA - 1) % n
+        for batter in range(n):
+            step(np.nonzero(orders[:, spot] == batter)[0], batter, PA)
+
+    return orders, expected, leadoff
+
+def _rank(orders):
+    """Lexicographic rank of each permutation.
+
+    Args:
+        orders (numpy.ndarray): Array of shape (N, n) of permutations of range(n).
+
+    Returns:
+        numpy.ndarray: Array of shape (N,) of ranks.
+    """
+    n = orders.shape[1]
+    rank = np.zeros(len(orders), dtype = np.int64)
+    for i in range(n):
+        smaller = (orders[:, i+1:] < orders[:, i:i+1]).sum(axis = 1)
+        rank += smaller * factorial(n - 1 - i)
+    return rank
+
+def _interchangeable(matrices, runs):
+    """Groups batters whose plate appearances have identical transitions.
+
+    Args:
+        matrices (numpy.ndarray): Array of shape (9, 24, 25) of transition matrices of each batter.
+        runs (numpy.ndarray): Array of shape (9, 24) of expected runs of each batter.
+
+    Returns:
+        list of int: For each batter, the first batter identical to it.
+    """
+    first = []
+    for i in range(len(matrices)):
+        first.append(next(j for j in range(i + 1) if np.array_equal(matrices[i], matrices[j]) and np.array_equal(runs[i], runs[j])))
+    return first
+
+def game_runs(orders, expected, leadoff, innings = 9):
+    """Expected runs per game of batting orders, from the inning values of every order.
+
+    Args:
+        orders (numpy.ndarray): Array of shape (N, 9) of batting orders to evaluate.
+        expected (numpy.ndarray): Array of shape (9!,) of expected inning runs of every order, indexed by rank.
+        leadoff (numpy.ndarray): Array of shape (9!, 9) of next leadoff probabilities of every order, indexed by rank.
+        innings (int, default 9): Number of innings.
+
+    Returns:
+        numpy.ndarray: Array of shape (N,) of expected runs per game.
+    """
+    n = orders.shape[1]
+
+    #Rank of the order rotated to start at each lineup spot
+    rotations = np.stack([_rank(np.roll(orders, -k, axis = 1)) for k in range(n)], axis = 1)
+
+    total = np.zeros(len(orders))
+    start = np.zeros((len(orders), n))
+    start[:, 0] = 1
+    for inning in range(innings):
+        new_start = np.zeros_like(start)
+        for k in range(n):
+            total += start[:, k] * expected[rotations[:, k]]
+            new_start += start[:, k:k+1] * np.roll(leadoff[rotations[:, k]], k, axis = 1)
+        start = new_start
+    return total
+
+def optimize(roster, defense, k = 10, workers = None, policy = None):
+    """Searches every batting order of a roster for those scoring the most runs per game against a defense.
+
+    Every order is evaluated exactly with the Markov chain of markov.py, over 9 innings. Orders which only swap interchangeable batters (identical cards and speed) are dropped from the results.
+
+    The search is exhaustive: no orders are pruned by bounds. The runs per game of all orders of a roster lie within a few percent of each other (3.66 to 3.77 for the teams in __main__), so an upper bound from the exact first innings and the best inning value of any rotation still keeps over 99% of orders above the 10th best. The cost is kept down instead by sharing the first nine plate appearances of every inning between all orders extending the same partial order.
+
+    Args:
+        roster (list of batter): The 9 batters to order.
+        defense (list of batter and pitcher): List of 10 players at each position of the fielding team, with the pitcher at index 1.
+        k (int, default 10): Number of orders to return.
+        workers (int, optional): Number of worker processes. 1 runs in this process. Default uses all cores.
+        policy (function, optional): Runner send policy.
+
+    Returns:
+        list of tuple: The k best orders as (list of batter, expected runs per game), best first.
+    """
+    n = len(roster)
+    model = markov.markov_model(defense, policy)
+    speed = int(round(np.mean([B.run for B in roster])))
+    transitions = [model.batter_transitions(B, speed = speed) for B in roster]
+    matrices = np.stack([M for M, R in transitions])
+    runs = np.stack([R for M, R in transitions])
+
+    #Inning values of every order, split by leadoff batter
+    workers = workers if workers is not None else os.cpu_count()
+    if workers == 1:
+        parts = [_inning_values(matrices, runs, first) for first in range(n)]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            parts = list(executor.map(_inning_values, [matrices] * n, [runs] * n, range(n)))
+
+    orders = np.concatenate([part[0] for part in parts])
+    expected = np.zeros(factorial(n))
+    leadoff = np.zeros((factorial(n), n))
+    ranks = _rank(orders)
+    expected[ranks] = np.concatenate([part[1] for part in parts])
+    leadoff[ranks] = np.concatenate([part[2] for part in parts])
+
+    #Drop orders swapping interchangeable batters: keep those listing each group in roster order
+    first = np.array(_interchangeable(matrices, runs))
+    canonical = np.ones(len(orders), dtype = bool)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if first[i] == first[j]:
+                canonical &= np.argmax(orders == i, axis = 1) < np.argmax(orders == j, axis = 1)
+    orders = orders[canonical]
+
+    totals = game_runs(orders, expected, leadoff)
+    best = np.argsort(-totals, kind = 'stable')[:k]
+    return [([roster[i] for i in orders[b]], totals[b]) for b in best]
+
+if __name__ == '__main__':
+    from player import batter, pitcher
+    names = ["Eddie Collins","Christy Mathewson",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]
+    defense = [batter(name) if i != 1 else pitcher(name) for i, name in enumerate(names)]
+    roster = [defense[i] for i in [0,2,3,4,5,6,7,8,9]]
+    for order, total in optimize(roster, defense, k = 5):
+        print('%.3f  %s' % (total, ', '.join(B.name for B in order)))
@@ -0,0 +1,321 @@
+import time
+import numpy as np
+import markov
+from dice import dice_source
+from game import game
+from registry import registry
+from running import decisions, quiet, send_always, send_never, send_threshold
+from sendpolicy import send_table
+from transitions import shared_table, home, safe, out, held
+from winprob import max_diff, n_innings
+
+#Base each decision's runner starts from, and whether the runner gets 2 more on the chance with two outs (singles and doubles) or always (flyballs)
+_runner_base = np.array([int(decision.split('_')[1]) - 1 for decision in decisions])
+_flyball = np.array([decision.startswith('FB') for decision in decisions])
+_first_to_third = decisions.index('S_1')
+_abnormal = decisions.index('FB_2')
+
+def alias_tables(probabilities):
+    """Alias tables of several discrete distributions, for sampling each in constant time (Vose's method).
+
+    Tables are built one row at a time in Python, so this is meant for the few distributions of a lockstep, built once. Only the sampling done with the tables works on whole arrays.
+
+    Args:
+        probabilities (numpy.ndarray): Array of shape (rows, n). Each row is a distribution.
+
+    Returns:
+        numpy.ndarray: Array of shape (rows, n) of the chance of keeping each column.
+        numpy.ndarray: Array of int of shape (rows, n) of the alias of each column.
+    """
+    rows, n = probabilities.shape
+    accept = np.ones((rows, n))
+    alias = np.tile(np.arange(n), (rows, 1))
+    for r in range(rows):
+        scaled = list(probabilities[r] / probabilities[r].sum() * n)
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            i, j = small.pop(), large.pop()
+            accept[r, i] = scaled[i]
+            alias[r, i] = j
+            scaled[j] -= 1 - scaled[i]
+            (small if scaled[j] < 1 else large).append(j)
+    return accept, alias
+
+class lockstep():
+    """Many games played side by side, one plate appearance of every unfinished game per step.
+
+    The engine holds any number of teams, and each game is played between two of them, so a whole schedule can be played at once. The games are kept as arrays: the teams, batting team, inning, outs, the lineup spot of the runner on each base, the lineup spot due up and the score of each game. Each step draws the resolved play of every game by the alias method, from the plate appearance distributions of markov.py (the compiled matchup vectors, with X chances resolved against the defense), then moves runners with a transition_table. Send decisions are made with the chance of success of the actual runner and fielder, and rolled like runner_advancement. The inning, end-of-game and walk-off rules are those of game.PA.
+
+    The policy must be one that can be applied to arrays: send_threshold, send_always, send_never or sendpolicy.send_table.
+
+    Play distributions are compiled for each pair of teams the first time they meet, and kept for later calls of play.
+
+    Attributes:
+        positions (list of list of player): Cards at each position for each team.
+        lineup (list of list of batter): Batting order of each team.
+        table (transition_table): Transitions of every play.
+        plays (list of tuple): Resolved plays a plate appearance can end in, with any wild pitch or passed ball first, over every pair of teams compiled so far.
+    """
+    def __init__(self, positions, lineups = None, policy = None):
+        """Initialization function for lockstep. Compiles the transitions, and the play distributions of the first two teams against each other.
+
+        Args:
+            positions (list of list of str): List of shape (teams, 10) of player names at each position for each team, as taken by game. Usually the away and home teams of a single matchup.
+            lineups (list of list of int, optional): List of shape (teams, 9) of the position number of each lineup spot. Default is in increasing order of position number.
+            policy (function, optional): Runner send policy. Default is the headless default of game.
+
+        Raises:
+            ValueError: If there are fewer than two teams, or the policy can't be applied to arrays.
+        """
+        if len(positions) < 2:
+            raise ValueError('lockstep games need at least two teams')
+        self.positions, self.lineup = registry.resolve([list(side) for side in positions], lineups)
+        self.table = shared_table(self.positions[:2])
+        self._set_policy(policy if policy is not None else send_threshold(14))
+
+        #Fielder of each play's send decision, runner speeds and outfielder arms. Only outfielders have arm ratings, and only they take part in send decisions
+        self._fielder = np.array([play[1] if len(play) > 1 and type(play[1]) is int else 0 for play in self.table.plays])
+        self._speed = np.array([[B.run for B in side] for side in self.lineup])
+        self._arm = np.array([[side[pos].field[pos][2] if pos in range(7, 10) else 0 for pos in range(10)] for side in self.positions])
+
+        #Defensive model of each team and play distribution of every lineup spot against each defense, keyed by (batting team, fielding team)
+        self._models = {}
+        self._distributions = {}
+        self._prepare([(0, 1), (1, 0)])
+
+    def _prepare(self, pairs):
+        """Compiles the play distributions of every lineup spot of the batting team against the fielding team of each pair not compiled yet, and rebuilds the alias tables if any was added.
+        """
+        new = [pair for pair in dict.fromkeys(pairs) if pair not in self._distributions]
+        if not new:
+            return
+        for bat, field in new:
+            if field not in self._models:
+                self._models[field] = markov.markov_model(self.positions[field])
+            self._distributions[(bat, field)] = [self._models[field].play_distribution(B) for B in self.lineup[bat]]
+
+        #Alias table rows of the pair in _pair, 9 rows per pair starting at 9 times its index
+        compiled = list(self._distributions)
+        self._pair = np.full((len(self.positions), len(self.positions)), -1, dtype = np.int64)
+        for k, (bat, field) in enumerate(compiled):
+            self._pair[bat, field] = k
+        self.plays = sorted({play for pair in compiled for dist in self._distributions[pair] for play in dist}, key = str)
+        probabilities = np.array([[dist.get(play, 0) for play in self.plays] for pair in compiled for dist in self._distributions[pair]])
+        self._accept, self._alias = alias_tables(probabilities)
+
+        #Table rows of the wild pitch or passed ball (-1 for none) and of the play itself
+        self._pre = np.array([self.table.index[play[:1]] if play[0] in ['WP', 'PB'] else -1 for play in self.plays])
+        self._main = np.array([self.table.index[play[1:] if play[0] in ['WP', 'PB'] else play] for play in self.plays])
+
+    def _set_policy(self, policy):
+        """Turns the policy into a constant threshold or a table of thresholds.
+        """
+        self._thresholds = None
+        if isinstance(policy, send_table):
+            self._thresholds = policy.table
+            self._threshold = policy.default
+        elif isinstance(policy, send_threshold):
+            self._threshold = policy.threshold
+        elif policy is send_always:
+            self._threshold = 1
+        elif policy is send_never:
+            self._threshold = 21
+        else:
+            raise ValueError('lockstep games need a send_threshold, send_always, send_never or send_table policy')
+
+    def _move(self, runners, play, state, row, batter):
+        """Moves the runners of some games through the table.
+
+        Returns:
+            numpy.ndarray: New base-out states.
+            numpy.ndarray: Runs scored.
+            numpy.ndarray: New runners, as lineup spots (-1 for empty).
+        """
+        moves = self.table.moves[play, state, row]
+        sources = np.column_stack([runners, np.broadcast_to(batter, len(runners))])
+        new = np.full((len(runners), 3), -1, dtype = np.int8)
+        for source in range(4):
+            to = moves[:, source]
+            on = np.nonzero(to < home)[0]
+            new[on, to[on]] = sources[on, source]
+        return self.table.new_state[play, state, row], self.table.runs[play, state, row], new
+
+    def play(self, n_games, seed = None, matchups = None):
+        """Plays games until all are over.
+
+        Args:
+            n_games (int): Number of games.
+            seed (int, optional): Seed of the dice. Default draws fresh entropy.
+            matchups (array_like, optional): Array of int of shape (n_games, 2) of the index in positions of the away and home team of each game. Default is team 0 at team 1 in every game.
+
+        Returns:
+            dict: 'score' (array of shape (n_games, 2) of away and home runs), 'result' (array of the winner of each game, 0 for away and 1 for home), 'innings' (array of the last inning of each game), 'plate_appearances' (array of the plate appearances of each game) and 'counts' (array of shape (teams, 9, len(plays)) of plate appearances of each lineup spot of each team ending in each play).
+
+        Raises:
+            ValueError: If matchups isn't of shape (n_games, 2), or pairs a team with itself.
+        """
+        teams = np.tile([0, 1], (n_games, 1)) if matchups is None else np.array(matchups, dtype = np.int64)
+        if teams.shape != (n_games, 2) or np.any(teams[:, 0] == teams[:, 1]):
+            raise ValueError('matchups must give two different teams for each of the %d games' % n_games)
+        pairs = [divmod(pair, len(self.positions)) for pair in np.unique(teams[:, 0] * len(self.positions) + teams[:, 1]).tolist()]
+        self._prepare(pairs + [(field, bat) for bat, field in pairs])
+
+        rng = dice_source(seed).rng
+        n_plays = len(self.plays)
+        weights = 1 << np.arange(3)
+        counts = np.zeros(len(self._distributions) * 9 * n_plays, dtype = np.int64)
+        final = {'score': np.zeros((n_games, 2), dtype = np.int16), 'result': np.zeros(n_games, dtype = np.int8),
+                 'innings': np.zeros(n_games, dtype = np.int16), 'plate_appearances': np.zeros(n_games, dtype = np.int16)}
+
+        #State of the unfinished games only. Games are dropped as soon as they're over, so every step works on whole arrays.
+        #rows is the first alias table row of each team's lineup against the other team, for the away and home team
+        ids = np.arange(n_games)
+        rows = self._pair[teams, teams[:, ::-1]] * 9
+        half = np.zeros(n_games, dtype = np.int8)
+        inning = np.ones(n_games, dtype = np.int16)
+        outs = np.zeros(n_games, dtype = np.int8)
+        runners = np.full((n_games, 3), -1, dtype = np.int8)
+        spot = np.zeros((n_games, 2), dtype = np.int8)
+        score = np.zeros((n_games, 2), dtype = np.int16)
+        PAs = np.zeros(n_games, dtype = np.int16)
+
+        while len(ids):
+            games = np.arange(len(ids))
+            batter = spot[games, half]
+            state = outs * 8 + (runners >= 0) @ weights
+
+            #Play of each game, by the alias method: a uniform column, kept or swapped for its alias
+            spot_row = rows[games, half] + batter
+            column = rng.integers(0, n_plays, len(ids))
+            play = np.where(rng.random(len(ids)) < self._accept[spot_row, column], column, self._alias[spot_row, column])
+            counts += np.bincount(spot_row * n_plays + play, minlength = counts.size)
+            PAs += 1
+
+            #Wild pitches and passed balls happen before the play
+            pre = self._pre[play]
+            wild = np.nonzero(pre >= 0)[0]
+            if len(wild):
+                state[wild], runs, runners[wild] = self._move(runners[wild], pre[wild], state[wild], held, -1)
+                score[wild, half[wild]] += runs
+
+            #Send decisions
+            main = self._main[play]
+            row = np.full(len(ids), held)
+            decision = self.table.decision[main, state]
+            branch = np.nonzero(decision >= 0)[0]
+            if len(branch):
+                row[branch] = self._decide(half[branch], teams[branch, half[branch]], teams[branch, 1 - half[branch]], batter[branch], spot[branch, 1 - half[branch]],
+                                           inning[branch], score[branch], main[branch], state[branch], decision[branch], runners[branch], rng)
+
+            state, runs, runners = self._move(runners, main, state, row, batter)
+            score[games, half] += runs
+            spot[games, half] = (batter + 1) % 9
+
+            #End of the game at the end of the ninth or later, or on a walk-off
+            over = state == markov.end_of_inning
+            late = inning >= 9
+            home_leads = score[:, 1] > score[:, 0]
+            away_leads = score[:, 0] > score[:, 1]
+            result = np.full(len(ids), -1, dtype = np.int8)
+            result[over & late & (half == 0) & home_leads] = 1
+            result[over & late & (half == 1) & away_leads] = 0
+            result[~over & late & (half == 1) & home_leads] = 1
+
+            done = result >= 0
+            if done.any():
+                finished = ids[done]
+                final['score'][finished] = score[done]
+                final['result'][finished] = result[done]
+                final['innings'][finished] = inning[done]
+                final['plate_appearances'][finished] = PAs[done]
+
+            #Next half inning
+            inning += over * half
+            half = np.where(over, 1 - half, half)
+            outs = np.where(over, 0, state // 8).astype(np.int8)
+            runners[over] = -1
+
+            if done.any():
+                keep = ~done
+                ids, teams, rows, half, inning, outs, runners, spot, score, PAs = [array[keep] for array in [ids, teams, rows, half, inning, outs, runners, spot, score, PAs]]
+
+        #Counts of each pair summed over each batting team's opponents
+        final['counts'] = np.zeros((len(self.positions), 9, n_plays), dtype = np.int64)
+        np.add.at(final['counts'], [bat for bat, field in self._distributions], counts.reshape(-1, 9, n_plays))
+        return final
+
+    def _decide(self, team, bat, field, batter, other, inning, score, play, state, decision, runners, rng):
+        """Sends or holds the runner of every game at a send decision, and rolls for the runners sent.
+
+        Returns:
+            numpy.ndarray: Outcome row of each game (safe, out or held).
+        """
+        #Chance of success, as in game_state.S, D and FB
+        runner = runners[np.arange(len(runners)), _runner_base[decision]]
+        fielder = self._fielder[play]
+        bonus = np.where(_flyball[decision], 2, 2 * (state // 8 == 2)) + np.where(decision == _first_to_third, 2 * (fielder - 8), 0)
+        chance = np.clip(self._speed[bat, runner] + self._arm[field, fielder] + bonus, 1, 20)
+
+        if self._thresholds is None:
+            send = chance >= self._threshold
+        else:
+            #Thresholds of the game state as the policy would see it
+            outs, bases, runs = self.table.seen[play, state].T
+            diff = score[:, 1] - score[:, 0] + np.where(team == 1, runs, -runs)
+            threshold = self._thresholds[decision, np.minimum(inning, n_innings) - 1, team, outs, bases,
+                                         np.clip(diff, -max_diff, max_diff) + max_diff, batter, other]
+            send = chance >= threshold
+
+        roll = rng.integers(1, 21, len(runners))
+        row = np.where(roll <= chance, safe, out)
+        row = np.where((decision == _abnormal) & (roll > chance) & (roll < 20), held, row) #Flyball to right: out only on a 20
+        return np.where(send, row, held)
+
+def reference_check(positions, lineups = None, n_games = 2000, policy = None, seed = 0):
+    """Plays the same matchup with game.game and with lockstep, and summarizes both, to check they give the same statistics.
+
+    Args:
+        positions (list of list of str): Player names at each position for each team.
+        lineups (list of list of int, optional): Position number of each lineup spot for each team.
+        n_games (int, default 2000): Number of games played by each.
+        policy (function, optional): Runner send policy, as taken by lockstep.
+        seed (int, default 0): Seed of the dice.
+
+    Returns:
+        dict: Keyed by 'game' and 'lockstep'. Each has 'away runs', 'home runs', 'home wins', 'innings' and 'plate appearances' (means per game, with the standard error of each in 'error') and 'games per second'. The lockstep rate includes compiling the engine, which takes longer than playing a few thousand games.
+    """
+    lineups = lineups if lineups is not None else [[0,2,3,4,5,6,7,8,9], [0,2,3,4,5,6,7,8,9]]
+    policy = policy if policy is not None else send_threshold(14)
+
+    start = time.perf_counter()
+    rows = []
+    for dice in dice_source(seed).fork(n_games):
+        G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, policy = policy, dice = dice)
+        PAs = 0
+        while G.result is None:
+            G.PA()
+            PAs += 1
+        rows.append([G.GS.score[0], G.GS.score[1], G.result, G.GS.inning, PAs])
+    reference = np.array(rows, dtype = float)
+    reference_rate = n_games / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    engine = lockstep(positions, lineups, policy)
+    results = engine.play(n_games, seed)
+    rate = n_games / (time.perf_counter() - start)
+    vectorized = np.column_stack([results['score'], results['result'], results['innings'], results['plate_appearances']]).astype(float)
+
+    names = ['away runs', 'home runs', 'home wins', 'innings', 'plate appearances']
+    summary = {}
+    for key, data, games_per_second in [('game', reference, reference_rate), ('lockstep', vectorized, rate)]:
+        summary[key] = {name: data[:, i].mean() for i, name in enumerate(names)}
+        summary[key]['error'] = {name: data[:, i].std() / np.sqrt(n_games) for i, name in enumerate(names)}
+        summary[key]['games per second'] = games_per_second
+    return summary
+
+if __name__ == '__main__':
+    pos = [["Eddie Collins","Cy Young",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"],
+           ["Eddie Collins","Christy Mathewson",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]]
+    for key, line in reference_check(pos).items():
+        print('%-8s %s %.0f games/s' % (key, ', '.join('%s %.3f' % (name, value) for name, value in line.items() if name not in ['error', 'games per second']), line['games per second']))
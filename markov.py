@@ -0,0 +1,260 @@
+import numpy as np
+from game import game_state
+from running import quiet, send_threshold
+from playcodes import parse
+from fielding import chance_distribution
+import cards
+from matchup import matchups
+
+#Base-out states are indexed by outs*8 + bases, where bases is a bitmask (1 for first, 2 for second, 4 for third). Index 24 is the end of the inning.
+n_states = 24
+end_of_inning = 24
+
+#Most runs that can score on one plate appearance: a wild pitch scoring a runner, then a homerun with two on
+max_runs = 4
+
+class _runner():
+    """Stand-in for a batter on the bases. Only the attributes used by the game_state play functions are provided.
+
+    Attributes:
+        name (str): Name of the runner.
+        run (int): Running speed of the runner.
+    """
+    def __init__(self, name, run):
+        self.name = name
+        self.run = run
+
+class _fixed_dice():
+    """Dice source which always rolls the same d20. Used to enumerate every roll of a conditional advancement.
+
+    Attributes:
+        roll (int): Result of every d20 roll.
+        used (bool): Whether or not a d20 has been rolled.
+    """
+    def __init__(self):
+        self.roll = 1
+        self.used = False
+
+    def d20(self):
+        self.used = True
+        return self.roll
+
+class markov_model():
+    """Markov chain over the 24 base-out states for one defense. Transitions are found by running the game_state play functions on every base-out state, with every possible d20 roll for conditional advancement, so the rules are exactly those of game.PA.
+
+    Runners on base are given the same running speed, since the base-out state doesn't record who they are.
+
+    Attributes:
+        defense (list of batter and pitcher): List of 10 players at each position of the fielding team (index 1 is the pitcher, 0 is unused).
+        policy (function): Runner send policy, as taken by game_state.
+        GS (game_state): Game state the play functions are run on.
+        transitions (dict): Cache of transition matrices and expected runs, keyed by (play tuple, runner speed).
+        joint (dict): Cache of joint distributions of new state and runs, keyed by (play tuple, runner speed).
+    """
+    def __init__(self, defense, policy = None):
+        """Initialization function for markov_model.
+
+        Args:
+            defense (list of batter and pitcher): List of 10 players at each position of the fielding team. Must be batter/pitcher classes, with the pitcher at index 1.
+            policy (function, optional): Runner send policy, as taken by game_state. Default is the headless default of game.
+        """
+        self.defense = defense
+        self.policy = policy if policy is not None else send_threshold(14)
+        self.dice = _fixed_dice()
+
+        #Game state with the defense in the field for the away team's half inning
+        self.GS = game_state(positions = [list(defense), list(defense)], policy = self.policy, log = quiet, dice = self.dice)
+        self.transitions = {}
+        self.joint = {}
+
+        #Distribution of X chance results for each position
+        self.chances = {pos: chance_distribution(defense[pos], pos) for pos in range(1,10)}
+
+    def _run_play(self, play, state, speed, roll):
+        """Runs a play from a base-out state with a fixed d20 roll.
+
+        Args:
+            play (tuple): Play tuple.
+            state (int): Base-out state index.
+            speed (int): Running speed of the runners.
+            roll (int): Result of any d20 roll.
+
+        Returns:
+            int: New base-out state index.
+            int: Runs scored.
+        """
+        GS = self.GS
+        GS.batting_team = 0
+        GS.score = [0, 0]
+        GS.outs = state // 8
+        GS.runners = [_runner('R%d' % (b + 1), speed) if state & (1 << b) else None for b in range(3)]
+        GS.batter = _runner('B', speed)
+        self.dice.roll = roll
+
+        #Wild pitches and passed balls happen before the play
+        runs = 0
+        if play[0] in ['PB', 'WP']:
+            runs += len(GS.plays[play[0]]()[0])
+            play = play[1:]
+        runs += len(GS.plays[play[0]](*play[1:])[0])
+
+        if GS.outs >= 3:
+            return end_of_inning, runs
+        return GS.outs * 8 + sum(1 << b for b in range(3) if GS.runners[b] is not None), runs
+
+    def play_transitions(self, play, speed):
+        """Transition matrix and expected runs of one play from every base-out state.
+
+        Args:
+            play (tuple): Play tuple. X chances must already be resolved.
+            speed (int): Running speed of the runners.
+
+        Returns:
+            numpy.ndarray: Array of shape (24, 25) of transition probabilities.
+            numpy.ndarray: Array of shape (24,) of expected runs scored on the play.
+        """
+        key = (play, speed)
+        if key in self.transitions:
+            return self.transitions[key]
+
+        J = self.play_run_transitions(play, speed)
+        self.transitions[key] = (J.sum(axis = 2), J.sum(axis = 1) @ np.arange(max_runs + 1))
+        return self.transitions[key]
+
+    def play_run_transitions(self, play, speed):
+        """Joint distribution of the new base-out state and runs scored of one play from every base-out state.
+
+        Args:
+            play (tuple): Play tuple. X chances must already be resolved.
+            speed (int): Running speed of the runners.
+
+        Returns:
+            numpy.ndarray: Array of shape (24, 25, max_runs + 1). Element [s, t, r] is the probability of going from state s to state t with r runs scored.
+        """
+        key = (play, speed)
+        if key in self.joint:
+            return self.joint[key]
+
+        J = np.zeros((n_states, n_states + 1, max_runs + 1))
+        for state in range(n_states):
+            self.dice.used = False
+            new_state, runs = self._run_play(play, state, speed, 1)
+
+            if not self.dice.used: #Deterministic play
+                J[state, new_state, runs] = 1
+            else: #Enumerate every d20 roll
+                for roll in range(1, 21):
+                    new_state, runs = self._run_play(play, state, speed, roll)
+                    J[state, new_state, runs] += 1 / 20
+
+        self.joint[key] = J
+        return J
+
+    def play_distribution(self, B, P = None):
+        """Distribution of resolved plays in a plate appearance, with X chances resolved against the defense.
+
+        Args:
+            B (batter): Current batter.
+            P (pitcher, optional): Current pitcher. Default is the pitcher of the defense.
+
+        Returns:
+            dict: Probability of each play, keyed by play tuple.
+        """
+        P = P if P is not None else self.defense[1]
+        vector = matchups.vector(B, P)
+
+        dist = {}
+        for i in np.nonzero(vector)[0]:
+            play = parse(cards.outcomes[i])
+            if play[0] == 'X':
+                for result, prob in self.chances[play[1]].items():
+                    dist[result] = dist.get(result, 0) + vector[i] * prob
+            else:
+                dist[play] = dist.get(play, 0) + vector[i]
+        return dist
+
+    def batter_transitions(self, B, P = None, speed = None):
+        """Transition matrix and expected runs of a plate appearance from every base-out state.
+
+        Args:
+            B (batter): Current batter.
+            P (pitcher, optional): Current pitcher. Default is the pitcher of the defense.
+            speed (int, optional): Running speed of the runners. Default is the speed of the batter.
+
+        Returns:
+            numpy.ndarray: Array of shape (24, 25) of transition probabilities.
+            numpy.ndarray: Array of shape (24,) of expected runs scored.
+        """
+        speed = speed if speed is not None else B.run
+        M = np.zeros((n_states, n_states + 1))
+        R = np.zeros(n_states)
+        for play, prob in self.play_distribution(B, P).items():
+            M_play, R_play = self.play_transitions(play, speed)
+            M += prob * M_play
+            R += prob * R_play
+        return M, R
+
+    def batter_run_transitions(self, B, P = None, speed = None):
+        """Joint distribution of the new base-out state and runs scored of a plate appearance from every base-out state.
+
+        Args:
+            B (batter): Current batter.
+            P (pitcher, optional): Current pitcher. Default is the pitcher of the defense.
+            speed (int, optional): Running speed of the runners. Default is the speed of the batter.
+
+        Returns:
+            numpy.ndarray: Array of shape (24, 25, max_runs + 1), as given by play_run_transitions.
+        """
+        speed = speed if speed is not None else B.run
+        J = np.zeros((n_states, n_states + 1, max_runs + 1))
+        for play, prob in self.play_distribution(B, P).items():
+            J += prob * self.play_run_transitions(play, speed)
+        return J
+
+    def solve(self, lineup, P = None, speed = None):
+        """Solves the chain for a batting lineup.
+
+        Args:
+            lineup (list of batter): Batting order of 9 batters.
+            P (pitcher, optional): Opposing pitcher. Default is the pitcher of the defense.
+            speed (int, optional): Running speed of all runners. Default is the rounded mean speed of the lineup.
+
+        Returns:
+            numpy.ndarray: Array of shape (9, 24). Element [i, s] is the expected runs for the rest of the inning from base-out state s with batter i up.
+            numpy.ndarray: Array of shape (9, 9). Element [i, j] is the probability that an inning started by batter i ends with batter j due up next.
+        """
+        speed = speed if speed is not None else int(round(np.mean([B.run for B in lineup])))
+        n = len(lineup)
+
+        #Transient transitions between (batter, state) pairs, absorption into next leadoff, and expected runs
+        T = np.zeros((n * n_states, n * n_states))
+        A = np.zeros((n * n_states, n))
+        R = np.zeros(n * n_states)
+        for i, B in enumerate(lineup):
+            M, R_i = self.batter_transitions(B, P, speed)
+            j = (i + 1) % n
+            T[i*n_states:(i+1)*n_states, j*n_states:(j+1)*n_states] = M[:, :n_states]
+            A[i*n_states:(i+1)*n_states, j] = M[:, end_of_inning]
+            R[i*n_states:(i+1)*n_states] = R_i
+
+        #Solve (I - T) X = [R, A] for expected runs and leadoff probabilities together
+        X = np.linalg.solve(np.eye(n * n_states) - T, np.column_stack([R, A]))
+        expected = X[:, 0].reshape(n, n_states)
+        leadoff = X[np.arange(n) * n_states, 1:] #Innings start with the bases empty and no outs
+
+        return expected, leadoff
+
+def run_expectancy(lineup, defense, batter = 0, policy = None):
+    """Run expectancy matrix for a lineup against a defense.
+
+    Args:
+        lineup (list of batter): Batting order of 9 batters.
+        defense (list of batter and pitcher): List of 10 players at each position of the fielding team, with the pitcher at index 1.
+        batter (int, default 0): Lineup spot of the batter due up.
+        policy (function, optional): Runner send policy.
+
+    Returns:
+        numpy.ndarray: Array of shape (8, 3). Element [bases, outs] is the expected runs for the rest of the inning, where bases is a bitmask (1 for first, 2 for second, 4 for third).
+    """
+    expected = markov_model(defense, policy).solve(lineup)[0]
+    return expected[batter].reshape(3, 8).T
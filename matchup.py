@@ -0,0 +1,201 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import numpy as np
+import cards
+from player import player_data
+
+#Index of each hand in the hand axes of the matrix. Switch hitters bat from the side opposite the pitcher.
+hand_index = {'L': 0, 'R': 1, 'S': 2}
+
+def card_hash(name):
+    """Hash of the stored card data of a player. Changes whenever the card in the store changes.
+
+    Args:
+        name (str): Player name.
+
+    Returns:
+        str: Hex digest of the card data.
+    """
+    return hashlib.sha1(json.dumps(player_data[name], sort_keys = True).encode('utf-8')).hexdigest()
+
+def play_hash(card):
+    """Hash of everything about a card that its matchup distributions depend on: its hand and its batting or pitching columns.
+
+    The hash is taken once per card object and kept in its columns_hash. Building a card resets columns_hash, so a card rebuilt from changed data gets a new hash, and cards with identical columns share one. Columns edited in place are not noticed until the card is rebuilt.
+
+    Args:
+        card (batter or pitcher): Player card.
+
+    Returns:
+        str: Hex digest.
+    """
+    if card.columns_hash is None:
+        columns = card.batting if card.type == 'B' else card.pitching
+        card.columns_hash = hashlib.sha1(repr((card.type, card.hand, columns)).encode('utf-8')).hexdigest()
+    return card.columns_hash
+
+def batter_sides(B):
+    """Outcome distributions of the batting card of a batter, as rolled on half of all plate appearances.
+
+    Args:
+        B (batter): Batter.
+
+    Returns:
+        numpy.ndarray: Array of shape (2, 2, len(outcomes)). Element [hand, tired] is the side vector against pitchers of hand ('L', 'R'), with the pitcher rested or tired.
+    """
+    return np.array([[cards.side_vector(cards.compile_batter(B, tired)[hand]) for tired in [False, True]] for hand in ['L', 'R']])
+
+def pitcher_sides(P):
+    """Outcome distributions of the pitching card of a pitcher, as rolled on half of all plate appearances.
+
+    Args:
+        P (pitcher): Pitcher.
+
+    Returns:
+        numpy.ndarray: Array of shape (2, 2, len(outcomes)). Element [hand, tired] is the side vector against batters batting from hand ('L', 'R'), rested or tired.
+    """
+    return np.array([[cards.side_vector(cards.compile_pitcher(P, tired)[hand]) for tired in [False, True]] for hand in ['L', 'R']])
+
+def combine(B_sides, B_hands, B_power, P_sides, P_hands):
+    """Outcome distributions of every batter against every pitcher, following the rules in game.PA as cards.matchup_vector does.
+
+    Args:
+        B_sides (numpy.ndarray): Array of shape (nB, 2, 2, len(outcomes)) of batter side vectors, as given by batter_sides.
+        B_hands (numpy.ndarray): Array of shape (nB,) of batter hand indices (0 'L', 1 'R', 2 'S').
+        B_power (numpy.ndarray): Boolean array of shape (nB, 2), True where the batter has power rating 'N' against pitchers of each hand.
+        P_sides (numpy.ndarray): Array of shape (nP, 2, 2, len(outcomes)) of pitcher side vectors, as given by pitcher_sides.
+        P_hands (numpy.ndarray): Array of shape (nP,) of pitcher hand indices (0 'L', 1 'R').
+
+    Returns:
+        numpy.ndarray: Array of shape (nB, nP, 2, len(outcomes)). Element [b, p, tired] is the outcome distribution of batter b against pitcher p, rested or tired.
+    """
+    #Side of the plate of every pair
+    side = np.where(B_hands[:, None] == 2, 1 - P_hands[None, :], B_hands[:, None])
+
+    matrix = B_sides[:, P_hands] + P_sides[np.arange(len(P_hands))[None, :], side]
+
+    #N-homerun is a homerun for batters without weak power, otherwise a single
+    HRN = matrix[..., cards.outcome_index['HRN']].copy()
+    power = B_power[:, P_hands][:, :, None]
+    matrix[..., cards.outcome_index['HRN']] = 0
+    matrix[..., cards.outcome_index['HR']] += np.where(power, HRN, 0)
+    matrix[..., cards.outcome_index['S_**']] += np.where(power, 0, HRN)
+
+    #Malformed cells are rolled again
+    return matrix / matrix.sum(axis = -1, keepdims = True)
+
+class matchup_cache():
+    """Least recently used cache of the outcome distributions of batter-pitcher pairs.
+
+    Pairs are computed on first lookup with cards.matchup_vector, and keyed by the play_hash of both cards and the pitcher's tired status, so a rebuilt card never gets a stale distribution, and nothing is computed for pairs never looked up. At most maxsize pairs are kept.
+
+    Distributions can be saved to a file with save, and loaded back by giving the path. Nothing is written unless save is called.
+
+    Attributes:
+        path (str or None): File loaded on first use and written by save. None keeps the cache in memory only.
+        maxsize (int): Largest number of pairs kept.
+        hits (int): Lookups found in the cache.
+        misses (int): Lookups computed.
+    """
+    def __init__(self, path = None, maxsize = 4096):
+        """Initialization function for matchup_cache.
+
+        Args:
+            path (str, optional): File to load saved distributions from on first use, and to save them to. Default keeps them in memory only.
+            maxsize (int, default 4096): Largest number of pairs kept.
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._loaded = path is None
+
+    def __len__(self):
+        return len(self._lru)
+
+    def _put(self, key, vector):
+        """Adds a pair, dropping the least recently used one if the cache is full.
+        """
+        vector.flags.writeable = False
+        self._lru[key] = vector
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last = False)
+
+    def _load(self):
+        """Loads the saved distributions, if the file exists and was saved with the same outcomes.
+        """
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as data:
+            if list(data['outcomes']) != list(cards.outcomes):
+                return
+            for key, vector in zip(data['keys'][-self.maxsize:], data['vectors'][-self.maxsize:]):
+                self._put((str(key[0]), str(key[1]), key[2] == 'T'), vector)
+
+    def save(self, path = None):
+        """Writes the cached distributions to a file, least recently used first.
+
+        Args:
+            path (str, optional): File to write. Default is path.
+
+        Raises:
+            ValueError: If no path is given and the cache has none.
+        """
+        path = path if path is not None else self.path
+        if path is None:
+            raise ValueError('matchup_cache has no path to save to')
+        keys = np.array([[B, P, 'T' if tired else 'F'] for B, P, tired in self._lru], dtype = str).reshape(-1, 3)
+        vectors = np.array(list(self._lru.values())).reshape(-1, len(cards.outcomes))
+        np.savez(path, outcomes = np.array(cards.outcomes), keys = keys, vectors = vectors)
+
+    def clear(self):
+        """Drops every cached pair.
+        """
+        self._lru.clear()
+
+    def vector(self, B, P):
+        """Outcome distribution of a plate appearance between a batter and a pitcher, as given by cards.matchup_vector.
+
+        Args:
+            B (batter): Current batter.
+            P (pitcher): Current pitcher. Its tired status is used.
+
+        Returns:
+            numpy.ndarray: Read only vector of length len(outcomes) summing to 1.
+        """
+        if not self._loaded:
+            self._load()
+        key = (play_hash(B), play_hash(P), P.tired)
+        try:
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return self._lru[key]
+        except KeyError:
+            self.misses += 1
+            vector = cards.matchup_vector(B, P)
+            self._put(key, vector)
+            return vector
+
+def matchup_matrix(batters, pitchers):
+    """Outcome distributions of several batters against several pitchers, combined in one vectorized step. Each card is compiled once.
+
+    Args:
+        batters (list of batter): Batters.
+        pitchers (list of pitcher): Pitchers.
+
+    Returns:
+        numpy.ndarray: Array of shape (len(batters), len(pitchers), 2, len(outcomes)). Element [b, p, tired] is the distribution of batter b against pitcher p, rested or tired, as given by cards.matchup_vector.
+    """
+    B_sides = np.array([batter_sides(B) for B in batters]).reshape(len(batters), 2, 2, len(cards.outcomes))
+    P_sides = np.array([pitcher_sides(P) for P in pitchers]).reshape(len(pitchers), 2, 2, len(cards.outcomes))
+    B_hands = np.array([hand_index[B.hand] for B in batters], dtype = np.int8)
+    P_hands = np.array([hand_index[P.hand] for P in pitchers], dtype = np.int8)
+    B_power = np.array([[B.batting[hand]['pow'] == 'N' for hand in ['L', 'R']] for B in batters], dtype = bool).reshape(len(batters), 2)
+    return combine(B_sides, B_hands, B_power, P_sides, P_hands)
+
+#Cache shared by everything in this process. In memory only
+matchups = matchup_cache()
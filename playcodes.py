@@ -0,0 +1,68 @@
+import warnings
+from cards import check_cell
+
+#Cache of parsed play codes, so identical cells share one tuple
+_parsed = {}
+
+def parse(code):
+    """Parses a play string into a play tuple.
+
+    The string is split on '_', and all numeric elements are converted to int (e.g. 'FB_9_B?' becomes ('FB', 9, 'B?')). The first element is always the name of the play, and the remaining elements are the arguments to its game_state, box_score, scorecard and scoreboard functions.
+
+    Args:
+        code (str): Play string from a card or the fielding chart.
+
+    Returns:
+        tuple: Play tuple.
+    """
+    try:
+        return _parsed[code]
+    except KeyError:
+        pass
+
+    play = tuple(int(i) if i.isdigit() else i for i in code.split('_'))
+    _parsed[code] = play
+    return play
+
+def tokenize_cell(cell):
+    """Parses a card or fielding chart cell.
+
+    Args:
+        cell (str or list): Play string, list [n, a, b] giving play a on a roll of 1-n and play b otherwise, or one-sided list [n, a] with no play above n.
+
+    Returns:
+        tuple: Play tuple, or (n, play a, play b) for split cells, with play b None for one-sided splits. Split cells can be recognized by their first element being an int.
+    """
+    if isinstance(cell, list):
+        return (cell[0], parse(cell[1]), parse(cell[2]) if len(cell) == 3 else None)
+    return parse(cell)
+
+def tokenize_card(card, name = None):
+    """Parses all cells of one side of a batter or pitcher card.
+
+    Malformed cells, as found by cards.check_cell, are skipped with a warning naming them, so they can be fixed in the card data. They are None in the result, and game.PA rolls again when it lands on one. One-sided d20 splits are kept, with a warning, and game.PA rolls again only on a d20 above their range.
+
+    Args:
+        card (dict): Card side, keyed by column number. Any 'pow' key is ignored.
+        name (str, optional): Name of the card side, used in warnings.
+
+    Returns:
+        dict: Tuple of 11 tokenized cells (or None) for the dice sums 2-12, keyed by column number.
+    """
+    plays = {}
+    for col, cells in card.items():
+        if col == 'pow':
+            continue
+        column = []
+        for e_roll, cell in enumerate(cells):
+            try:
+                check_cell(cell)
+            except ValueError as error:
+                warnings.warn('Skipping malformed cell of %s, column %s, roll %d: %s' % (name, col, e_roll + 2, error), stacklevel = 2)
+                column.append(None)
+                continue
+            if isinstance(cell, list) and len(cell) == 2:
+                warnings.warn('One-sided d20 split of %s, column %s, roll %d: %s. Rolls above %d are rolled again' % (name, col, e_roll + 2, cell, cell[0]), stacklevel = 2)
+            column.append(tokenize_cell(cell))
+        plays[col] = tuple(column)
+    return plays
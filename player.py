@@ -1,7 +1,7 @@
-import json
-import matplotlib.pyplot as plt
 import numpy as np
 import re
+from playcodes import tokenize_card
+from cardstore import card_store
 
 def string_converter_1(string):
     """Converts play string to human readable equivalent.
@@ -151,9 +151,8 @@ def string_converter_2(string):
 
     return result,kwargs
 
-#Obtain data for players
-with open("players.json", mode="r", encoding="utf-8") as read_file:
-    player_data = json.load(read_file)
+#Card store for player data. Cards are read from disk as they are looked up, importing players.json on first use
+player_data = card_store()
 
 #Class for batters
 class batter(): 
@@ -169,19 +168,22 @@ class batter():
         steal: Stealing ability of the batter
         field: Fielding data of the batter
         batting: Batting data of the batter
+        batting_plays: Batting data of the batter, parsed into play tuples
+        columns_hash: Hash of the hand and batting data, computed by matchup.play_hash on first use. None until then, and again whenever the card is rebuilt
     """
-    def __init__(self, name = None):
+    def __init__(self, name = None, data = None):
         """Initializes the batter class.
 
         Args:
             name (str): Name of batter.
+            data (dict, optional): Card data in the format of players.json. Default is the card of the player in the card store.
 
         Raises:
             ValueError: If player is not a batter.
         """
         self.name = name if name is not None else None #Name
         
-        dic = player_data[self.name]
+        dic = data if data is not None else player_data[self.name]
         self.type = dic['type'] #Batter or pitcher
         if self.type != 'B':
             raise ValueError("This is not a batter card")
@@ -193,10 +195,13 @@ class batter():
         self.field = {int(k): v for k, v in dic['fielding'].items()} #Fielding data
         self.batting = {'L': {int(k) if k != "pow" else k: v for k, v in dic["batting"]["L"].items()},
                         'R': {int(k) if k != "pow" else k: v for k, v in dic["batting"]["R"].items()}} #Batting Data
+        self.batting_plays = {hand: tokenize_card(self.batting[hand], '%s vs %s' % (self.name, hand)) for hand in ['L', 'R']} #Parsed batting data
+        self.columns_hash = None #Hash of hand and batting data, set by matchup.play_hash
     
     def display(self):
         """Function for depicting batter cards.
         """
+        import matplotlib.pyplot as plt #Only imported when needed, so headless games start without it
         #Create figure, axis
         fig = plt.figure(figsize = np.array([6,2.875])*1.25)
         ax = fig.add_subplot()
@@ -427,19 +432,22 @@ class pitcher():
         endurance_R: Relief endurance of the pitcher
         tired: Tired status of the pitcher
         pitching: Pitching data of the pitcher
+        pitching_plays: Pitching data of the pitcher, parsed into play tuples
+        columns_hash: Hash of the hand and pitching data, computed by matchup.play_hash on first use. None until then, and again whenever the card is rebuilt
     """
-    def __init__(self, name = None):
+    def __init__(self, name = None, data = None):
         """Initializes the pitcher class.
 
         Args:
             name (str): Name of pitcher.
+            data (dict, optional): Card data in the format of players.json. Default is the card of the player in the card store.
 
         Raises:
             ValueError: If player is not pitcher.
         """
         self.name = name if name is not None else None #Name
         
-        dic = player_data[self.name]
+        dic = data if data is not None else player_data[self.name]
         self.type = dic['type'] #Batter or Pitcher
         if self.type != 'P':
             raise ValueError("This is not a pitcher card")
@@ -455,10 +463,13 @@ class pitcher():
         self.tired = False #Tired status
         self.pitching = {'L': {int(k) if k != "pow" else k: v for k, v in dic["pitching"]["L"].items()},
                         'R': {int(k) if k != "pow" else k: v for k, v in dic["pitching"]["R"].items()}} #Pitching
+        self.pitching_plays = {hand: tokenize_card(self.pitching[hand], '%s vs %s' % (self.name, hand)) for hand in ['L', 'R']} #Parsed pitching data
+        self.columns_hash = None #Hash of hand and pitching data, set by matchup.play_hash
         
     def display(self):
         """Function for depicting pitcher cards.
         """
+        import matplotlib.pyplot as plt
 
         #Create figure, axis
         fig = plt.figure(figsize = np.array([6,2.875])*1.25)
@@ -0,0 +1,231 @@
+import json
+import time
+
+#Histogram buckets are powers of two of nanoseconds: bucket i counts latencies in [2**(i-1), 2**i), bucket 0 counts 0
+n_buckets = 40
+
+#Stages of game.PA, in order
+stages = ['dice', 'card', 'X', 'WP/PB', 'state', 'box_score', 'scoreboard', 'scorecard', 'inning']
+
+def play_token(result):
+    """Name of a play tuple as used for counters, e.g. 'FB_9_B?' for ('FB', 9, 'B?').
+
+    Args:
+        result (tuple): Play tuple.
+
+    Returns:
+        str: Elements of the play joined by '_'.
+    """
+    return '_'.join(str(element) for element in result)
+
+class histogram():
+    """Latency histogram with power of two buckets. Adding a latency is one bit_length and two additions.
+
+    Attributes:
+        counts (list of int): Count of latencies in each bucket.
+        total (int): Sum of all latencies, in nanoseconds.
+        max (int): Largest latency, in nanoseconds.
+    """
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        """Initialization function for histogram.
+        """
+        self.counts = [0] * n_buckets
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        """Adds a latency.
+
+        Args:
+            ns (int): Latency in nanoseconds.
+        """
+        self.counts[min(ns.bit_length(), n_buckets - 1)] += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    @property
+    def count(self):
+        """int: Number of latencies added."""
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper edge of the bucket it falls in.
+
+        Args:
+            q (float): Quantile, from 0 to 1.
+
+        Returns:
+            int: Upper bound of the quantile in nanoseconds, or 0 if the histogram is empty.
+        """
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(2 ** i, self.max)
+        return 0
+
+    def merge(self, other):
+        """Adds the latencies of another histogram.
+
+        Args:
+            other (histogram): Histogram to add.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self):
+        """Summary of the histogram.
+
+        Returns:
+            dict: 'count', 'total_ns', 'mean_ns', 'p50_ns', 'p90_ns', 'p99_ns', 'max_ns' and 'buckets' (the counts).
+        """
+        count = self.count
+        return {'count': count, 'total_ns': self.total, 'mean_ns': self.total / count if count else 0,
+                'p50_ns': self.quantile(0.5), 'p90_ns': self.quantile(0.9), 'p99_ns': self.quantile(0.99), 'max_ns': self.max,
+                'buckets': list(self.counts)}
+
+    def __getstate__(self):
+        return (self.counts, self.total, self.max)
+
+    def __setstate__(self, state):
+        self.counts, self.total, self.max = state
+
+class play_profiler():
+    """Counters and latency histograms of plate appearances, kept by stage of game.PA and by play.
+
+    Given to game as profile, game.PA asks start whether to time the plate appearance, marks the end of each stage with lap if so, and ends with end. Every plate appearance is counted, but only one in sample is timed, so profiling can be left on in long runs.
+
+    Stages are listed in stages: 'dice' (rolling for the plate appearance and looking up the card, including the split die and any rolls again), 'card' (results of tired pitchers), 'X' (game_state.X), 'WP/PB' (game_state.WP and PB), 'state' (the game_state play method), 'box_score', 'scoreboard', 'scorecard' and 'inning' (event recording, lineup and end of inning bookkeeping).
+
+    Plays are counted and timed as whole plate appearances. A plate appearance through an X chance or a wild pitch or passed ball is also counted under its X chance (e.g. ('X', 6)) or 'WP'/'PB', so those paths can be compared with the plays they end in. Plays are kept by play tuple, and named by play_token in snapshots.
+
+    Attributes:
+        sample (int): One in this many plate appearances is timed.
+        stages (dict): histogram of each stage over timed plate appearances, keyed by stage name.
+        counts (dict): Number of plate appearances through each play, keyed by play tuple, X chance or 'WP'/'PB'.
+        plays (dict): histogram of timed plate appearances through each play, keyed as counts.
+    """
+    def __init__(self, sample = 16):
+        """Initialization function for play_profiler.
+
+        Args:
+            sample (int, default 16): Time one in this many plate appearances. 1 times all of them.
+        """
+        self.sample = sample
+        self.stages = {stage: histogram() for stage in stages}
+        self.counts = {}
+        self.plays = {}
+        self._countdown = 1
+        self._start = 0
+        self._last = 0
+
+    def start(self):
+        """Marks the start of a plate appearance.
+
+        Returns:
+            bool: Whether or not this plate appearance is timed.
+        """
+        self._countdown -= 1
+        if self._countdown:
+            return False
+        self._countdown = self.sample
+        self._start = self._last = time.perf_counter_ns()
+        return True
+
+    def lap(self, stage):
+        """Marks the end of a stage of a timed plate appearance, timing it from the end of the previous one.
+
+        Args:
+            stage (str): Stage name, one of stages.
+        """
+        now = time.perf_counter_ns()
+        self.stages[stage].add(now - self._last)
+        self._last = now
+
+    def end(self, timed, *keys):
+        """Marks the end of a plate appearance, counting it under each of its plays.
+
+        Args:
+            timed (bool): Whether or not the plate appearance is timed, as returned by start. If so, it's timed under each of its plays.
+            *keys: Play tuple of the plate appearance, then its X chance and 'WP'/'PB' if any.
+        """
+        counts = self.counts
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+        if timed:
+            self.lap('inning')
+            ns = self._last - self._start
+            for key in keys:
+                try:
+                    self.plays[key].add(ns)
+                except KeyError:
+                    self.plays[key] = histogram()
+                    self.plays[key].add(ns)
+
+    def reset(self):
+        """Clears all counters.
+        """
+        self.__init__(self.sample)
+
+    def merge(self, other):
+        """Adds the counters of another profiler, e.g. one returned by a worker process.
+
+        Args:
+            other (play_profiler): Profiler to add.
+        """
+        for stage, hist in other.stages.items():
+            self.stages.setdefault(stage, histogram()).merge(hist)
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        for key, hist in other.plays.items():
+            self.plays.setdefault(key, histogram()).merge(hist)
+
+    def snapshot(self):
+        """Current counters, as plain data.
+
+        Returns:
+            dict: 'sample', then 'stages' and 'plays', each a dict of histogram summaries as given by histogram.summary. The count of each summary is the number of timed plate appearances. Plays are keyed by play_token, with the number of all plate appearances added as 'plate_appearances', and sorted by estimated total time, largest first.
+        """
+        plays = {}
+        for key, count in self.counts.items():
+            row = self.plays[key].summary() if key in self.plays else histogram().summary()
+            row['plate_appearances'] = count
+            plays[key if type(key) is str else play_token(key)] = row
+        order = sorted(plays, key = lambda token: plays[token]['mean_ns'] * plays[token]['plate_appearances'], reverse = True)
+        return {'sample': self.sample,
+                'stages': {stage: hist.summary() for stage, hist in self.stages.items()},
+                'plays': {token: plays[token] for token in order}}
+
+    def save(self, path):
+        """Writes a snapshot to a JSON file.
+
+        Args:
+            path (str): Path of the file.
+        """
+        with open(path, mode = 'w', encoding = 'utf-8') as write_file:
+            json.dump(self.snapshot(), write_file, indent = 2)
+
+    def report(self, top = 15):
+        """Table of the stages and the plays taking the most time.
+
+        Args:
+            top (int, default 15): Number of plays listed.
+
+        Returns:
+            str: Report, one line per stage or play with the number of plate appearances, estimated share of time, and mean and quantiles of timed plate appearances in microseconds.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for title, rows in [('Stage', list(snapshot['stages'].items())), ('Play', list(snapshot['plays'].items())[:top])]:
+            totals = [row['mean_ns'] * row.get('plate_appearances', row['count']) for key, row in rows]
+            total = sum(totals) or 1
+            lines.append('%-14s %9s %7s %9s %9s %9s %9s' % (title, 'PAs', 'time', 'mean us', 'p50 us', 'p99 us', 'max us'))
+            for (key, row), row_total in zip(rows, totals):
+                lines.append('%-14s %9d %6.1f%% %9.2f %9.2f %9.2f %9.2f' % (key, row.get('plate_appearances', row['count'] * self.sample), 100 * row_total / total,
+                                                                         row['mean_ns'] / 1e3, row['p50_ns'] / 1e3, row['p99_ns'] / 1e3, row['max_ns'] / 1e3))
+        return '\n'.join(lines)
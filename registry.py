@@ -0,0 +1,153 @@
+from player import batter, pitcher, player_data
+
+class player_registry():
+    """Interned cache of player cards. Each card is built once per process and shared by every game_state, box_score and scorecard, and by every game of a batch run.
+
+    Cards are keyed by their id in the card store, so cards of the same player from different seasons or teams are told apart. Players can be given by card id, by (name, team, season), or by name alone. A name, or a key leaving out the team or season, is resolved to the matching card from the latest season the first time it's used, and to that same card afterwards.
+
+    Cards are shared, so per-game changes to a card (e.g. a pitcher's tired status) are seen by every game using it.
+
+    Attributes:
+        store (card_store): Card store the cards are read from.
+        batters (dict): batter objects built so far, keyed by card id.
+        pitchers (dict): pitcher objects built so far, keyed by card id.
+        keys (dict): Card id of each name or (name, team, season) resolved so far.
+        cards (list): Every card given an integer id, indexed by id.
+        ids (dict): Integer id of each card in cards, keyed by card.
+    """
+    def __init__(self, store = None):
+        """Initialization function for player_registry.
+
+        Args:
+            store (card_store, optional): Card store. Default is the store of player.py.
+        """
+        self.store = store if store is not None else player_data
+        self.batters = {}
+        self.pitchers = {}
+        self.keys = {}
+        self.cards = []
+        self.ids = {}
+
+    def card_id(self, key):
+        """Finds the card store id of a player's card.
+
+        Args:
+            key (int, str or tuple): Card id, player name, or (name, team, season) with None for any team or season.
+
+        Returns:
+            int: Id of the card.
+
+        Raises:
+            KeyError: If no card matches.
+        """
+        if type(key) is int:
+            return key
+        try:
+            return self.keys[key]
+        except KeyError:
+            self.keys[key] = self.store.card_id(key) if type(key) is str else self.store.card_id(*key)
+            return self.keys[key]
+
+    def player_id(self, card):
+        """Gets the integer id of a card, giving it one on first use. Ids are only valid within this process.
+
+        Args:
+            card (batter or pitcher): Player card.
+
+        Returns:
+            int: Id of the card.
+        """
+        try:
+            return self.ids[card]
+        except KeyError:
+            self.ids[card] = len(self.cards)
+            self.cards.append(card)
+            return self.ids[card]
+
+    def card(self, player_id):
+        """Gets the card with an integer id.
+
+        Args:
+            player_id (int): Id of the card, as given by player_id.
+
+        Returns:
+            batter or pitcher: Player card.
+        """
+        return self.cards[player_id]
+
+    def _build(self, cards, kind, key):
+        """Gets a card from one of the caches, building it from the store on first use.
+        """
+        card_id = self.card_id(key)
+        try:
+            return cards[card_id]
+        except KeyError:
+            name = self.store.key(card_id)[0]
+            card = kind(name, self.store.card(card_id))
+            card.card_id = card_id
+            cards[card_id] = card
+            return card
+
+    def batter(self, key):
+        """Gets the batter card of a player, building it on first use.
+
+        Args:
+            key (int, str or tuple): Card id, name, or (name, team, season) of the batter, as taken by card_id.
+
+        Returns:
+            batter: Shared batter card.
+        """
+        return self._build(self.batters, batter, key)
+
+    def pitcher(self, key):
+        """Gets the pitcher card of a player, building it on first use.
+
+        Args:
+            key (int, str or tuple): Card id, name, or (name, team, season) of the pitcher, as taken by card_id.
+
+        Returns:
+            pitcher: Shared pitcher card.
+        """
+        return self._build(self.pitchers, pitcher, key)
+
+    def resolve(self, positions, lineups = None):
+        """Converts positions and lineups given by player name or position number into cards.
+
+        Args:
+            positions (list of player): A list of shape (teams,10) indicating the players at each position for each team (index 1 is the pitcher, 0 is DH), usually the two teams of a game. May include batter/pitcher classes, or card ids, str of player names or (name, team, season) tuples, which are replaced in place by shared cards.
+            lineups (list, optional): List of shape (teams,9) giving lineups for each team. May be either a list of batter, or a list of int describing the position played by each lineup spot. Default is in increasing order of position number (e.g. DH, C, 1B, etc.)
+
+        Returns:
+            list of list of player: positions, with every player converted to a card.
+            list of list of batter: lineup of each team.
+        """
+
+        #Convert card ids, names and keys in positions to batter or pitcher class
+        for j in range(len(positions)):
+            for i in range(10):
+                if type(positions[j][i]) in (int, str, tuple):
+                    if i == 1: positions[j][i] = self.pitcher(positions[j][i])
+                    else: positions[j][i] = self.batter(positions[j][i])
+
+                #Ensure no non-player elements were provided.
+                assert isinstance(positions[j][i], pitcher) or isinstance(positions[j][i], batter)
+
+        #Set lineup
+        if lineups is not None:
+            try: #If lineup was provided by position number
+                lineup = [[side[i] for i in order] for side, order in zip(positions, lineups)]
+            except TypeError: #If lineup was provided
+                lineup = lineups
+
+                #Ensure all players are of batter class and are listed in positions
+                for i in range(len(positions)):
+                    for j in range(9):
+                        assert isinstance(lineups[i][j], batter)
+                        assert lineups[i][j] in positions[i]
+        else: #Default
+            lineup = [[side[i] for i in [0,2,3,4,5,6,7,8,9]] for side in positions]
+
+        return positions, lineup
+
+#Registry shared by everything in this process
+registry = player_registry()
@@ -1,27 +1,105 @@
 from dice import diceroll_20
 
-def runner_advancement(chance):
+#Send decisions a policy can be asked to make, set as game_state.decision: play, then the base the runner starts from.
+#'S_2' runner on second scoring on a single, 'S_1' runner on first going to third on a single, 'D_1' runner on first scoring on a double,
+#'FB_3' runner on third tagging up on a 'B?' flyball, 'FB_2' runner on second tagging up to third on a 'B' flyball to right field
+decisions = ['S_2', 'S_1', 'D_1', 'FB_3', 'FB_2']
+
+def quiet(*args, **kwargs):
+    """Event sink which discards everything sent to it. Used in place of print for headless games.
+    """
+    pass
+
+def ask_user(chance, GS = None):
+    """Decision policy which asks the user whether to send the runner.
+
+    Args:
+        chance (int): Number from 1-20 indicating range of successful rolls
+        GS (game_state, optional): Current game state. Unused.
+
+    Returns:
+        bool: Whether or not the runner is sent.
+    """
+    return input('Would you like to send the runner? (%d) ' % chance) == "Y"
+
+def send_always(chance, GS = None):
+    """Decision policy which always sends the runner.
+
+    Args:
+        chance (int): Number from 1-20 indicating range of successful rolls
+        GS (game_state, optional): Current game state. Unused.
+
+    Returns:
+        bool: Always True.
+    """
+    return True
+
+def send_never(chance, GS = None):
+    """Decision policy which never sends the runner.
+
+    Args:
+        chance (int): Number from 1-20 indicating range of successful rolls
+        GS (game_state, optional): Current game state. Unused.
+
+    Returns:
+        bool: Always False.
+    """
+    return False
+
+class send_threshold():
+    """Decision policy which sends the runner whenever the chance of success is high enough. Picklable, so it can be sent to worker processes.
+
+    Attributes:
+        threshold (int): Smallest chance (1-20) for which the runner is sent.
+    """
+    def __init__(self, threshold):
+        """Initialization function for send_threshold.
+
+        Args:
+            threshold (int): Smallest chance (1-20) for which the runner is sent.
+        """
+        self.threshold = threshold
+
+    def __call__(self, chance, GS = None):
+        """Decides whether to send the runner.
+
+        Args:
+            chance (int): Number from 1-20 indicating range of successful rolls
+            GS (game_state, optional): Current game state. Unused.
+
+        Returns:
+            bool: Whether or not the runner is sent.
+        """
+        return chance >= self.threshold
+
+def runner_advancement(chance, policy = None, GS = None, log = print, dice = None):
     """Function for executing conditional runner advancement.
 
     Args:
         chance (int): Number from 1-19 indicating range of successful rolls
+        policy (function, optional): Decision policy called with chance and GS, returning whether to send the runner. Default asks the user.
+        GS (game_state, optional): Current game state, passed on to the policy.
+        log (function, default print): Event sink for dice rolls and outcomes.
+        dice (dice_source, optional): Source of the roll. Default uses the global numpy random state.
 
     Returns:
-        int: Number indicating whether runner was out (0), held (1), or safe (2) 
+        int: Number indicating whether runner was out (0), held (1), or safe (2)
     """
 
+    policy = policy if policy is not None else ask_user
+
     #Ask if runner would like to be sent:
-    if input('Would you like to send the runner? (%d) ' % chance) == "Y": #If yes
-        
+    if policy(chance, GS): #If yes
+
         #Roll; print Out, return 0 if out, else print safe, return 1
-        res = diceroll_20()
-        print(res)
+        res = diceroll_20(dice)
+        log(res)
         if res > chance:
-            print("Out!")
+            log("Out!")
             return 0
         else:
-            print("Safe!")
+            log("Safe!")
             return 2
-        
+
     else: #If no
         return 1
\ No newline at end of file
@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import markov
+from game import game_state
+from registry import registry
+from running import decisions, quiet
+from transitions import transition_table, safe, out, held
+from winprob import max_diff, n_innings, roster_key, win_table
+
+#Play run for each send decision. The fielder only changes the chance of success, not where the runners end up.
+decision_plays = [('S', 7), ('D', 8), ('FB', 8, 'B?'), ('FB', 9, 'B')]
+
+#Index of each decision in the first axis of a table
+decision_index = {decision: i for i, decision in enumerate(decisions)}
+
+#Tables loaded in this process, keyed by path, so unpickled policies share one copy
+_loaded = {}
+
+def decision_outcomes(GS):
+    """Outcomes of every send decision from every base-out state, found by compiling the transition table of the decision plays.
+
+    Args:
+        GS (game_state): Game state the plays are run on. Its runners, dice, policy and score are overwritten.
+
+    Returns:
+        dict: Keyed by (decision, outs, bases) as seen by the policy when it's asked. Each value is a list of (new base-out state, runs scored after the decision) if the runner is sent and safe, if sent and out, and if held. The end of the inning is state 24.
+    """
+    table = transition_table(GS, decision_plays)
+    outcomes = {}
+    for p in range(len(table.plays)):
+        for state in range(markov.n_states):
+            if table.decision[p, state] < 0: #No decision from this state
+                continue
+            outs, bases, before = table.seen[p, state].tolist()
+            outcomes[(decisions[table.decision[p, state]], outs, bases)] = [(int(table.new_state[p, state, row]), int(table.runs[p, state, row]) - before)
+                                                                               for row in [safe, out, held]]
+    return outcomes
+
+def _after(table, half, new_state, runs):
+    """Home team's win probability once a plate appearance ends, following the end-of-game and walk-off rules of game.PA.
+
+    Args:
+        table (numpy.ndarray): Win probability table, as given by win_table.
+        half (int): 0 for the top, 1 for the bottom.
+        new_state (int): Base-out state the plate appearance ends in, or 24 for the end of the half inning.
+        runs (int): Runs scored.
+
+    Returns:
+        numpy.ndarray: Array of shape (n_innings, 2 * max_diff + 1, 9, 9). Element [inning - 1, score difference, batter, other] is the win probability when the score difference was the given one before the runs, and batter was up.
+    """
+    n_diff = 2 * max_diff + 1
+    last = n_innings - 1
+    diff = np.clip(np.arange(n_diff) + (runs if half == 1 else -runs), 0, n_diff - 1)
+
+    if new_state < markov.n_states:
+        #Same half inning, with the next batter up
+        values = np.roll(table[:, half, new_state][:, diff], -1, axis = 2)
+        if half == 1:
+            values[last, diff > max_diff] = 1 #Walk-off
+    else:
+        #Start of the next half inning, with the other team up and the next batter due up
+        rows = np.arange(n_innings) if half == 0 else np.minimum(np.arange(n_innings) + 1, last)
+        values = np.roll(table[rows, 1 - half, 0][:, diff].transpose(0, 1, 3, 2), -1, axis = 2)
+        if half == 0:
+            values[last, diff > max_diff] = 1 #Home team leads after the top of the ninth or later
+        else:
+            values[last, diff < max_diff] = 0 #Away team leads after the bottom of the ninth or later
+
+    values[:, diff == 0] = 0 #Decided games
+    values[:, diff == n_diff - 1] = 1
+    return values
+
+def thresholds(decision, safe, out, held):
+    """Smallest chance of success for which sending the runner is worth more than holding the runner.
+
+    Args:
+        decision (str): Send decision, one of running.decisions.
+        safe (numpy.ndarray): Value to the batting team if the runner is sent and safe.
+        out (numpy.ndarray): Value if the runner is sent and out. Same shape as safe.
+        held (numpy.ndarray): Value if the runner is held. Same shape as safe.
+
+    Returns:
+        numpy.ndarray: Array of int8 of the same shape as safe, from 1 to 20, or 21 where the runner is never sent.
+    """
+    chance = np.arange(1, 21).reshape((20,) + (1,) * np.ndim(safe))
+    if decision == 'FB_2': #Out only on a 20, held on rolls between chance and 20
+        send = np.where(chance < 20, (chance * safe + out + (19 - chance) * held) / 20, safe)
+    else:
+        send = (chance * safe + (20 - chance) * out) / 20
+    better = send > held + 1e-12
+    return np.where(better.any(axis = 0), better.argmax(axis = 0) + 1, 21).astype(np.int8)
+
+class send_table():
+    """Decision policy which sends the runner when the chance of success is at least the break-even threshold of the situation. Thresholds are precomputed for every decision and state, so deciding is one array lookup.
+
+    Thresholds come from the value of each outcome of a decision (sent and safe, sent and out, or held), under one of two objectives:
+    'win' values states by the win_table of the two lineups, so they depend on the inning, score and lineup spots as well as the outs and bases.
+    'runs' values states by runs scored plus the run expectancy of markov.py, so they only depend on the outs, bases and lineup spot.
+    The values assume later decisions follow policy, so the table is one step of improvement over it.
+
+    Picklable, so it can be sent to worker processes. A table saved to disk is pickled as its path and loaded once per process.
+
+    Attributes:
+        objective (str): 'win' or 'runs'.
+        default (int): Threshold used when the game state doesn't tell the decision, e.g. when called without one.
+        path (str or None): File the thresholds are saved to.
+        table (numpy.ndarray): Array of int8 of shape (len(decisions), n_innings, 2, 3, 8, 2 * max_diff + 1, 9, 9). Element [decision, inning - 1, half, outs, bases, home score - away score + max_diff, batter up, other team's batter due up] is the smallest chance for which the runner is sent, as the game state is when the policy is asked. 21 never sends.
+    """
+    def __init__(self, positions, lineups = None, objective = 'win', policy = None, default = 14, cache = 'winprob'):
+        """Initialization function for send_table. Loads the thresholds from the cache, or computes and saves them.
+
+        Args:
+            positions (list of list of str): List of shape (2, 10) of player names at each position for each team, as taken by game.
+            lineups (list of list of int, optional): List of shape (2, 9) of the position number of each lineup spot. Default is in increasing order of position number.
+            objective (str, default 'win'): 'win' to maximize win probability, or 'runs' to maximize expected runs.
+            policy (function, optional): Send policy assumed for later decisions. Default is the headless default of game.
+            default (int, default 14): Threshold used when the game state doesn't tell the decision.
+            cache (str or None, default 'winprob'): Directory of cached tables, as for win_table. None always computes.
+
+        Raises:
+            ValueError: If objective isn't 'win' or 'runs'.
+        """
+        if objective not in ['win', 'runs']:
+            raise ValueError('Unknown objective %s' % objective)
+        positions = [[name if type(name) is str else name.name for name in side] for side in positions]
+        lineups = [list(side) for side in lineups] if lineups is not None else [[0,2,3,4,5,6,7,8,9], [0,2,3,4,5,6,7,8,9]]
+        self.objective = objective
+        self.default = default
+
+        self.path = os.path.join(cache, '%s_send_%s_%d.npy' % (roster_key(positions, lineups, policy), objective, default)) if cache is not None else None
+        if self.path is not None and os.path.exists(self.path):
+            self.table = _load(self.path)
+            return
+
+        self.table = self.solve(positions, lineups, policy, cache)
+        if self.path is not None:
+            os.makedirs(cache, exist_ok = True)
+            np.save(self.path, self.table)
+            _loaded[self.path] = self.table
+
+    def solve(self, positions, lineups, policy, cache):
+        """Computes the thresholds.
+
+        Args:
+            positions (list of list of str): Player names at each position for each team.
+            lineups (list of list of int): Position number of each lineup spot for each team.
+            policy (function or None): Send policy assumed for later decisions.
+            cache (str or None): Directory of cached win tables.
+
+        Returns:
+            numpy.ndarray: Thresholds, as described in table.
+        """
+        n_diff = 2 * max_diff + 1
+        table = np.full((len(decisions), n_innings, 2, 3, 8, n_diff, 9, 9), self.default, dtype = np.int8)
+        cards, lineup = registry.resolve([list(side) for side in positions], lineups)
+
+        if self.objective == 'win':
+            wins = win_table(positions, lineups, policy, cache).table
+        else:
+            #Expected runs for the rest of the inning by batter up and state, with the end of the inning worth 0
+            expected = []
+            for team in [0,1]:
+                E = markov.markov_model(cards[1 - team], policy).solve(lineup[team])[0]
+                expected.append(np.column_stack([E, np.zeros(9)]))
+
+        outcomes = decision_outcomes(game_state(positions = [list(side) for side in cards], log = quiet))
+        following = (np.arange(9) + 1) % 9
+        for (decision, outs, bases), results in outcomes.items():
+            for half in [0,1]:
+                if self.objective == 'win':
+                    #Win probability of the batting team
+                    values = [_after(wins, half, new_state, runs) for new_state, runs in results]
+                    values = values if half == 1 else [1 - value for value in values]
+                else:
+                    values = [(runs + expected[half][following, new_state])[None, None, :, None] for new_state, runs in results]
+                table[decision_index[decision], :, half, outs, bases] = thresholds(decision, *values)
+        return table
+
+    def __call__(self, chance, GS = None):
+        """Decides whether to send the runner.
+
+        Args:
+            chance (int): Number from 1-20 indicating range of successful rolls
+            GS (game_state, optional): Current game state. Without it, or its decision, the default threshold is used.
+
+        Returns:
+            bool: Whether or not the runner is sent.
+        """
+        if GS is None or GS.decision not in decision_index:
+            return chance >= self.default
+        team = GS.batting_team
+        diff = min(max(GS.score[1] - GS.score[0], -max_diff), max_diff) + max_diff
+        return chance >= self.table[decision_index[GS.decision], min(GS.inning, n_innings) - 1, team, GS.outs, GS.bases, diff,
+                                    GS.lineup_pos[team], GS.lineup_pos[1 - team]]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if self.path is not None:
+            del state['table']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'table' not in state:
+            self.table = _load(self.path)
+
+def _load(path):
+    """Loads a saved table once per process.
+    """
+    if path not in _loaded:
+        _loaded[path] = np.load(path)
+    return _loaded[path]
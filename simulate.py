@@ -0,0 +1,174 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+from game import game
+from dice import dice_source
+from eventlog import event_log, encode_game, game_header
+from stats import stat_table
+
+def play_game(job, stats = None):
+    """Plays one headless game. Used as the unit of work sent to worker processes.
+
+    Args:
+        job (tuple): (teams, positions, lineups, policy, dice, record) where dice is the dice_source for this game, and record is whether or not to record its events.
+        stats (stat_table, optional): Table to accumulate the box score into. If given, the summary has no 'hitters' and 'pitchers'.
+
+    Returns:
+        dict: Summary of the game with keys 'teams', 'result', 'score', 'line_score', 'hitters' and 'pitchers', plus 'frame' (encoded events, as given by eventlog.encode_game) if recording.
+    """
+    teams, positions, lineups, policy, dice, record = job
+
+    #Copy positions, since game converts player names in place
+    positions = [list(positions[0]), list(positions[1])]
+
+    G = game(teams = teams, positions = positions, lineups = lineups, headless = True, policy = policy, dice = dice, record = record, stats = stats)
+    G.game()
+
+    summary = {'teams': G.SB.teams,
+               'result': G.result,
+               'score': list(G.GS.score),
+               'line_score': G.SB.score}
+    if stats is None:
+        summary['hitters'] = G.BS.hitters
+        summary['pitchers'] = G.BS.pitchers
+    if record: #Events are encoded and compressed in the worker
+        summary['frame'] = encode_game(game_header(G), G.events)
+    return summary
+
+def play_batch(batch):
+    """Plays a batch of headless games into one stat_table. Used as the unit of work sent to worker processes in columnar mode.
+
+    Args:
+        batch (tuple): (players, jobs) where players is the player list of the table and jobs are as taken by play_game.
+
+    Returns:
+        list of dict: Game summaries returned by play_game.
+        stat_table: Box score totals of the batch.
+    """
+    players, jobs = batch
+    stats = stat_table(players)
+    return [play_game(job, stats) for job in jobs], stats
+
+def merge(summaries):
+    """Merges game summaries into totals for each team.
+
+    Args:
+        summaries (list of dict): Game summaries returned by play_game, in game order.
+
+    Returns:
+        dict: Keyed by team name. Each team has 'games', 'wins', 'line_score' (total runs by inning plus R, H, E), 'hitters' and 'pitchers' (box score totals by player).
+    """
+    totals = {}
+    for summary in summaries:
+        for side in [0,1]:
+            team = summary['teams'][side]
+            if team not in totals:
+                totals[team] = {'games': 0, 'wins': 0, 'line_score': {}, 'hitters': {}, 'pitchers': {}}
+            total = totals[team]
+
+            total['games'] += 1
+            total['wins'] += summary['result'] == side
+
+            #Add line score. Innings that weren't played are ''
+            for inning, runs in summary['line_score'][side].items():
+                if runs != '':
+                    total['line_score'][inning] = total['line_score'].get(inning, 0) + runs
+
+            #Add box score. Position column of hitters is kept from the first game
+            if 'hitters' not in summary:
+                continue
+            for name, line in summary['hitters'][side].items():
+                if name in total['hitters']:
+                    total['hitters'][name][1:] = [a + b for a, b in zip(total['hitters'][name][1:], line[1:])]
+                else:
+                    total['hitters'][name] = list(line)
+            for name, line in summary['pitchers'][side].items():
+                if name in total['pitchers']:
+                    total['pitchers'][name] = [a + b for a, b in zip(total['pitchers'][name], line)]
+                else:
+                    total['pitchers'][name] = list(line)
+
+    return totals
+
+def simulate_schedule(schedule, seed = None, workers = None, policy = None, events = None, columnar = False):
+    """Plays a schedule of games over a process pool.
+
+    Every game gets its own dice source forked from one master seed, so results are identical whatever the number of workers.
+
+    Args:
+        schedule (list of tuple): Games to play, each as (teams, positions, lineups) in the format taken by game.
+        seed (int, optional): Master seed. Default draws fresh entropy.
+        workers (int, optional): Number of worker processes. 1 plays all games in this process. Default uses all cores.
+        policy (function, optional): Runner send policy for all games. Must be picklable. Default is the headless default of game.
+        events (str, optional): Path of an event log to append the play-by-play of every game to, as in eventlog.py. Game ids continue from the last game in the log, in schedule order.
+
+        columnar (bool, default False): Accumulate box scores into stat_table arrays, merged across workers with one add per batch, instead of per game dicts.
+
+    Returns:
+        list of dict: Game summaries returned by play_game, in schedule order.
+        dict: Merged totals for each team, as returned by merge. In columnar mode, hitters and pitchers are left empty.
+        stat_table: Box score totals over all games. Only returned in columnar mode.
+    """
+
+    #One independent stream per game
+    sources = dice_source(seed).fork(len(schedule))
+    jobs = [(teams, positions, lineups, policy, dice, events is not None) for (teams, positions, lineups), dice in zip(schedule, sources)]
+
+    workers = workers if workers is not None else os.cpu_count()
+    if columnar:
+        #Every table has a row for each player in the schedule, in the same order
+        players = sorted({name if type(name) is str else name.name for teams, positions, lineups in schedule for side in positions for name in side})
+        size = max(1, len(jobs) // (4 * workers))
+        batches = [(players, jobs[i:i + size]) for i in range(0, len(jobs), size)]
+        if workers == 1:
+            results = [play_batch(batch) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                results = list(executor.map(play_batch, batches))
+        summaries = [summary for batch, stats in results for summary in batch]
+        stats = stat_table(players)
+        for batch, part in results:
+            stats.merge(part)
+    elif workers == 1:
+        summaries = [play_game(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            summaries = list(executor.map(play_game, jobs, chunksize = max(1, len(jobs) // (4 * workers))))
+
+    if events is not None:
+        with event_log(events) as log:
+            for summary in summaries:
+                log.append(None, *summary.pop('frame'))
+
+    if columnar:
+        return summaries, merge(summaries), stats
+    return summaries, merge(summaries)
+
+def simulate(positions, lineups = None, n_games = 1000, teams = None, seed = None, workers = None, policy = None, events = None, columnar = False):
+    """Plays the same matchup many times over a process pool.
+
+    Args:
+        positions (list of str): A list of shape (2,10) of player names at each position for each team, as taken by game.
+        lineups (list of int, optional): List of shape (2,9) of positions in batting order for each team.
+        n_games (int, default 1000): Number of games to play.
+        teams (list of str, default ['Away', 'Home']): Name of teams competing.
+        seed (int, optional): Master seed. Default draws fresh entropy.
+        workers (int, optional): Number of worker processes. Default uses all cores.
+        policy (function, optional): Runner send policy. Must be picklable.
+        events (str, optional): Path of an event log to append the play-by-play of every game to.
+        columnar (bool, default False): Accumulate box scores into one stat_table, as in simulate_schedule.
+
+    Returns:
+        list of dict: Game summaries returned by play_game.
+        dict: Merged totals for each team, as returned by merge.
+        stat_table: Box score totals over all games. Only returned in columnar mode.
+    """
+    teams = teams if teams is not None else ['Away', 'Home']
+    lineups = lineups if lineups is not None else [[0,2,3,4,5,6,7,8,9], [0,2,3,4,5,6,7,8,9]]
+    return simulate_schedule([(teams, positions, lineups)] * n_games, seed = seed, workers = workers, policy = policy, events = events, columnar = columnar)
+
+if __name__ == '__main__':
+    pos = [["Eddie Collins","Cy Young",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"],
+           ["Eddie Collins","Christy Mathewson",'Buck Ewing',"Jake Beckley","Bid McPhee","Jimmy Collins","Bobby Wallace","Fred Clarke","Ty Cobb","Jim O'Rourke"]]
+    summaries, totals = simulate(pos, n_games = 1000, seed = 0)
+    for team, total in totals.items():
+        print('%s: %d-%d, %.2f runs per game' % (team, total['wins'], total['games'] - total['wins'], total['line_score']['R'] / total['games']))
@@ -0,0 +1,237 @@
+import numpy as np
+
+#Columns of the hitting and pitching tables. Innings pitched are kept as whole outs.
+hitting_columns = ['AB', 'R', 'H', 'RBI', 'HR', 'BB', 'K']
+pitching_columns = ['outs', 'H', 'R', 'BB', 'K', 'HR']
+B_AB, B_R, B_H, B_RBI, B_HR, B_BB, B_K = range(7)
+P_outs, P_H, P_R, P_BB, P_K, P_HR = range(6)
+
+class stat_table():
+    """Columnar box score accumulator over any number of games. Takes the same updates as box_score, so it can stand in for the box score of a game, but keeps one row of integer counts per player instead of lists keyed by name for each game.
+
+    Updates are appended as flat cell indices and folded into the arrays with one bincount when the arrays are read, or when flush_size updates are pending, so memory stays bounded over long runs. Tables over the same players are merged with one vector add.
+
+    Rows are per player, not per team, so a player appearing for both teams accumulates into one row.
+
+    Attributes:
+        players (list of str): Player name of each row.
+        ids (dict): Row of each player, keyed by name.
+        flush_size (int): Number of pending updates of either table at which they are folded into the arrays.
+        plays (dict): A dictionary connecting play strings to their corresponding functions, as in box_score.
+    """
+    def __init__(self, players, flush_size = 1 << 16):
+        """Initialization function for stat_table.
+
+        Args:
+            players (list of str): Names of every player that may appear. Tables to be merged must be given the same list.
+            flush_size (int, default 65536): Number of pending updates of either table at which they are folded into the arrays.
+        """
+        self.players = list(players)
+        self.flush_size = flush_size
+        self.ids = {name: i for i, name in enumerate(self.players)}
+        self._hitting = np.zeros((len(self.players), len(hitting_columns)), dtype = np.int64)
+        self._pitching = np.zeros((len(self.players), len(pitching_columns)), dtype = np.int64)
+
+        #Pending updates, as flat indices into the arrays
+        self._hit = []
+        self._pitch = []
+
+        self.plays = {"K": self.K, "BB": self.BB, "HBP": self.BB,
+                      "HR": self.HR, "S": self.S, "D": self.D, "T": self.T,
+                      "FB": self.FB, "GB": self.GB, 'lomax': self.lomax, "LO": self.LO, "PO": self.PO, "FO": self.FO,
+                      "E": self.E}
+
+    def flush(self):
+        """Folds pending updates into the arrays.
+        """
+        if self._hit:
+            self._hitting += np.bincount(self._hit, minlength = self._hitting.size).reshape(self._hitting.shape)
+            self._hit = []
+        if self._pitch:
+            self._pitching += np.bincount(self._pitch, minlength = self._pitching.size).reshape(self._pitching.shape)
+            self._pitch = []
+
+    @property
+    def hitting(self):
+        """numpy.ndarray: Array of shape (players, 7) of hitting totals, in the order of hitting_columns."""
+        self.flush()
+        return self._hitting
+
+    @property
+    def pitching(self):
+        """numpy.ndarray: Array of shape (players, 6) of pitching totals, in the order of pitching_columns."""
+        self.flush()
+        return self._pitching
+
+    def _bat(self, batter, column, n = 1):
+        self._hit.extend([self.ids[batter] * len(hitting_columns) + column] * n)
+        if len(self._hit) >= self.flush_size:
+            self.flush()
+
+    def _pitcher(self, pitcher, column, n = 1):
+        self._pitch.extend([self.ids[pitcher] * len(pitching_columns) + column] * n)
+        if len(self._pitch) >= self.flush_size:
+            self.flush()
+
+    def batter_runs(self, batting_team, batter, runs, RBI):
+        """Updates hitting totals when runs score, as box_score.batter_runs.
+
+        Args:
+            batting_team (int): Team batting (0 for away, 1 for home)
+            batter (str): Batter at plate when runs scored
+            runs (list of str): Runners who scored
+            RBI (bool): Whether runs count as RBI for batter or not.
+        """
+        for runner in runs:
+            self._bat(runner, B_R)
+        if RBI:
+            self._bat(batter, B_RBI, len(runs))
+
+    def pitcher_runs(self, batting_team, pitcher, runs, earned = True):
+        """Updates pitching totals when runs score, as box_score.pitcher_runs.
+
+        Args:
+            batting_team (int): Team batting (0 for away, 1 for home)
+            pitcher (str): Current pitcher
+            runs (list of str): Runners who scored
+            earned (bool, optional): Whether or not runs are earned. Current not operational
+        """
+        self._pitcher(pitcher, P_R, len(runs))
+
+    def K(self, batting_team, batter, pitcher):
+        """Updates totals on a strikeout, as box_score.K."""
+        self._bat(batter, B_AB)
+        self._bat(batter, B_K)
+        self._pitcher(pitcher, P_K)
+        self._pitcher(pitcher, P_outs)
+
+    def BB(self, batting_team, batter, pitcher):
+        """Updates totals on a walk, as box_score.BB."""
+        self._bat(batter, B_BB)
+        self._pitcher(pitcher, P_BB)
+
+    def HR(self, batting_team, batter, pitcher):
+        """Updates totals on a homerun, as box_score.HR."""
+        self._bat(batter, B_AB)
+        self._bat(batter, B_H)
+        self._bat(batter, B_HR)
+        self._pitcher(pitcher, P_H)
+        self._pitcher(pitcher, P_HR)
+
+    def S(self, batting_team, batter, pitcher, out):
+        """Updates totals on a single, as box_score.S."""
+        self._bat(batter, B_AB)
+        self._bat(batter, B_H)
+        self._pitcher(pitcher, P_H)
+        if out == 'out':
+            self._pitcher(pitcher, P_outs)
+
+    def D(self, batting_team, batter, pitcher, out):
+        """Updates totals on a double, as box_score.D."""
+        self.S(batting_team, batter, pitcher, out)
+
+    def T(self, batting_team, batter, pitcher):
+        """Updates totals on a triple, as box_score.T."""
+        self.S(batting_team, batter, pitcher, '')
+
+    def FB(self, batting_team, batter, pitcher, typ):
+        """Updates totals on a fly ball, as box_score.FB."""
+        if typ != 'sac':
+            self._bat(batter, B_AB)
+        self._pitcher(pitcher, P_outs, 1 + (typ == 'dp'))
+
+    def GB(self, batting_team, batter, pitcher, typ):
+        """Updates totals on a ground ball, as box_score.GB."""
+        self._bat(batter, B_AB)
+        self._pitcher(pitcher, P_outs, 1 + (typ == 'dp'))
+
+    def lomax(self, batting_team, batter, pitcher, outs):
+        """Updates totals on a lineout into as many outs as possible, as box_score.lomax."""
+        self._bat(batter, B_AB)
+        self._pitcher(pitcher, P_outs, outs)
+
+    def LO(self, batting_team, batter, pitcher):
+        """Updates totals on a lineout, as box_score.LO."""
+        self._bat(batter, B_AB)
+        self._pitcher(pitcher, P_outs)
+
+    def FO(self, batting_team, batter, pitcher):
+        """Updates totals on a flyout, as box_score.FO."""
+        self.LO(batting_team, batter, pitcher)
+
+    def PO(self, batting_team, batter, pitcher):
+        """Updates totals on a popout, as box_score.PO."""
+        self.LO(batting_team, batter, pitcher)
+
+    def E(self, batting_team, batter, pitcher):
+        """Updates totals on an error, as box_score.E."""
+        self._bat(batter, B_AB)
+
+    def add_box_score(self, BS):
+        """Adds the totals of a box_score.
+
+        Args:
+            BS (box_score): Box score of a game.
+        """
+        for team in [0,1]:
+            for name, line in BS.hitters[team].items():
+                self.hitting[self.ids[name]] += line[1:]
+            for name, line in BS.pitchers[team].items():
+                self.pitching[self.ids[name]] += [round(line[0] * 3)] + line[1:]
+
+    def merge(self, other):
+        """Adds the totals of another table over the same players.
+
+        Args:
+            other (stat_table): Table to add.
+        """
+        assert other.players == self.players
+        self.flush()
+        self._hitting += other.hitting
+        self._pitching += other.pitching
+
+    def __getstate__(self):
+        #Bound methods in plays can't be pickled, and pending updates are sent folded in
+        self.flush()
+        return {'players': self.players, 'flush_size': self.flush_size, 'hitting': self._hitting, 'pitching': self._pitching}
+
+    def __setstate__(self, state):
+        self.__init__(state['players'], state['flush_size'])
+        self._hitting = state['hitting']
+        self._pitching = state['pitching']
+
+    def hitting_frame(self, all_players = False):
+        """Hitting totals as a DataFrame.
+
+        Args:
+            all_players (bool, default False): Include players without a plate appearance.
+
+        Returns:
+            pandas.DataFrame: Hitting totals indexed by player name.
+        """
+        import pandas as pd
+        df = pd.DataFrame(self.hitting, index = self.players, columns = hitting_columns)
+        return df if all_players else df[(df != 0).any(axis = 1)]
+
+    def pitching_frame(self, all_players = False):
+        """Pitching totals as a DataFrame, with innings pitched added in box score notation (e.g. 6.2 for 6 2/3 innings).
+
+        Args:
+            all_players (bool, default False): Include players who didn't pitch.
+
+        Returns:
+            pandas.DataFrame: Pitching totals indexed by player name.
+        """
+        import pandas as pd
+        df = pd.DataFrame(self.pitching, index = self.players, columns = pitching_columns)
+        df.insert(0, 'IP', df['outs'] // 3 + df['outs'] % 3 / 10)
+        return df if all_players else df[(df[pitching_columns] != 0).any(axis = 1)]
+
+    def to_parquet(self, path):
+        """Writes the hitting and pitching totals to Parquet files. Requires a Parquet engine for pandas (pyarrow or fastparquet).
+
+        Args:
+            path (str): Path prefix. Tables are written to path + '_hitting.parquet' and path + '_pitching.parquet'.
+        """
+        self.hitting_frame(True).to_parquet(path + '_hitting.parquet')
+        self.pitching_frame(True).to_parquet(path + '_pitching.parquet')
@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+#Modules are imported from the repository root, and read their data files (players.json, Adv_FieldingChart.json) relative to it
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+os.chdir(root)
+
+@pytest.fixture
+def positions():
+    """Player names at each position of the two Deadball-era teams used throughout the examples."""
+    names = ["Eddie Collins", "Cy Young", 'Buck Ewing', "Jake Beckley", "Bid McPhee", "Jimmy Collins", "Bobby Wallace", "Fred Clarke", "Ty Cobb", "Jim O'Rourke"]
+    return [list(names), [names[0], "Christy Mathewson"] + names[2:]]
+
+@pytest.fixture
+def lineups():
+    """Batting orders in increasing order of position number."""
+    return [[0,2,3,4,5,6,7,8,9], [0,2,3,4,5,6,7,8,9]]
@@ -0,0 +1,48 @@
+import os
+import time
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+
+@pytest.fixture(scope = 'module')
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+@pytest.fixture
+def window(app):
+    import UI
+    window = UI.MainWindow()
+    yield window
+    window.close()
+
+def test_cancel_stops_run(window):
+    worker = window.worker
+    worker.cancel.set()
+    finished = []
+    worker.finished.connect(lambda: finished.append(True))
+    worker.run(100, 'PA')
+    assert finished and worker.G.GS.inning == 1 and worker.G.GS.outs == 0
+
+def test_close_mid_game(window, app):
+    #Slow plate appearances down so the game is still going when the window closes
+    G = window.worker.G
+    G.log = G.GS.log = lambda *args: time.sleep(0.002)
+    window.run(100000, 'game')
+    time.sleep(0.2)
+    start = time.perf_counter()
+    window.close()
+    assert time.perf_counter() - start < 5
+    assert window.thread.isFinished()
+    assert G.result is None
+
+def test_ask_send_draws(window, monkeypatch):
+    #The question is asked while the worker holds the lock, and the game is still drawn first
+    G = window.worker.G
+    G.GS.runners = [G.GS.lineup[0][5], None, None]
+    drawn = []
+    monkeypatch.setattr(QtWidgets.QMessageBox, 'question', lambda *args: drawn.append(window.view_field.runners[0].get_text()) or QtWidgets.QMessageBox.Yes)
+    with window.worker.lock:
+        window.ask_send(12)
+    assert drawn == [G.GS.lineup[0][5].name]
+    assert window.policy._answers.get_nowait() is True
@@ -0,0 +1,44 @@
+import benchmark
+
+def result(rate, reference_rate, alloc = 100.0, rss = 40.0):
+    return {'rate': rate, 'wall': 1.0, 'speed': rate / reference_rate, 'alloc': alloc, 'rss': rss, 'unit': 'PA'}
+
+def test_baselines_are_relative(tmp_path):
+    #A machine twice as fast has the same speeds relative to the reference, so nothing is flagged
+    path = str(tmp_path / 'benchmarks.json')
+    slow = {'reference': result(1e6, 1e6, rss = 30.0), 'PA': result(1e5, 1e6)}
+    fast = {'reference': result(2e6, 2e6, rss = 25.0), 'PA': result(2e5, 2e6, rss = 35.0)}
+    benchmark.save_baselines(slow, path)
+    baselines = benchmark.load_baselines(path)
+    assert baselines['PA']['speed'] == 0.1 and baselines['PA']['rss'] == 10.0 and 'reference' not in baselines
+    assert benchmark.regressions(fast, baselines) == []
+
+def test_regressions_flagged(tmp_path):
+    path = str(tmp_path / 'benchmarks.json')
+    benchmark.save_baselines({'reference': result(1e6, 1e6, rss = 30.0), 'PA': result(1e5, 1e6)}, path)
+    baselines = benchmark.load_baselines(path)
+    slower = {'reference': result(1e6, 1e6, rss = 30.0), 'PA': result(5e4, 1e6)}
+    bigger = {'reference': result(1e6, 1e6, rss = 30.0), 'PA': result(1e5, 1e6, alloc = 1000.0, rss = 60.0)}
+    assert len(benchmark.regressions(slower, baselines)) == 1
+    assert len(benchmark.regressions(bigger, baselines)) == 2
+
+def test_saved_baselines_cover_suite():
+    baselines = benchmark.load_baselines()
+    assert set(baselines) == set(benchmark.cases) - {'reference'}
+    assert all(set(base) == {'speed', 'alloc', 'rss', 'unit'} for base in baselines.values())
+
+def test_cases_run():
+    for name in ['reference', 'PA', 'game', 'X']:
+        assert benchmark.cases[name][0](2) == 2
+
+def test_play_parsing_skips_rerolls():
+    #Rolls game.PA would roll again are left out of the cases, and the rest resolve the same on both paths
+    import warnings
+    from player import batter, pitcher
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        B, P = batter('Buck Ewing'), pitcher('Christy Mathewson')
+    assert B.batting_plays['R'][2][6] == (7, ('D', '**'), None)
+    assert benchmark._played(B, P, [2, 8], 7) and not benchmark._played(B, P, [2, 8], 8)
+    timings = benchmark.bench_play_parsing(2000)
+    assert timings['saving'] == timings['legacy'] - timings['tokens']
@@ -0,0 +1,87 @@
+import warnings
+import numpy as np
+import pytest
+import cards
+from player import batter, pitcher
+
+def enumerate_PA(B, P):
+    """Outcome distribution of a plate appearance, found by walking every roll of game.PA through the tokenized cards."""
+    dist = np.zeros(len(cards.outcomes))
+    for column in range(1, 7):
+        for total, weight in zip(range(2, 13), cards.sum_weights):
+            if column < 4:
+                cell = B.batting_plays[P.hand][column][total - 2]
+            else:
+                cell = P.pitching_plays[('L' if P.hand == 'R' else 'R') if B.hand == 'S' else B.hand][column][total - 2]
+            if cell is None: #Malformed, rolled again
+                continue
+            results = [cell[1] if roll <= cell[0] else cell[2] for roll in range(1, 21)] if type(cell[0]) is int else [cell] * 20
+            for result in results:
+                if result is None: #Above a one-sided split, rolled again
+                    continue
+                if result[-1] == '~':
+                    result = ('S', '**') if P.tired else result[:-1]
+                if result[0] == 'HRN':
+                    result = ('HR',) if B.batting[P.hand]['pow'] == 'N' else ('S', '**')
+                dist[cards.outcome_index['_'.join(str(part) for part in result)]] += weight / 6 / 20
+    return dist / dist.sum()
+
+@pytest.fixture(scope = 'module')
+def players():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        batters = [batter(name) for name in ['Ty Cobb', 'George Davis', 'Buck Ewing', 'Eddie Collins', 'Darryl Strawberry']]
+        pitchers = [pitcher(name) for name in ['Cy Young', 'Jacob deGrom']]
+    return batters, pitchers
+
+@pytest.mark.parametrize('tired', [False, True])
+def test_matchup_vector_matches_dice(players, tired):
+    batters, pitchers = players
+    for P in pitchers:
+        P.tired = tired
+        for B in batters:
+            assert cards.matchup_vector(B, P) == pytest.approx(enumerate_PA(B, P), abs = 1e-12)
+        P.tired = False
+
+def test_compiled_columns_weight_dice_sums():
+    column = ['K'] * 5 + ['HR'] + ['K'] * 5
+    split = ['K'] * 5 + [[5, 'S_7', 'BB']] + ['K'] * 5
+    table = cards.compile_columns([column, split, ['FB_9_B_~'] * 11])
+    assert table[0, cards.outcome_index['HR']] == pytest.approx(6 / 36)
+    assert table[1, cards.outcome_index['S_7']] == pytest.approx(6 / 36 * 5 / 20)
+    assert table[1, cards.outcome_index['BB']] == pytest.approx(6 / 36 * 15 / 20)
+    assert table[2, cards.outcome_index['FB_9_B']] == pytest.approx(1)
+    assert cards.compile_columns([column, split, ['FB_9_B_~'] * 11], tired = True)[2, cards.outcome_index['S_**']] == pytest.approx(1)
+
+def test_sample_follows_vector(players):
+    batters, pitchers = players
+    vector = cards.matchup_vector(batters[0], pitchers[0])
+    counts = np.bincount(cards.sample(vector, 200000, np.random.default_rng(0)), minlength = len(vector)) / 200000
+    assert np.abs(counts - vector).max() < 0.005
+
+def test_card_report_small_library():
+    #Batting side vs L: column 1 all HR, column 2 a d20 split, column 3 a fatigue result
+    side = {'1': ['HR'] * 11, '2': [[5, 'S_7', 'BB']] * 11, '3': ['FB_9_B_~'] * 11}
+    data = {'A': {'type': 'B', 'batting': {'L': side, 'R': dict(side, **{'3': [[0]] * 10 + ['K']})}}}
+    rows, report = cards.card_report(data)
+    assert rows == [('A', 'L'), ('A', 'R')]
+    column = {name: i for i, name in enumerate(cards.report_columns)}
+    assert report[0, column['HR']] == pytest.approx(1 / 3)
+    assert report[0, column['S_7']] == report[0, column['1B']] == pytest.approx(1 / 3 * 5 / 20)
+    assert report[0, column['FB_9_B']] == report[0, column['~']] == pytest.approx(1 / 3)
+    #Malformed cells are left out, and the rest scaled up
+    assert report[1, column['K']] == pytest.approx((1 / 36) / (2 + 1 / 36))
+    assert report[:, :len(cards.outcomes)].sum(axis = 1) == pytest.approx([1, 1])
+
+def test_card_report_matches_compiled_cards(players):
+    batters, pitchers = players
+    rows, report = cards.card_report()
+    index = {row: i for i, row in enumerate(rows)}
+    for B in batters:
+        for hand, table in cards.compile_batter(B).items():
+            vector = table.sum(axis = 0)
+            assert report[index[(B.name, hand)], :len(cards.outcomes)] == pytest.approx(vector / vector.sum())
+    for P in pitchers:
+        for hand, table in cards.compile_pitcher(P, False).items():
+            vector = table.sum(axis = 0)
+            assert report[index[(P.name, hand)], :len(cards.outcomes)] == pytest.approx(vector / vector.sum())
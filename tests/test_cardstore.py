@@ -0,0 +1,91 @@
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sqlite3
+import pytest
+from cardstore import card_store
+
+source = os.path.abspath('players.json')
+
+def count_cards(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0], conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+def open_store(path):
+    #Run in a worker: open the store, importing the source on first use
+    return len(card_store(path, source))
+
+@pytest.fixture
+def cards():
+    with open(source, encoding = 'utf-8') as read_file:
+        return json.load(read_file)
+
+def test_lookup(tmp_path, cards):
+    store = card_store(str(tmp_path / 'cards.db'), source)
+    assert len(store) == len(cards)
+    assert store['Ty Cobb'] == cards['Ty Cobb']
+    assert 'Ty Cobb' in store and 'Nobody' not in store
+    with pytest.raises(KeyError):
+        store['Nobody']
+    catchers = {name for id, name, team, season in store.find(position = 2)}
+    assert catchers == {name for name, dic in cards.items() if '2' in (dic['fielding'] if dic['type'] == 'B' else dic['field'])}
+
+def test_reimport_replaces(tmp_path):
+    #Cards without a team or season are replaced in place when imported again, not duplicated
+    path = str(tmp_path / 'cards.db')
+    store = card_store(path, source)
+    ids = store.find()
+    rows = count_cards(path)
+    store.import_json(source)
+    assert store.find() == ids
+    assert count_cards(path) == rows
+    store.import_json(source, team = 'NYG', season = 1905)
+    store.import_json(source, team = 'NYG', season = 1905)
+    assert count_cards(path) == (2 * rows[0], 2 * rows[1])
+    assert len(store.find(team = 'NYG')) == rows[0]
+
+def test_migrates_duplicates(tmp_path):
+    #Stores made under UNIQUE (name, team, season) may hold duplicate team-less cards. The latest copy is kept
+    path = str(tmp_path / 'cards.db')
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+        CREATE TABLE cards (id INTEGER PRIMARY KEY, name TEXT NOT NULL, type TEXT NOT NULL, hand TEXT, team TEXT, season INTEGER, data TEXT NOT NULL, UNIQUE (name, team, season));
+        CREATE TABLE positions (card_id INTEGER NOT NULL REFERENCES cards(id), pos INTEGER NOT NULL);
+        INSERT INTO cards VALUES (1, 'A', 'B', 'R', NULL, NULL, '{"v": 1}'), (2, 'A', 'B', 'R', NULL, NULL, '{"v": 2}');
+        INSERT INTO positions VALUES (1, 3), (2, 4);
+        """)
+    store = card_store(path, None)
+    assert store['A'] == {'v': 2}
+    assert count_cards(path) == (1, 1)
+    with pytest.raises(sqlite3.IntegrityError):
+        with sqlite3.connect(path) as conn:
+            conn.execute("INSERT INTO cards (name, type, data) VALUES ('A', 'B', '{}')")
+
+def test_concurrent_first_import(tmp_path, cards):
+    #Workers opening a new store at once import the source once between them
+    path = str(tmp_path / 'cards.db')
+    with ProcessPoolExecutor(max_workers = 4) as executor:
+        assert list(executor.map(open_store, [path] * 8)) == [len(cards)] * 8
+    assert count_cards(path)[0] == len(cards)
+
+def test_cache_is_bounded(tmp_path, cards):
+    store = card_store(str(tmp_path / 'cards.db'), source, cache_size = 3)
+    names = list(cards)[:5]
+    for name in names:
+        store[name]
+    assert list(store._cache) == names[-3:]
+    store[names[2]]
+    store[names[0]]
+    assert list(store._cache) == [names[4], names[2], names[0]]
+
+def test_lookups_are_copies(tmp_path):
+    #Changing a card that was looked up changes neither the cache nor later lookups
+    store = card_store(str(tmp_path / 'cards.db'), source)
+    card = store['Ty Cobb']
+    card['hand'] = 'X'
+    card['batting']['L']['1'][0] = 'HR'
+    assert store['Ty Cobb'] != card
+    assert store['Ty Cobb']['hand'] != 'X'
+    first = store.find(name = 'Ty Cobb')[0][0]
+    store.card(first)['hand'] = 'X'
+    assert store.card(first)['hand'] != 'X'
@@ -0,0 +1,31 @@
+import numpy as np
+from dice import dice_source, diceroll_6, diceroll_20
+from game import game
+
+def test_rolls_in_range():
+    dice = dice_source(0)
+    d6 = np.array([diceroll_6(dice) for i in range(5000)])
+    d20 = np.array([diceroll_20(dice) for i in range(5000)])
+    assert set(d6[:, 0]) == set(range(1, 7))
+    assert set(d6[:, 1]) == set(range(2, 13))
+    assert set(d20) == set(range(1, 21))
+
+def test_seeded_sources_repeat():
+    a, b = dice_source(5), dice_source(5)
+    assert [a.d6() for i in range(300)] == [b.d6() for i in range(300)]
+    assert [a.d20() for i in range(300)] == [b.d20() for i in range(300)]
+
+def test_forks_repeat_and_differ():
+    forks = dice_source(1).fork(3)
+    again = dice_source(1).fork(3)
+    rolls = [[source.d20() for i in range(50)] for source in forks]
+    assert rolls == [[source.d20() for i in range(50)] for source in again]
+    assert rolls[0] != rolls[1] != rolls[2]
+
+def test_games_repeat_from_seed(positions, lineups):
+    events = []
+    for i in range(2):
+        G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(11), record = True)
+        G.game()
+        events.append(G.events)
+    assert events[0] == events[1]
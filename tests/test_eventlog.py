@@ -0,0 +1,80 @@
+import os
+import pytest
+from dice import dice_source
+from eventlog import encode_game, decode_game, event_log, event_reader, game_header, replay
+from game import game
+
+@pytest.fixture
+def games(positions, lineups):
+    played = []
+    for seed in range(6):
+        G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(seed), record = True)
+        G.game()
+        played.append(G)
+    return played
+
+def test_round_trip(tmp_path, games):
+    path = str(tmp_path / 'events.log')
+    with event_log(path, flush_bytes = 2000) as log:
+        ids = [log.write_game(G) for G in games]
+    reader = event_reader(path)
+    assert list(reader) == ids == list(range(len(games)))
+    for game_id, G in zip(ids, games):
+        header, events = reader[game_id]
+        assert header == game_header(G)
+        assert events == G.events
+
+    #Ids continue after the games already in the log
+    with event_log(path, compress = False) as log:
+        assert log.write_game(games[0]) == len(games)
+    assert event_reader(path)[len(games)][1] == games[0].events
+
+def test_replay_matches_game(games):
+    for G in games:
+        BS, SC, SB = replay(*decode_game(*encode_game(game_header(G), G.events)))
+        assert (BS.hitters, BS.pitchers) == (G.BS.hitters, G.BS.pitchers)
+        assert SC.hitters == G.SC.hitters
+        assert SB.score == G.SB.score
+
+def test_runner_moves(games):
+    #Players moved home are the runs scored, those moved out are the outs made, and those left on a base are the bases after the play
+    for G in games:
+        outs, bases, half = 0, 0, None
+        for event in G.events:
+            if event[:2] != half:
+                outs, bases, half = 0, 0, event[:2]
+            moves = event[19]
+            assert moves[0] != 0
+            assert [move != 0 for move in moves[1:]] == [bool(bases & (1 << base)) for base in range(3)]
+            assert moves.count(4) == len(event[9]) + len(event[11])
+            assert moves.count(5) == event[15] - outs
+            assert sum(1 << (move - 1) for move in moves if 1 <= move <= 3) == event[16]
+            outs, bases = event[15], event[16]
+
+def test_truncated_frame(tmp_path, games):
+    path = str(tmp_path / 'events.log')
+    with event_log(path) as log:
+        for G in games[:3]:
+            log.write_game(G)
+    whole = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(whole - 10)
+
+    with pytest.warns(UserWarning, match = 'cut off'):
+        reader = event_reader(path)
+    assert list(reader) == [0, 1] and reader.truncated > 0
+    assert reader[1][1] == games[1].events
+
+    #Appending drops the cut off frame first
+    with pytest.warns(UserWarning):
+        with event_log(path) as log:
+            assert log.write_game(games[3]) == 2
+    reader = event_reader(path)
+    assert reader.truncated == 0
+    assert reader[2][1] == games[3].events
+
+def test_rejects_unknown_values():
+    with pytest.raises(TypeError):
+        encode_game({}, [(0, 1, 'A', 'B', (1, 2), ('K',), 0, None, '', (), ('K',), (), False, (object(),), (), 1, 0, 0, 0, (5, 0, 0, 0))])
+    with pytest.raises(ValueError):
+        decode_game(b'\x00' * 3, 0)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+import fielding
+from fielding import chance_index, chance_results, chance_vectors, fieldingplays, resolve_chances
+
+def chart_result(pos, rating, E_n, d20, d6, sum2d6):
+    #Lookup of game_state.X, on the play tuples of the chart
+    result = fieldingplays[pos][rating][d20 - 1]
+    if result == ('E',):
+        result = fieldingplays[pos]['E'][E_n][sum2d6 - 2]
+        if type(result[0]) is int:
+            result = result[1] if d6 <= result[0] else result[2]
+    return result
+
+def fielders():
+    #Every position and range rating, each with the lowest and highest error ratings of the chart
+    for pos in range(1, 10):
+        errors = sorted(fieldingplays[pos]['E'])
+        for rating in fieldingplays[pos]:
+            if rating != 'E':
+                for E_n in {errors[0], errors[-1]}:
+                    yield pos, rating, E_n
+
+def test_resolve_matches_chart():
+    dice = np.array(np.meshgrid(np.arange(1, 21), np.arange(1, 7), np.arange(2, 13), indexing = 'ij')).reshape(3, -1)
+    for pos, rating, E_n in fielders():
+        results = resolve_chances(pos, rating, E_n, *dice)
+        expected = [chance_index[chart_result(pos, rating, E_n, *roll)] for roll in dice.T.tolist()]
+        assert results.tolist() == expected, (pos, rating, E_n)
+
+def test_vectors_match_chart():
+    pos, rating, E_n = np.array(list(fielders())).T
+    vectors = chance_vectors(pos, rating, E_n)
+    assert vectors.sum(axis = 1) == pytest.approx(np.ones(len(pos)))
+    for i in range(0, len(pos), 7):
+        expected = np.zeros(len(chance_results))
+        for d20 in range(1, 21):
+            for d6 in range(1, 7):
+                for die1 in range(1, 7):
+                    for die2 in range(1, 7):
+                        expected[chance_index[chart_result(pos[i], rating[i], E_n[i], d20, d6, die1 + die2)]] += 1 / (20 * 6 * 36)
+        assert vectors[i] == pytest.approx(expected, abs = 1e-12)
+
+def test_sample_chances():
+    rng = np.random.default_rng(0)
+    n = 200000
+    E_n = max(fieldingplays[6]['E'])
+    sample = fielding.sample_chances(np.full(n, 6), 3, E_n, rng = rng)
+    frequency = np.bincount(sample, minlength = len(chance_results)) / n
+    vector = chance_vectors(6, 3, E_n)[0]
+    assert np.all(np.abs(frequency - vector) <= 5 * np.sqrt(vector * (1 - vector) / n) + 1e-9)
@@ -0,0 +1,97 @@
+import builtins
+import warnings
+import pytest
+from cards import check_cell, compile_columns
+from dice import dice_source
+from game import game
+from playcodes import tokenize_card
+from player import batter
+from running import runner_advancement, send_always, send_never, send_threshold
+
+class fixed_roll():
+    """Dice source which always rolls the same d20."""
+    def __init__(self, roll):
+        self.roll = roll
+
+    def d20(self):
+        return self.roll
+
+def test_headless_game_never_prompts(positions, lineups, monkeypatch):
+    def no_input(*args):
+        raise AssertionError('headless game asked for input')
+    monkeypatch.setattr(builtins, 'input', no_input)
+    monkeypatch.setattr(builtins, 'print', no_input)
+
+    G = game(positions = positions, lineups = lineups, headless = True, dice = dice_source(0))
+    G.game()
+    assert G.result in [0, 1]
+    assert G.GS.score[G.result] > G.GS.score[1 - G.result]
+    assert G.GS.inning >= 9
+
+def test_send_policies():
+    assert send_always(1) and not send_never(20)
+    assert send_threshold(14)(14) and not send_threshold(14)(13)
+
+def test_runner_advancement():
+    #Out (0) on a roll above the chance, safe (2) otherwise, held (1) if not sent
+    assert runner_advancement(10, send_always, dice = fixed_roll(11), log = lambda *args: None) == 0
+    assert runner_advancement(10, send_always, dice = fixed_roll(10), log = lambda *args: None) == 2
+    assert runner_advancement(10, send_never, dice = fixed_roll(1), log = lambda *args: None) == 1
+
+@pytest.mark.parametrize('cell', ['lomax', 'BB_5_B', 'FB_9_B**', 'GB_8_B?', [7], [7, 'D_**', 'K', 'BB'], [21, 'K', 'BB']])
+def test_malformed_cells_rejected(cell):
+    with pytest.raises(ValueError):
+        check_cell(cell)
+
+def test_malformed_cells_skipped():
+    side = {'pow': 'N', 1: ['lomax'] + ['K'] * 10, 2: [[7, 'D_**']] + ['K_~'] * 10, 3: [[7, 'HR', 'FB_9_B']] + ['GB_6_A+'] * 10}
+    with pytest.warns(UserWarning, match = 'lomax'):
+        plays = tokenize_card(side, 'test card')
+    assert plays[1][0] is None
+    assert plays[2][0] == (7, ('D', '**'), None)
+    assert plays[3][0] == (7, ('HR',), ('FB', 9, 'B'))
+
+    #Skipped cells, and rolls above a one-sided split, carry no probability, as game.PA rolls again on them
+    table = compile_columns([side[1], side[2], side[3]])
+    assert table.sum(axis = 1) == pytest.approx([35 / 36, 35 / 36 + 1 / 36 * 7 / 20, 1])
+
+class script_dice():
+    """Dice source which rolls from fixed lists."""
+    def __init__(self, d6, d20):
+        self.rolls6, self.rolls20 = list(d6), list(d20)
+
+    def d6(self):
+        return self.rolls6.pop(0)
+
+    def d20(self):
+        return self.rolls20.pop(0)
+
+def test_one_sided_split_rolls_again_above_range(positions, lineups, monkeypatch):
+    #Only a d20 above the split's range rolls the plate appearance again. Cards are shared, so the patch is undone after the test
+    G = game(positions = positions, lineups = lineups, headless = True, record = True)
+    monkeypatch.setattr(G.GS.batter, 'batting_plays', {hand: {1: ((7, ('D', '**'), None),) * 11, 2: (('K',),) * 11, 3: (('K',),) * 11} for hand in ['L', 'R']})
+    G.GS.dice = script_dice([[1, 7], [1, 7]], [12, 7])
+    G.PA()
+    assert G.events[-1][10] == ('D', '**') and G.events[-1][6] == 7
+    assert G.GS.dice.rolls6 == [] and G.GS.dice.rolls20 == []
+
+def test_game_rolls_again_on_malformed_cells(positions, lineups):
+    #Eddie Collins' card against right-handed pitchers has a cell with an unknown outcome, and Buck Ewing's a one-sided d20 split
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert None in batter('Eddie Collins').batting_plays['R'][3]
+        assert (7, ('D', '**'), None) in batter('Buck Ewing').batting_plays['R'][2]
+    for seed in range(20):
+        G = game(positions = positions, lineups = lineups, headless = True, dice = dice_source(seed), record = True)
+        G.game()
+        assert all(event[5] is not None and event[10] is not None for event in G.events)
+
+def test_inning_ending_double_play_records_runner_out(positions, lineups, monkeypatch):
+    #The runner forced at second is taken off the bases and recorded out, the runner on second is left on base
+    G = game(positions = positions, lineups = lineups, headless = True, record = True)
+    runners = [G.GS.lineup[0][5], G.GS.lineup[0][6], None]
+    G.GS.runners, G.GS.outs = list(runners), 1
+    monkeypatch.setattr(G.GS.batter, 'batting_plays', {hand: {column: (('GB', 6, 'A'),) * 11 for column in [1, 2, 3]} for hand in ['L', 'R']})
+    G.GS.dice = script_dice([[1, 7]], [])
+    G.PA()
+    assert G.events[-1][15:17] == (3, 0b10) and G.events[-1][19] == (5, 5, 2, 0)
@@ -0,0 +1,22 @@
+import subprocess
+import sys
+import pytest
+
+@pytest.mark.parametrize('module', ['game', 'simulate', 'markov', 'league'])
+def test_headless_import_skips_display(module):
+    #Display dependencies are only imported when something is displayed
+    code = ('import sys, %s\n'
+            'from dice import dice_source\n'
+            'print(sorted(name for name in ["matplotlib", "PIL", "pandas", "tabulate"] if name in sys.modules))') % module
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output = True, text = True, check = True)
+    assert result.stdout.strip() == '[]'
+
+def test_headless_game_skips_display(positions, lineups):
+    code = ('import sys\n'
+            'from game import game\n'
+            'from dice import dice_source\n'
+            'G = game(positions = %r, lineups = %r, headless = True, dice = dice_source(0))\n'
+            'G.game()\n'
+            'print(sorted(name for name in ["matplotlib", "PIL", "pandas", "tabulate"] if name in sys.modules))') % (positions, lineups)
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output = True, text = True, check = True)
+    assert result.stdout.strip() == '[]'
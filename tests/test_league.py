@@ -0,0 +1,74 @@
+from collections import Counter
+import json
+from itertools import combinations
+import pytest
+from league import load_rosters, round_robin, season
+
+@pytest.mark.parametrize('n, games', [(2, 5), (4, 162), (5, 10), (6, 7), (7, 12), (8, 20)])
+def test_round_robin_balanced(n, games):
+    teams = ['T%d' % i for i in range(n)]
+    schedule = round_robin(teams, games)
+    played = Counter(team for game in schedule for team in game)
+    home = Counter(home for away, home in schedule)
+    assert all(played[team] == games for team in teams)
+    assert all(abs(2 * home[team] - games) <= 1 for team in teams)
+    #Every pair meets as often as every other, give or take one
+    meetings = Counter(frozenset(game) for game in schedule)
+    counts = [meetings[frozenset(pair)] for pair in combinations(teams, 2)]
+    assert max(counts) - min(counts) <= 1
+    assert all(away != home for away, home in schedule)
+
+def test_round_robin_unbalanceable():
+    with pytest.raises(ValueError):
+        round_robin(['A', 'B', 'C'], 5)
+    with pytest.raises(ValueError):
+        round_robin(['A'], 2)
+
+@pytest.fixture
+def rosters(positions, lineups):
+    rotation = ["Cy Young", "Christy Mathewson", "Joe McGinnity"]
+    return {team: {'positions': positions[0], 'lineup': lineups[0], 'rotation': rotation[i:] + rotation[:i]}
+            for i, team in enumerate(['A', 'B', 'C', 'D'])}
+
+def test_load_rosters_defaults(tmp_path, positions):
+    path = tmp_path / 'rosters.json'
+    path.write_text(json.dumps({'A': {'positions': positions[0]}}))
+    roster = load_rosters(str(path))['A']
+    assert roster['lineup'] == [0,2,3,4,5,6,7,8,9]
+    assert roster['rotation'] == [positions[0][1]]
+
+def test_starters_rotate(rosters):
+    league = season(rosters, games = 6)
+    starts = {team: [] for team in rosters}
+    for game, pair in zip(league.schedule, league.starters()):
+        for team, starter in zip(game, pair):
+            starts[team].append(starter)
+    for team, pitchers in starts.items():
+        rotation = rosters[team]['rotation']
+        assert pitchers == [rotation[i % len(rotation)] for i in range(6)]
+
+def test_season_standings(rosters):
+    #Results are the same whatever the number of workers, and every game is folded in once
+    one = season(rosters, games = 3)
+    one.play(seed = 1, workers = 1, batch = 2)
+    two = season(rosters, games = 3)
+    calls = []
+    two.play(seed = 1, workers = 2, batch = 2, callback = lambda league: calls.append(league.played))
+    assert one.standings == two.standings
+    assert one.played == two.played == len(one.schedule) == 6
+    assert sorted(calls) == calls and calls[-1] == 6
+    for line in one.standings.values():
+        assert line['W'] + line['L'] == 3
+    assert sum(line['RS'] for line in one.standings.values()) == sum(line['RA'] for line in one.standings.values())
+    table = one.table()
+    assert [team for team, *rest in table] == sorted(one.standings, key = lambda team: (one.standings[team]['W'] - one.standings[team]['L'], one.standings[team]['RS'] - one.standings[team]['RA']), reverse = True)
+    assert table[0][4] == 0
+
+def test_season_lockstep(rosters):
+    #Every game of the schedule is played once, with its starters, and the standings add up
+    league = season(rosters, games = 6)
+    league.play_lockstep(seed = 2)
+    assert league.played == len(league.schedule) == 12
+    for line in league.standings.values():
+        assert line['W'] + line['L'] == 6
+    assert sum(line['RS'] for line in league.standings.values()) == sum(line['RA'] for line in league.standings.values())
@@ -0,0 +1,52 @@
+from math import factorial
+import numpy as np
+import pytest
+from game import game
+import lineup
+import markov
+
+def solved_runs(model, order, innings = 9):
+    #Expected runs per game of one order, from the chain solved directly for it
+    expected, leadoff = model.solve(order)
+    start = np.zeros(len(order))
+    start[0] = 1
+    total = 0
+    for inning in range(innings):
+        total += start @ expected[:, 0]
+        start = start @ leadoff
+    return total
+
+@pytest.fixture
+def defense(positions, lineups):
+    G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True)
+    return G.GS.positions[1]
+
+def test_optimize_matches_solve(defense):
+    #A short roster keeps the search small: every order is returned and checked against the direct solution
+    roster = [defense[i] for i in [0, 2, 3, 4, 5]]
+    results = lineup.optimize(roster, defense, k = factorial(len(roster)), workers = 1)
+    model = markov.markov_model(defense)
+    assert len(results) == factorial(len(roster))
+    totals = [total for order, total in results]
+    assert totals == sorted(totals, reverse = True)
+    for order, total in results[:10] + results[-10:]:
+        assert total == pytest.approx(solved_runs(model, order), abs = 1e-6)
+
+def test_workers_agree(defense):
+    roster = [defense[i] for i in [0, 2, 3, 4, 5]]
+    one = lineup.optimize(roster, defense, k = 5, workers = 1)
+    two = lineup.optimize(roster, defense, k = 5, workers = 2)
+    assert [[B.name for B in order] for order, total in one] == [[B.name for B in order] for order, total in two]
+    assert [total for order, total in one] == pytest.approx([total for order, total in two])
+
+def test_interchangeable_batters_dropped(defense):
+    #Two copies of the same batter give each order twice; only one of each is kept
+    roster = [defense[i] for i in [0, 2, 3, 3]]
+    results = lineup.optimize(roster, defense, k = 100, workers = 1)
+    assert len(results) == factorial(4) // 2
+    assert len({tuple(B.name for B in order) for order, total in results}) == len(results)
+
+def test_rank_is_lexicographic():
+    from itertools import permutations
+    orders = np.array(list(permutations(range(4))))
+    assert list(lineup._rank(orders)) == list(range(factorial(4)))
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from lockstep import alias_tables, lockstep, reference_check
+from running import send_always, send_never
+
+def test_alias_tables_exact():
+    #Each column's chance is its own kept share plus the shares aliased to it
+    rng = np.random.default_rng(0)
+    probabilities = rng.random((6, 11)) * (rng.random((6, 11)) < 0.6)
+    probabilities[:, 0] += 0.1
+    accept, alias = alias_tables(probabilities)
+    n = probabilities.shape[1]
+    for r in range(len(probabilities)):
+        chance = accept[r] / n
+        np.add.at(chance, alias[r], (1 - accept[r]) / n)
+        assert chance == pytest.approx(probabilities[r] / probabilities[r].sum())
+
+def test_seeded_games_repeat(positions, lineups):
+    engine = lockstep(positions, lineups)
+    first, second = engine.play(50, seed = 3), engine.play(50, seed = 3)
+    for key in first:
+        assert np.array_equal(first[key], second[key])
+    assert np.all(first['innings'] >= 9)
+    assert np.all(first['score'][:, 0] != first['score'][:, 1])
+    assert np.array_equal(first['result'], first['score'][:, 1] > first['score'][:, 0])
+    assert first['counts'].sum() == first['plate_appearances'].sum()
+
+def test_matchups_pick_teams(positions, lineups):
+    #A third team with the same cards as the home team plays exactly as it does
+    engine = lockstep([positions[0], positions[1], positions[1]], [lineups[0], lineups[1], lineups[1]])
+    first = engine.play(40, seed = 5, matchups = [[0, 1]] * 40)
+    third = engine.play(40, seed = 5, matchups = [[0, 2]] * 40)
+    assert np.array_equal(first['score'], third['score'])
+    assert np.array_equal(first['counts'][1], third['counts'][2]) and not third['counts'][1].any()
+
+    #Every team can play every other, home or away
+    results = engine.play(60, seed = 5, matchups = [[0, 1], [2, 0], [1, 2]] * 20)
+    assert results['counts'].sum() == results['plate_appearances'].sum() and results['counts'].any(axis = (1, 2)).all()
+    assert np.all(results['score'][:, 0] != results['score'][:, 1])
+    with pytest.raises(ValueError):
+        engine.play(2, matchups = [[0, 0], [0, 1]])
+
+@pytest.mark.parametrize('policy', [None, send_always, send_never])
+def test_reference_check(positions, lineups, policy):
+    #Statistics of lockstep games agree with game.game within the sampling error of both
+    summary = reference_check(positions, lineups, n_games = 1000, policy = policy, seed = 1)
+    for name, value in summary['game'].items():
+        if name in ['error', 'games per second']:
+            continue
+        error = np.hypot(summary['game']['error'][name], summary['lockstep']['error'][name])
+        assert abs(summary['lockstep'][name] - value) < 4 * error, name
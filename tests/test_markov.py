@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from dice import dice_source
+from game import game
+import markov
+
+def test_transitions_match_game(positions, lineups):
+    #Plate appearances played by the game from fixed base-out states, with runners as fast as the batter, follow the chain's transitions
+    G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(0), record = True)
+    model = markov.markov_model(G.GS.positions[1])
+    B = G.GS.lineup[0][3]
+    M, R = model.batter_transitions(B)
+    n = 6000
+    for state in [0, 3, 13, 23]:
+        counts = np.zeros(markov.n_states + 1)
+        runs = 0
+        for i in range(n):
+            GS = G.GS
+            GS.batting_team, GS.inning, GS.score, GS.lineup_pos = 0, 1, [0, 0], [3, 0]
+            GS.outs = state // 8
+            GS.runners = [B if state & (1 << b) else None for b in range(3)]
+            GS.update_pitcher_batter()
+            G.PA()
+            event = G.events[-1]
+            counts[markov.end_of_inning if event[15] >= 3 else event[15] * 8 + event[16]] += 1
+            runs += len(event[9]) + len(event[11])
+        error = np.sqrt(M[state] * (1 - M[state]) / n)
+        assert np.all(np.abs(counts / n - M[state]) <= 4 * error + 1e-9), state
+        assert runs / n == pytest.approx(R[state], abs = 4 * np.sqrt(R[state] / n) + 0.01)
+
+def test_solution_satisfies_chain(positions, lineups):
+    G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True)
+    model = markov.markov_model(G.GS.positions[1])
+    lineup = G.GS.lineup[0]
+    expected, leadoff = model.solve(lineup)
+    speed = int(round(np.mean([B.run for B in lineup])))
+    for i, B in enumerate(lineup):
+        M, R = model.batter_transitions(B, speed = speed)
+        assert expected[i] == pytest.approx(R + M[:, :markov.n_states] @ expected[(i + 1) % 9])
+    assert leadoff.sum(axis = 1) == pytest.approx(np.ones(9))
+    assert markov.run_expectancy(lineup, G.GS.positions[1]).shape == (8, 3)
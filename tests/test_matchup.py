@@ -0,0 +1,89 @@
+import copy
+import os
+import numpy as np
+import pytest
+import cards
+from matchup import matchup_cache, matchup_matrix, play_hash
+from player import batter, pitcher, player_data
+
+@pytest.fixture
+def players(positions):
+    return [batter(name) for name in positions[0][2:6]], [pitcher(positions[0][1]), pitcher(positions[1][1])]
+
+def test_vector_matches_cards(players):
+    batters, pitchers = players
+    cache = matchup_cache()
+    for B in batters:
+        for P in pitchers:
+            for tired in [False, True]:
+                P.tired = tired
+                assert np.allclose(cache.vector(B, P), cards.matchup_vector(B, P))
+            P.tired = False
+    assert cache.misses == len(cache) == 2 * len(batters) * len(pitchers)
+    cache.vector(batters[0], pitchers[0])
+    assert cache.hits == 1
+    assert not cache.vector(batters[0], pitchers[0]).flags.writeable
+
+def test_matrix_matches_cards(players):
+    batters, pitchers = players
+    matrix = matchup_matrix(batters, pitchers)
+    for b, B in enumerate(batters):
+        for p, P in enumerate(pitchers):
+            P.tired = True
+            assert np.allclose(matrix[b, p, 1], cards.matchup_vector(B, P))
+            P.tired = False
+            assert np.allclose(matrix[b, p, 0], cards.matchup_vector(B, P))
+
+def test_cache_is_bounded(players):
+    batters, pitchers = players
+    cache = matchup_cache(maxsize = 3)
+    for B in batters:
+        cache.vector(B, pitchers[0])
+    assert len(cache) == 3
+    assert list(cache._lru)[0][0] == play_hash(batters[1])
+
+def test_edited_card_recomputed(players):
+    #A card rebuilt from changed data after its first lookup gets a new distribution, not the cached one
+    batters, pitchers = players
+    cache = matchup_cache()
+    data = player_data[batters[0].name]
+    before = cache.vector(batter(batters[0].name, data), pitchers[0])
+    for hand in ['L', 'R']:
+        data['batting'][hand]['1'] = ['HR'] * len(data['batting'][hand]['1'])
+    B = batter(batters[0].name, data)
+    after = cache.vector(B, pitchers[0])
+    assert not np.allclose(before, after)
+    assert np.allclose(after, cards.matchup_vector(B, pitchers[0]))
+
+def test_hash_taken_once(players):
+    #The hash is kept on the card, so lookups never hash the columns again
+    batters, pitchers = players
+    B = copy.deepcopy(batters[0])
+    digest = play_hash(B)
+    B.batting = None
+    assert play_hash(B) == digest == B.columns_hash
+    assert batter(B.name).columns_hash is None
+
+def test_store_untouched(players):
+    #Lookups only use the card objects, never the whole card store
+    batters, pitchers = players
+    cached = len(player_data._cache)
+    matchup_cache().vector(batters[0], pitchers[0])
+    assert len(player_data._cache) == cached
+
+def test_file_is_opt_in(tmp_path, players, monkeypatch):
+    batters, pitchers = players
+    monkeypatch.chdir(tmp_path)
+    cache = matchup_cache()
+    cache.vector(batters[0], pitchers[0])
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError):
+        cache.save()
+
+    path = str(tmp_path / 'pairs.npz')
+    cache = matchup_cache(path)
+    expected = [cache.vector(B, pitchers[1]) for B in batters]
+    cache.save()
+    loaded = matchup_cache(path)
+    assert [np.array_equal(loaded.vector(B, pitchers[1]), vector) for B, vector in zip(batters, expected)] == [True] * len(batters)
+    assert loaded.misses == 0
@@ -0,0 +1,32 @@
+import cards
+from fielding import chance_results, fieldingplays
+from game import box_score, game_state, scoreboard, scorecard
+from playcodes import parse, tokenize_cell
+
+def test_parse_types_arguments():
+    assert parse('FB_9_B?') == ('FB', 9, 'B?')
+    assert parse('S_**') == ('S', '**')
+    assert parse('K') == ('K',)
+    assert parse('GB_6_A_~') == ('GB', 6, 'A', '~')
+
+def test_identical_cells_share_one_tuple():
+    assert parse(''.join(['FB_', '8_B'])) is parse('FB_8_B')
+
+def test_tokenize_split_cell():
+    assert tokenize_cell([7, 'HR', 'FB_9_B']) == (7, ('HR',), ('FB', 9, 'B'))
+
+def test_fielding_chart_is_tokenized():
+    for chart in fieldingplays.values():
+        for rating, results in chart.items():
+            for res in (results if rating != 'E' else [res for errors in results.values() for res in errors]):
+                assert type(res) is tuple
+
+def test_every_play_is_dispatched(positions, lineups):
+    #Card outcomes and chance results, with X chances, wild pitches and passed balls resolved on the game state first, and HRN in game.PA
+    results = [parse(outcome) for outcome in cards.outcomes if outcome != 'HRN'] + chance_results
+    plays = {(play[1:] if play[0] in ['WP', 'PB'] else play)[0] for play in results} - {'X'}
+    GS = game_state(positions = [list(side) for side in positions], lineups = lineups)
+    assert plays | {'X', 'WP', 'PB'} <= set(GS.plays)
+    for D in [box_score(positions = [list(side) for side in positions], lineups = lineups),
+              scorecard(positions = [list(side) for side in positions], lineups = lineups), scoreboard()]:
+        assert plays <= set(D.plays)
@@ -0,0 +1,45 @@
+import json
+import pickle
+from dice import dice_source
+from game import game
+from profiling import histogram, play_profiler, stages
+
+def test_histogram():
+    hist = histogram()
+    for ns in [0, 1, 3, 900, 1000, 5000]:
+        hist.add(ns)
+    assert hist.count == 6 and hist.total == 6904 and hist.max == 5000
+    assert hist.quantile(0.5) == 4 and hist.quantile(1) == 5000
+    other = pickle.loads(pickle.dumps(hist))
+    other.merge(hist)
+    assert other.count == 12 and other.counts == [2 * count for count in hist.counts]
+
+def test_profiled_games(positions, lineups):
+    #Every plate appearance is counted under its play, and one in sample is timed through every stage
+    profile = play_profiler(sample = 4)
+    n = 0
+    for seed in range(5):
+        G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(seed), profile = profile, record = True)
+        G.game()
+        n += len(G.events)
+    plays = [key for key in profile.counts if type(key) is tuple and key[0] != 'X']
+    assert sum(profile.counts[key] for key in plays) == n
+    assert profile.stages['dice'].count == n // 4
+    assert profile.stages['state'].count == profile.stages['inning'].count == n // 4
+    assert sum(hist.count for key, hist in profile.plays.items() if key in plays) == n // 4
+
+    snapshot = profile.snapshot()
+    assert set(snapshot['stages']) == set(stages)
+    assert sum(row['plate_appearances'] for token, row in snapshot['plays'].items() if not token.startswith('X_') and token not in ('WP', 'PB')) == n
+    json.dumps(snapshot)
+    assert profile.report().splitlines()[0].startswith('Stage')
+
+def test_merge():
+    a, b = play_profiler(sample = 1), play_profiler(sample = 1)
+    for profile, keys in [(a, [('K',)]), (b, [('K',), ('X', 6)])]:
+        profile.start()
+        profile.lap('dice')
+        profile.end(True, *keys)
+    a.merge(b)
+    assert a.counts == {('K',): 2, ('X', 6): 1}
+    assert a.plays[('K',)].count == 2 and a.stages['dice'].count == 2
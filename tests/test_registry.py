@@ -0,0 +1,56 @@
+from game import game
+from player import batter, pitcher
+from registry import player_registry, registry
+
+def test_cards_are_shared(positions, lineups):
+    #Every game of the process, and its box score and score card, use the same card objects
+    G1 = game(positions = [list(side) for side in positions], lineups = lineups, headless = True)
+    G2 = game(positions = [list(side) for side in positions], lineups = lineups, headless = True)
+    for team in [0, 1]:
+        for a, b in zip(G1.GS.positions[team], G2.GS.positions[team]):
+            assert a is b
+    assert G1.GS.lineup == G2.GS.lineup
+    assert G1.GS.positions[0][1] is registry.pitcher(positions[0][1])
+
+def test_resolve(positions):
+    reg = player_registry()
+    resolved, lineup = reg.resolve([list(side) for side in positions])
+    assert isinstance(resolved[0][1], pitcher) and isinstance(resolved[0][0], batter)
+    assert lineup[0] == [resolved[0][i] for i in [0,2,3,4,5,6,7,8,9]]
+    assert reg.batter(positions[0][0]) is resolved[0][0]
+
+    #Lineups by card are kept as given
+    order = [lineup[0][::-1], lineup[1]]
+    assert reg.resolve(resolved, order)[1] is order
+
+def test_player_ids():
+    reg = player_registry()
+    a, b = reg.batter('Ty Cobb'), reg.batter('Buck Ewing')
+    assert [reg.player_id(a), reg.player_id(b), reg.player_id(a)] == [0, 1, 0]
+    assert reg.card(1) is b
+
+def test_seasons_interned_apart(tmp_path):
+    #Two seasons of one player are two cards, looked up by card id or (name, team, season)
+    import json
+    from cardstore import card_store
+    with open('players.json', encoding = 'utf-8') as read_file:
+        cards = json.load(read_file)
+    later = {'Ty Cobb': dict(cards['Ty Cobb'], run = cards['Ty Cobb']['run'] - 1), 'Cy Young': cards['Cy Young']}
+    path = tmp_path / 'later.json'
+    path.write_text(json.dumps(later))
+    store = card_store(str(tmp_path / 'cards.db'), None)
+    store.import_json('players.json', team = 'DET', season = 1909)
+    store.import_json(str(path), team = 'DET', season = 1910)
+
+    reg = player_registry(store)
+    early, late = reg.batter(('Ty Cobb', 'DET', 1909)), reg.batter(('Ty Cobb', 'DET', 1910))
+    assert early is not late
+    assert late.run == early.run - 1
+    assert reg.batter('Ty Cobb') is late #Latest season
+    assert reg.batter(early.card_id) is early
+    assert store.key(early.card_id) == ('Ty Cobb', 'DET', 1909)
+
+    names = [late.card_id, ('Cy Young', 'DET', 1909), 'Buck Ewing', "Jake Beckley", "Bid McPhee", "Jimmy Collins", "Bobby Wallace", "Fred Clarke", early.card_id, "Jim O'Rourke"]
+    resolved, lineup = reg.resolve([list(names), list(names)])
+    assert resolved[0][0] is late and resolved[0][8] is early and resolved[0][1] is reg.pitcher(('Cy Young', 'DET', 1909))
+    assert resolved[0][1] is not reg.pitcher('Cy Young')
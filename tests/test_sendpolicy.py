@@ -0,0 +1,66 @@
+import pickle
+import numpy as np
+import pytest
+from game import game, game_state
+import markov
+from registry import registry
+from running import quiet
+import sendpolicy
+from sendpolicy import decision_outcomes, send_table, thresholds
+
+@pytest.fixture(scope = 'module')
+def cache(tmp_path_factory):
+    return str(tmp_path_factory.mktemp('winprob'))
+
+def test_thresholds_break_even():
+    #Sent: chance / 20 of 1, else 0. Held: 0.5
+    assert thresholds('S_2', 1., 0., 0.5) == 11
+    assert thresholds('S_2', 1., 0., 1.) == 21
+    #FB_2 is only out on a 20, and held in between
+    assert thresholds('FB_2', 1., 0., 0.5) == 2
+    assert np.array_equal(thresholds('S_2', np.ones(3), np.zeros(3), np.array([0.1, 0.5, 0.9])), [3, 11, 19])
+
+def test_decision_outcomes(positions):
+    outcomes = decision_outcomes(game_state(positions = [list(side) for side in positions], log = quiet))
+    #Single with a runner on second and no outs: scores and leaves the batter on first, thrown out, or held at third
+    assert outcomes[('S_2', 0, 2)] == [(1, 1), (9, 0), (5, 0)]
+    for (decision, outs, bases), (safe, out, held) in outcomes.items():
+        #The runner sent and out costs an out, or ends the inning
+        assert out[0] == markov.end_of_inning or out[0] // 8 == safe[0] // 8 + 1
+        assert safe[1] >= held[1] >= out[1]
+
+def test_runs_thresholds(positions, lineups):
+    #Thresholds for runs only depend on the outs, bases and batter up, and break even on run expectancy
+    policy = send_table(positions, lineups, objective = 'runs', cache = None)
+    table = policy.table[sendpolicy.decision_index['S_2']]
+    assert np.all(table == table[:1, :, :, :, :1, :, :1])
+
+    cards, lineup = registry.resolve([list(side) for side in positions], lineups)
+    E = markov.markov_model(cards[1]).solve(lineup[0])[0]
+    E = np.column_stack([E, np.zeros(9)])
+    (safe, safe_runs), (out, out_runs), (held, held_runs) = decision_outcomes(game_state(positions = [list(side) for side in cards], log = quiet))[('S_2', 1, 2)]
+    for batter in range(9):
+        following = (batter + 1) % 9
+        expected = thresholds('S_2', safe_runs + E[following, safe], out_runs + E[following, out], held_runs + E[following, held])
+        assert table[0, 0, 1, 2, sendpolicy.max_diff, batter, 0] == expected
+
+def test_call_and_pickle(positions, lineups, cache):
+    with pytest.raises(ValueError):
+        send_table(positions, lineups, objective = 'hits', cache = None)
+    policy = send_table(positions, lineups, cache = cache)
+    assert policy(14) and not policy(13)
+
+    #Saved tables are pickled as their path, and loaded once per process
+    data = pickle.dumps(policy)
+    assert len(data) < 1000
+    assert pickle.loads(data).table is policy.table
+    assert np.array_equal(send_table(positions, lineups, cache = cache).table, policy.table)
+
+    G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, policy = policy)
+    G.game()
+    assert G.result in [0, 1]
+    GS = G.GS
+    GS.decision, GS.inning, GS.outs, GS.score = 'S_2', 1, 1, [0, 0]
+    GS.runners = [None, GS.batter, None]
+    threshold = policy.table[sendpolicy.decision_index['S_2'], 0, GS.batting_team, 1, 2, sendpolicy.max_diff, GS.lineup_pos[GS.batting_team], GS.lineup_pos[1 - GS.batting_team]]
+    assert policy(threshold, GS) and (threshold == 1 or not policy(threshold - 1, GS))
@@ -0,0 +1,19 @@
+from simulate import merge, simulate
+
+def test_results_independent_of_workers(positions, lineups):
+    one = simulate(positions, lineups, n_games = 24, seed = 7, workers = 1)
+    two = simulate(positions, lineups, n_games = 24, seed = 7, workers = 2)
+    assert one == two
+
+def test_seeded_runs_repeat_and_differ(positions, lineups):
+    first = simulate(positions, lineups, n_games = 10, seed = 3, workers = 1)[0]
+    assert first == simulate(positions, lineups, n_games = 10, seed = 3, workers = 1)[0]
+    assert [game['score'] for game in first] != [game['score'] for game in simulate(positions, lineups, n_games = 10, seed = 4, workers = 1)[0]]
+
+def test_merge_sums_games(positions, lineups):
+    summaries, totals = simulate(positions, lineups, n_games = 10, seed = 0, workers = 1)
+    assert totals == merge(summaries)
+    for side, team in enumerate(['Away', 'Home']):
+        assert totals[team]['games'] == 10
+        assert totals[team]['wins'] == sum(game['result'] == side for game in summaries)
+        assert totals[team]['line_score']['R'] == sum(game['score'][side] for game in summaries)
@@ -0,0 +1,30 @@
+import copy
+from dice import dice_source
+from game import game
+
+def test_round_trip(positions, lineups):
+    G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(3))
+    for i in range(15):
+        G.PA()
+    snapshot = G.GS.snapshot()
+    assert hash(snapshot) == hash(G.GS.snapshot())
+    runners, batter = list(G.GS.runners), G.GS.batter
+    G.GS.restore(snapshot)
+    assert G.GS.snapshot() == snapshot
+    assert G.GS.batter is batter
+    assert all(a is b for a, b in zip(G.GS.runners, runners))
+
+def test_replay_from_snapshot(positions, lineups):
+    #Restoring a snapshot and rolling the same dice plays the same plate appearances again
+    G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(5), record = True)
+    for i in range(12):
+        G.PA()
+    snapshot, dice = G.GS.snapshot(), copy.deepcopy(G.GS.dice)
+    for i in range(20):
+        G.PA()
+    first = G.events[12:]
+    G.GS.restore(snapshot)
+    G.GS.dice = dice
+    for i in range(20):
+        G.PA()
+    assert G.events[32:] == first
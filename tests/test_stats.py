@@ -0,0 +1,39 @@
+import numpy as np
+from dice import dice_source
+from game import game
+from stats import stat_table
+
+def players_of(positions):
+    return sorted({name for side in positions for name in side})
+
+def test_matches_box_scores(positions, lineups):
+    #Box scores kept in stat tables, one per game and merged, add up to the same totals as the games' own box scores
+    players = players_of(positions)
+    summed = stat_table(players)
+    merged = stat_table(players)
+    for seed in range(10):
+        G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(seed))
+        G.game()
+        summed.add_box_score(G.BS)
+
+        table = stat_table(players)
+        G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(seed), stats = table)
+        G.game()
+        merged.merge(table)
+    assert np.array_equal(merged.hitting, summed.hitting)
+    assert np.array_equal(merged.pitching, summed.pitching)
+    assert merged.hitting.sum() > 0
+
+def test_pending_updates_are_bounded(positions, lineups):
+    players = players_of(positions)
+    bounded = stat_table(players, flush_size = 50)
+    unbounded = stat_table(players, flush_size = 1 << 30)
+    for seed in range(3):
+        for table in [bounded, unbounded]:
+            G = game(positions = [list(side) for side in positions], lineups = lineups, headless = True, dice = dice_source(seed), stats = table)
+            while G.result is None:
+                G.PA()
+                assert len(bounded._hit) < 50 and len(bounded._pitch) < 50
+    assert len(unbounded._hit) > 50
+    assert np.array_equal(bounded.hitting, unbounded.hitting)
+    assert np.array_equal(bounded.pitching, unbounded.pitching)
@@ -0,0 +1,41 @@
+import copy
+import pytest
+from game import game_state
+from lockstep import lockstep
+import markov
+from running import quiet
+from transitions import parity_check, shared_table, transition_table
+
+@pytest.fixture
+def GS(positions):
+    return game_state(positions = [list(side) for side in positions], log = quiet)
+
+def test_unplayable_plays(GS):
+    #Only questionable flyballs to fielders without an arm rating are left out
+    table = transition_table(GS)
+    invalid = [play for play, valid in zip(table.plays, table.valid) if not valid]
+    assert invalid == [('FB', pos, 'B?') for pos in [1, 3, 4, 5, 6]]
+    assert table.valid[table.index[('FB', 8, 'B?')]]
+
+def test_other_errors_raise(GS):
+    #A fielder without a rating at his position is an error in the defense, not a play to skip
+    GS.positions[1] = list(GS.positions[1])
+    GS.positions[1][9] = copy.copy(GS.positions[1][9])
+    GS.positions[1][9].field = {}
+    with pytest.raises(KeyError):
+        transition_table(GS, [('FB', 9, 'B')])
+
+def test_decision_rows(GS):
+    #Questionable flyball with a runner on third and one out: sent and safe scores, sent and out ends the inning, held stays
+    table = transition_table(GS, [('FB', 8, 'B?')])
+    state = 1 * 8 + 4
+    assert table.decision[0, state] >= 0
+    assert list(table.new_state[0, state]) == [16, markov.end_of_inning, 20]
+    assert list(table.runs[0, state]) == [1, 0, 0]
+
+def test_parity_check(positions, lineups):
+    #Entries without a send decision move real runners as the play functions do
+    assert parity_check(positions, lineups) == []
+
+def test_table_is_shared(positions, lineups):
+    assert lockstep(positions, lineups).table is shared_table(None)
@@ -0,0 +1,51 @@
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from game import diamond_image, game, scoreboard
+from views import cell_blitter, field_view, scoreboard_view
+
+def play_innings(SB, innings):
+    for inning in range(1, innings + 1):
+        for team in [0, 1]:
+            SB.inning_start(inning, team)
+            SB.runs(['x'] * (inning % 2), inning, team)
+            SB.H(inning, team)
+
+def test_scoreboard_extra_innings():
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    SB = scoreboard(['A', 'B'])
+    view = scoreboard_view(figure.add_subplot(), SB)
+    blit = cell_blitter(canvas, view.cells)
+    canvas.draw()
+
+    play_innings(SB, 9)
+    view.update(SB)
+    assert view.innings == 9 and len(view.cells) == 2 * 12
+
+    #The 10th and 11th innings get their own columns, and the blitter follows the new cells
+    play_innings(SB, 11)
+    changed = view.update(SB)
+    assert view.innings == 11 and len(view.cells) == 2 * 14
+    assert changed == view.cells and blit.cells is view.cells
+    blit.update(changed)
+    assert set(blit.backgrounds) <= set(view.cells) and len(blit.backgrounds) > 0
+    assert [view.table[0, i].get_text().get_text() for i in [10, 11, 12]] == ['10', '11', 'R']
+    assert [view.table[1, i].get_text().get_text() for i in [10, 11, 12, 13]] == ['0', '1', str(SB.score[0]['R']), str(SB.score[0]['H'])]
+
+def test_diamond_image_is_scaled_down():
+    #Full size, every full draw of the field resampled a 3100 x 2822 image through float copies of hundreds of MB
+    image = diamond_image()
+    assert max(image.shape[:2]) == 1000 and image.dtype == 'uint8'
+    assert diamond_image() is image
+
+def test_field_view_matches_display(positions, lineups):
+    #The persistent view and game_state.display draw every label at the same spot
+    G = game(positions = positions, lineups = lineups, headless = True)
+    G.GS.runners = [G.GS.lineup[0][5], None, G.GS.lineup[0][6]]
+    view = field_view(Figure().add_subplot())
+    view.update(G.GS)
+    ax = Figure().add_subplot()
+    G.GS.display(ax)
+    labels = lambda texts: sorted((text.get_text(), text.get_position(), text.get_horizontalalignment()) for text in texts if text.get_visible())
+    assert labels(view.runners + list(view.fielders.values()) + [view.batter]) == labels(ax.texts[1:])
+    assert [patch.get_visible() for patch in view.bases] == [True, False, True] and len(ax.patches) == 2
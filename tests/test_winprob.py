@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from running import send_threshold
+from simulate import simulate
+import winprob
+
+class table_policy():
+    def __init__(self, table):
+        self.table = table
+
+    def __call__(self, chance, GS = None):
+        return chance >= 14
+
+@pytest.fixture(scope = 'module')
+def cache(tmp_path_factory):
+    return str(tmp_path_factory.mktemp('winprob'))
+
+@pytest.fixture
+def table(positions, lineups, cache):
+    return winprob.win_table(positions, lineups, cache = cache)
+
+def test_roster_key_tells_policies_apart(positions, lineups):
+    #Arrays differing only in elements their repr leaves out still give different keys
+    first = np.zeros(5000, dtype = np.int8)
+    second = first.copy()
+    second[2500] = 1
+    assert repr(first) == repr(second)
+    keys = [winprob.roster_key(positions, lineups, policy) for policy in [None, send_threshold(14), send_threshold(15), table_policy(first), table_policy(second)]]
+    assert len(set(keys)) == len(keys)
+    assert winprob.roster_key(positions, lineups, table_policy(first.copy())) == keys[3]
+
+def test_table_is_cached(positions, lineups, cache, table):
+    loaded = winprob.win_table(positions, lineups, cache = cache)
+    assert loaded.key == table.key
+    assert np.array_equal(loaded.table, table.table)
+
+def test_table_bounds(table):
+    assert table.table.min() >= 0 and table.table.max() <= 1
+    #Decided games, and a home team leading going into the bottom of the ninth
+    assert table.lookup(5, 0, 0, 0, 25, 0, 0) == 1
+    assert table.lookup(5, 1, 0, 0, -25, 0, 0) == 0
+    assert table.lookup(9, 0, 2, 0, 3, 0, 0) > table.lookup(9, 0, 2, 0, 1, 0, 0) > table.lookup(9, 0, 2, 0, -1, 0, 0)
+
+def test_start_matches_simulation(positions, lineups, table):
+    n = 2000
+    summaries, totals = simulate(positions, lineups, n_games = n, seed = 5)
+    assert table.lookup(1, 0, 0, 0, 0, 0, 0) == pytest.approx(totals['Home']['wins'] / n, abs = 4 * np.sqrt(0.25 / n) + 0.01)
@@ -0,0 +1,222 @@
+import numpy as np
+import cards
+import markov
+from fielding import chance_results
+from playcodes import parse
+from running import decisions
+
+#Outcome rows of every entry: runner sent and safe, sent and out, or held. Plays without a send decision have the same outcome in all three.
+safe, out, held = 0, 1, 2
+
+#Where each runner ends up in moves: a base (0-2), home, or off the bases
+home = 3
+off = 4
+
+def all_plays():
+    """Every play a resolved plate appearance can run on game_state, with wild pitches and passed balls split off as plays of their own.
+
+    Returns:
+        list of tuple: Play tuples.
+    """
+    plays = [('WP',), ('PB',)]
+    codes = [outcome for outcome in cards.outcomes if outcome != 'HRN' and not outcome.startswith('X_')]
+    for play in [parse(code) for code in codes] + [result for result in chance_results if result != ('E',)]:
+        play = play[1:] if play[0] in ['WP', 'PB'] else play
+        if play not in plays:
+            plays.append(play)
+    return plays
+
+class _runner():
+    """Stand-in for a runner so slow that every chance of success is 1: a roll of 1 is safe and anything else is out.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.run = -40
+
+class _roll():
+    """Dice source which always rolls the same d20.
+    """
+    def __init__(self):
+        self.roll = 1
+
+    def d20(self):
+        return self.roll
+
+class _recorder():
+    """Send policy which gives a fixed answer, and records what the game state looked like when it was asked.
+    """
+    def __init__(self):
+        self.answer = False
+        self.seen = None
+
+    def __call__(self, chance, GS = None):
+        self.seen = (GS.decision, GS.outs, GS.bases, GS.score[GS.batting_team])
+        return self.answer
+
+class transition_table():
+    """Outcome of every play from every base-out state, compiled by running the game_state play functions on stand-in runners.
+
+    Each entry has three outcome rows: the runner sent and safe, sent and out, and held. Plays with a send decision from a state are branch points: the decision, and the game state as the policy sees it, are recorded, and the row is picked once the runner is sent or held and the d20 is rolled. Other entries have the same outcome in every row.
+
+    Runners are followed from their source (first, second, third, then the batter) to where they end up, so games that track who is on base can move them with the table, as lockstep.py does. game.game always runs the play functions, which stay the reference, as checked by parity_check.
+
+    Attributes:
+        plays (list of tuple): Play of each row of the table.
+        index (dict): Row of each play.
+        new_state (numpy.ndarray): Array of int8 of shape (plays, 24, 3). New base-out state, or 24 for the end of the inning.
+        runs (numpy.ndarray): Array of int8 of shape (plays, 24, 3). Runs scored.
+        moves (numpy.ndarray): Array of int8 of shape (plays, 24, 3, 4). Where the runner on first, second, third and the batter end up: a base (0-2), home or off. Empty sources are off.
+        decision (numpy.ndarray): Array of int8 of shape (plays, 24). Index in running.decisions of the send decision, or -1 for none.
+        seen (numpy.ndarray): Array of int8 of shape (plays, 24, 3). Outs, bases and runs scored so far in the play when the policy is asked. Zero where there is no decision.
+        valid (numpy.ndarray): Boolean array of shape (plays,). False for plays that can't be run on this defense, e.g. a questionable flyball to an infielder, who has no arm rating. Such plays are on no card.
+    """
+    def __init__(self, GS, plays = None):
+        """Initialization function for transition_table. Compiles the table.
+
+        Args:
+            GS (game_state): Game state the plays are run on, with real cards in the field. Its runners, dice, policy and score are overwritten.
+            plays (list of tuple, optional): Plays to compile. Default is all_plays.
+        """
+        self.plays = list(plays) if plays is not None else all_plays()
+        self.index = {play: i for i, play in enumerate(self.plays)}
+        n = len(self.plays)
+        self.new_state = np.zeros((n, markov.n_states, 3), dtype = np.int8)
+        self.runs = np.zeros((n, markov.n_states, 3), dtype = np.int8)
+        self.moves = np.full((n, markov.n_states, 3, 4), off, dtype = np.int8)
+        self.decision = np.full((n, markov.n_states), -1, dtype = np.int8)
+        self.seen = np.zeros((n, markov.n_states, 3), dtype = np.int8)
+        self.valid = np.ones(n, dtype = bool)
+
+        dice, policy = GS.dice, GS.policy
+        GS.dice = _roll()
+        GS.policy = _recorder()
+        for p, play in enumerate(self.plays):
+            if self._unplayable(GS, play):
+                self.valid[p] = False
+                continue
+            self._compile(GS, p, play)
+        GS.dice, GS.policy = dice, policy
+
+    @staticmethod
+    def _unplayable(GS, play):
+        """Whether or not a play can't be run on the defense: a questionable flyball to a fielder without an arm rating, i.e. an infielder.
+        """
+        if play[0] != 'FB' or play[2] != 'B?':
+            return False
+        pos = play[1]
+        return len(GS.positions[1][pos].field[pos]) < 3
+
+    def _compile(self, GS, p, play):
+        """Compiles the entries of one play from every base-out state.
+        """
+        for state in range(markov.n_states):
+            self.new_state[p, state, held], self.runs[p, state, held], self.moves[p, state, held] = self._run(GS, play, state, False, 1)
+            if GS.policy.seen is None:
+                self.new_state[p, state] = self.new_state[p, state, held]
+                self.runs[p, state] = self.runs[p, state, held]
+                self.moves[p, state] = self.moves[p, state, held]
+                continue
+            seen = GS.policy.seen
+            self.decision[p, state] = decisions.index(seen[0])
+            self.seen[p, state] = seen[1:]
+            for row, roll in [(safe, 1), (out, 20)]:
+                self.new_state[p, state, row], self.runs[p, state, row], self.moves[p, state, row] = self._run(GS, play, state, True, roll)
+
+    @staticmethod
+    def _run(GS, play, state, answer, roll):
+        """Runs a play from a base-out state.
+
+        Returns:
+            int: New base-out state index, or 24 for the end of the inning.
+            int: Runs scored.
+            list of int: Where each source runner ends up.
+        """
+        GS.batting_team = 0
+        GS.score = [0, 0]
+        GS.outs = state // 8
+        runners = [_runner('R%d' % (b + 1)) if state & (1 << b) else None for b in range(3)]
+        GS.runners = list(runners)
+        GS.batter = _runner('B')
+        GS.dice.roll = roll
+        GS.policy.answer = answer
+        GS.policy.seen = None
+
+        runs = GS.plays[play[0]](*play[1:])[0]
+
+        moves = []
+        for runner in runners + [GS.batter]:
+            if runner is None:
+                moves.append(off)
+            elif runner in GS.runners:
+                moves.append(GS.runners.index(runner))
+            elif runner.name in runs:
+                moves.append(home)
+            else:
+                moves.append(off)
+        new_state = markov.end_of_inning if GS.outs >= 3 else GS.outs * 8 + GS.bases
+        return new_state, len(runs), moves
+
+#Table shared by every lockstep in this process. Entries don't depend on the players, so it's compiled once, on the first defense.
+_shared = None
+
+def shared_table(positions):
+    """Transition table shared by every lockstep in this process, compiled on first use.
+
+    Args:
+        positions (list of list of player): Cards at each position for each team, used only to compile the table.
+
+    Returns:
+        transition_table: Shared table.
+    """
+    global _shared
+    if _shared is None:
+        from game import game_state
+        from running import quiet
+        _shared = transition_table(game_state(positions = [list(side) for side in positions], log = quiet))
+    return _shared
+
+def parity_check(positions, lineups = None):
+    """Checks that the table moves real runners exactly as the game_state play functions do.
+
+    The table is compiled on stand-in runners. Every entry without a send decision is run again with its play function from every base-out state, with distinct runners from the lineup, and the runners, outs and runs compared with what the table gives.
+
+    Args:
+        positions (list of list of str): Player names at each position for each team.
+        lineups (list of list of int, optional): Position number of each lineup spot for each team.
+
+    Returns:
+        list of str: Description of every difference found. Empty if the table matches.
+    """
+    from game import game_state
+    from registry import registry
+    from running import quiet
+
+    lineups = [list(side) for side in lineups] if lineups is not None else [[0,2,3,4,5,6,7,8,9], [0,2,3,4,5,6,7,8,9]]
+    cards, lineup = registry.resolve([list(side) for side in positions], lineups)
+    table = shared_table(cards)
+    GS = game_state(positions = [list(side) for side in cards], log = quiet)
+    differences = []
+    for p, play in enumerate(table.plays):
+        if not table.valid[p]:
+            continue
+        for state in range(markov.n_states):
+            if table.decision[p, state] >= 0:
+                continue
+            GS.batting_team = 0
+            GS.score = [0, 0]
+            GS.outs = state // 8
+            sources = [lineup[0][b] if state & (1 << b) else None for b in range(3)] + [lineup[0][3]]
+            GS.runners = sources[:3]
+            GS.batter = sources[3]
+            GS.plays[play[0]](*play[1:])
+
+            runners = [None, None, None]
+            for source, base in enumerate(table.moves[p, state, held]):
+                if base < home:
+                    runners[base] = sources[source]
+            new_state = table.new_state[p, state, held]
+            outs = 3 if new_state == markov.end_of_inning else new_state // 8
+            expected = (runners, outs, int(table.runs[p, state, held]))
+            if (GS.runners, GS.outs, GS.score[0]) != expected:
+                differences.append('%s from state %d: %s by play function, %s by table' % (play, state, (GS.runners, GS.outs, GS.score[0]), expected))
+    return differences
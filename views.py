@@ -0,0 +1,280 @@
+import matplotlib
+from matplotlib.patches import Rectangle
+from game import diamond_image, base_corners, runner_spots, fielder_spots, batter_spots, bbox_fielder, bbox_runner
+
+class blitter():
+    """Redraws the changing artists of a figure over a cached background.
+
+    The artists must be animated, so full draws of the canvas leave them out. After each full draw the rest of the figure is saved, and updates only restore it and draw the artists on top.
+
+    Attributes:
+        canvas (FigureCanvas): Canvas of the figure.
+        artists (list): Animated artists drawn on every update.
+        background: Saved region of the figure without the artists. None until the first full draw.
+    """
+    def __init__(self, canvas, artists):
+        """Initialization function for blitter.
+
+        Args:
+            canvas (FigureCanvas): Canvas of the figure. Must support copy_from_bbox and restore_region, as the Agg based canvases do.
+            artists (list): Animated artists drawn on every update.
+        """
+        self.canvas = canvas
+        self.artists = artists
+        self.background = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        """Saves the background after a full draw, then draws the artists over it.
+        """
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.canvas.figure.draw_artist(artist)
+
+    def update(self, full = False):
+        """Repaints the canvas.
+
+        Args:
+            full (bool, default False): Redraw the whole figure, e.g. after something in the background changed.
+        """
+        if full or self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_artists()
+            self.canvas.blit(self.canvas.figure.bbox)
+
+class cell_blitter():
+    """Redraws changed table cells one at a time, each over its own saved background.
+
+    After each full draw, every cell is redrawn without its text and the inside of the cell is saved. Updates restore the inside of each changed cell, draw its text and blit only that cell.
+
+    Attributes:
+        canvas (FigureCanvas): Canvas of the figure.
+        cells (list of matplotlib.table.Cell): Cells whose text changes.
+        backgrounds (dict): Saved region of each cell without its text, keyed by cell. Empty until the first full draw.
+    """
+    def __init__(self, canvas, cells):
+        """Initialization function for cell_blitter.
+
+        Args:
+            canvas (FigureCanvas): Canvas of the figure. Must support copy_from_bbox and restore_region, as the Agg based canvases do.
+            cells (list of matplotlib.table.Cell): Cells whose text changes.
+        """
+        self.canvas = canvas
+        self.cells = cells
+        self.backgrounds = {}
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _inside(self, cell, renderer):
+        """Window extent of a cell, less its border.
+        """
+        return cell.get_window_extent(renderer).padded(-3)
+
+    def _on_draw(self, event):
+        """Saves the background of every cell after a full draw.
+        """
+        self.backgrounds = {}
+        for cell in self.cells:
+            inside = self._inside(cell, event.renderer)
+            if inside.width < 1 or inside.height < 1: #Canvas too small to blit cells
+                continue
+            Rectangle.draw(cell, event.renderer)
+            self.backgrounds[cell] = self.canvas.copy_from_bbox(inside)
+            cell.get_text().draw(event.renderer)
+
+    def update(self, changed = None, full = False):
+        """Repaints changed cells.
+
+        Args:
+            changed (list of matplotlib.table.Cell, optional): Cells whose text changed. Default is every cell.
+            full (bool, default False): Redraw the whole figure, e.g. after the rows of a table changed.
+        """
+        changed = changed if changed is not None else self.cells
+        if full or any(cell not in self.backgrounds for cell in changed):
+            self.canvas.draw()
+            return
+        renderer = self.canvas.get_renderer()
+        for cell in changed:
+            self.canvas.restore_region(self.backgrounds[cell])
+            cell.get_text().draw(renderer)
+            self.canvas.blit(self._inside(cell, renderer))
+
+class field_view():
+    """Persistent drawing of the game state on the diamond. Only the labels and occupied bases change between plate appearances.
+
+    Attributes:
+        ax (matplotlib.axes.Axes): Axis drawn on.
+        artists (list): Animated artists updated by update.
+    """
+    def __init__(self, ax):
+        """Initialization function for field_view. Draws the diamond and creates every label, empty.
+
+        Args:
+            ax (matplotlib.axes.Axes): Axis to draw on.
+        """
+        self.ax = ax
+        ax.imshow(diamond_image())
+        ax.axis('off')
+
+        self.situation = ax.text(0.02,0.98, '', ha = 'left', va = 'top', transform = ax.transAxes, fontsize = 14, animated = True)
+        self.bases = [ax.add_patch(matplotlib.patches.Polygon(corners, fc = 'k', transform = ax.transAxes, visible = False, animated = True)) for corners in base_corners]
+        self.runners = [ax.text(x, y, '', ha = 'center', va = 'center', fontsize = 6, transform = ax.transAxes, bbox = bbox_runner, visible = False, animated = True)
+                        for x, y in runner_spots]
+        self.fielders = {pos: ax.text(x, y, '', ha = 'center', va = 'center', fontsize = 6, transform = ax.transAxes, bbox = bbox_fielder, animated = True)
+                         for pos, (x, y) in fielder_spots.items()}
+        self.batter = ax.text(*batter_spots['R'][:2], '', va = 'center', fontsize = 6, transform = ax.transAxes, bbox = bbox_runner, animated = True)
+        self.artists = [self.situation] + self.bases + self.runners + list(self.fielders.values()) + [self.batter]
+
+    def update(self, GS):
+        """Updates the labels to a game state, as drawn by game_state.display.
+
+        Args:
+            GS (game_state): Current game state.
+        """
+        self.situation.set_text("%s%d\n%d Outs" % ("T" if GS.batting_team == 0 else "B", GS.inning, GS.outs))
+
+        for base, label, runner in zip(self.bases, self.runners, GS.runners):
+            base.set_visible(runner is not None)
+            label.set_visible(runner is not None)
+            if runner is not None:
+                label.set_text(runner.name)
+
+        for pos, label in self.fielders.items():
+            label.set_text(GS.positions[1-GS.batting_team][pos].name)
+
+        #Batter stands on the proper side of the plate
+        self.batter.set_text(GS.batter.name)
+        x, y, ha = batter_spots['R' if GS.batter.hand == 'R' or (GS.batter.hand == 'S' and GS.pitcher.hand == 'L') else 'L']
+        self.batter.set_position((x, y))
+        self.batter.set_horizontalalignment(ha)
+
+def _cell_text(table, row, col, text, changed):
+    """Sets the text of a table cell if it differs, and notes the cell as changed.
+    """
+    cell = table[row, col]
+    if cell.get_text().get_text() != text:
+        cell.get_text().set_text(text)
+        changed.append(cell)
+
+class scoreboard_view():
+    """Persistent table of a scoreboard. Cells are updated in place. The table has a column for every inning played, at least 9, and is rebuilt with more columns when a game goes to extra innings.
+
+    Attributes:
+        ax (matplotlib.axes.Axes): Axis drawn on.
+        innings (int): Number of inning columns.
+        table (matplotlib.table.Table): Scoreboard table.
+        cells (list of matplotlib.table.Cell): Cells updated by update. Changed in place when the table is rebuilt, so blitters given it follow.
+    """
+    def __init__(self, ax, SB):
+        """Initialization function for scoreboard_view.
+
+        Args:
+            ax (matplotlib.axes.Axes): Axis to draw on.
+            SB (scoreboard): Scoreboard shown, giving the team names.
+        """
+        self.ax = ax
+        self.table = None
+        self.cells = []
+        self._build(SB, _innings(SB))
+        ax.axis('off')
+
+    def _build(self, SB, innings):
+        """Creates the table, with empty cells, replacing any previous one.
+
+        Args:
+            SB (scoreboard): Scoreboard shown, giving the team names.
+            innings (int): Number of inning columns.
+        """
+        if self.table is not None:
+            self.table.remove()
+        self.innings = innings
+        rows = [[''] + [str(i) for i in range(1, innings + 1)] + ["R", "H", "E"],
+                [SB.teams[0]] + [''] * (innings + 3),
+                [SB.teams[1]] + [''] * (innings + 3)]
+        self.table = self.ax.table(cellText = rows, colLabels = None, cellLoc = 'center', loc = 'center')
+        self.table.scale(1, 1.5)
+        self.cells[:] = [self.table[team + 1, i] for team in [0,1] for i in range(1, innings + 4)]
+
+    def update(self, SB):
+        """Updates the cells to a scoreboard, as drawn by scoreboard.display.
+
+        Args:
+            SB (scoreboard): Current scoreboard.
+
+        Returns:
+            list of matplotlib.table.Cell: Cells that changed. Every cell if the table was rebuilt.
+        """
+        innings = _innings(SB)
+        rebuilt = innings != self.innings
+        if rebuilt:
+            self._build(SB, innings)
+
+        changed = []
+        for team in [0,1]:
+            for i, key in enumerate(list(range(1, innings + 1)) + ['R', 'H', 'E']):
+                _cell_text(self.table, team + 1, i + 1, str(SB.score[team].get(key, '')), changed)
+        return list(self.cells) if rebuilt else changed
+
+def _innings(SB):
+    """Number of inning columns of a scoreboard: every inning started, and at least 9.
+    """
+    return max([9] + [key for key in SB.score[0] if type(key) is int])
+
+class box_score_view():
+    """Persistent batting and pitching tables of one team's box score. Cells are updated in place.
+
+    Attributes:
+        ax (matplotlib.axes.Axes): Axis drawn on.
+        team (int): Team shown (0 for away, 1 for home).
+        batting (matplotlib.table.Table): Batting table.
+        pitching (matplotlib.table.Table): Pitching table.
+        cells (list of matplotlib.table.Cell): Cells updated by update.
+    """
+    def __init__(self, ax, BS, team = 0):
+        """Initialization function for box_score_view.
+
+        Args:
+            ax (matplotlib.axes.Axes): Axis to draw on.
+            BS (box_score): Box score shown, giving the players.
+            team (int, default 0): Team to show (0 for away, 1 for home).
+        """
+        self.ax = ax
+        self.team = team
+        self.batting = ax.table(cellText = [[name] + [''] * 8 for name in BS.hitters[team]],
+                                colLabels = ['Name','Pos', 'AB', 'R', 'H', 'RBI', 'HR', 'BB', 'K'],
+                                colWidths = [0.3,0.14,0.08,0.08,0.08,0.08,0.08,0.08,0.08],
+                                loc = 8)
+        self.batting.scale(1,1.5)
+        self.pitching = ax.table(cellText = [[name] + [''] * 6 for name in BS.pitchers[team]],
+                                 colWidths = [0.4,0.1,0.1,0.1,0.1,0.1,0.1],
+                                 colLabels = ['Name','IP', 'H', 'R', 'BB', 'K', 'HR'],
+                                 loc = 7)
+        self.pitching.scale(1,1.5)
+        ax.axis('off')
+        self.cells = ([self.batting[row + 1, col] for row in range(len(BS.hitters[team])) for col in range(1, 9)] +
+                      [self.pitching[row + 1, col] for row in range(len(BS.pitchers[team])) for col in range(1, 7)])
+
+    def update(self, BS):
+        """Updates the cells to a box score, as drawn by box_score.display.
+
+        Args:
+            BS (box_score): Current box score.
+
+        Returns:
+            list of matplotlib.table.Cell: Cells that changed.
+        """
+        changed = []
+        for row, line in enumerate(BS.hitters[self.team].values()):
+            for col, value in enumerate(line):
+                _cell_text(self.batting, row + 1, col + 1, str(value), changed)
+
+        for row, line in enumerate(BS.pitchers[self.team].values()):
+            outs = round(line[0] * 3)
+            _cell_text(self.pitching, row + 1, 1, '%d.%d' % (outs // 3, outs % 3), changed)
+            for col, value in enumerate(line[1:]):
+                _cell_text(self.pitching, row + 1, col + 2, str(int(value)), changed)
+        return changed
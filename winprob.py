@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import numpy as np
+import markov
+from matchup import card_hash
+from registry import registry
+from running import send_threshold
+
+#Largest score difference kept. Games further apart count as decided.
+max_diff = 20
+
+#Innings kept. The last row is every inning from it on, where the walk-off and end-of-game rules apply.
+n_innings = 9
+
+def _state_order():
+    """Base-out states in an order where a play scoring no runs always moves to a state earlier in the order or ends the inning: most outs first, then most runners.
+
+    Returns:
+        list of int: Base-out state indices.
+    """
+    return sorted(range(markov.n_states), key = lambda s: (-(s // 8), -bin(s % 8).count('1')))
+
+def policy_key(policy):
+    """Description of a send policy which tells apart policies that decide differently: its class, name and attributes.
+
+    Array attributes are described by their dtype, shape and a hash of their bytes, since the repr of a large array leaves most of it out.
+
+    Args:
+        policy (function or None): Runner send policy.
+
+    Returns:
+        list or None: Description of the policy, None for None.
+    """
+    if policy is None:
+        return None
+    attributes = []
+    for name, value in sorted(getattr(policy, '__dict__', {}).items()):
+        if isinstance(value, np.ndarray):
+            value = (value.dtype.str, value.shape, hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+        attributes.append((name, repr(value)))
+    return [type(policy).__name__, getattr(policy, '__name__', None), attributes]
+
+def roster_key(positions, lineups, policy = None):
+    """Hash of everything a win probability table depends on: the players, their cards, the batting orders and the send policy.
+
+    Args:
+        positions (list of list of str): Player names at each position for each team.
+        lineups (list of list of int): Position number of each lineup spot for each team.
+        policy (function, optional): Runner send policy. Told apart by policy_key.
+
+    Returns:
+        str: Hex digest.
+    """
+    names = sorted({name for side in positions for name in side})
+    data = {'positions': positions, 'lineups': lineups, 'policy': policy_key(policy), 'cards': [card_hash(name) for name in names],
+            'max_diff': max_diff, 'n_innings': n_innings}
+    return hashlib.sha1(json.dumps(data, sort_keys = True).encode('utf-8')).hexdigest()
+
+class win_table():
+    """Probability that the home team wins from every state of a game between two lineups, solved exactly by dynamic programming over the plate appearance transitions of markov.py.
+
+    The state is (inning, half, outs, bases, score difference, batter up, batter due up for the other team). Half innings are solved from the last inning back. Within a half inning, score differences are solved from the most favorable to the batting team down, and base-out states in _state_order, so every value only depends on values already found. The end-of-game and walk-off rules are those of game.PA. Innings from n_innings on follow the same rules, so they share one row, solved as a fixed point over the chance of extra innings.
+
+    Runners on base are given the mean speed of their lineup, and pitchers are rested throughout.
+
+    Attributes:
+        key (str): Hash of the rosters, as given by roster_key.
+        table (numpy.ndarray): Array of shape (n_innings, 2, 24, 2 * max_diff + 1, 9, 9). Element [inning - 1, half, outs * 8 + bases, home score - away score + max_diff, batter up, other team's batter due up] is the home team's win probability.
+    """
+    def __init__(self, positions, lineups = None, policy = None, cache = 'winprob'):
+        """Initialization function for win_table. Loads the table from the cache, or solves and saves it.
+
+        Args:
+            positions (list of list of str): List of shape (2, 10) of player names at each position for each team, as taken by game.
+            lineups (list of list of int, optional): List of shape (2, 9) of the position number of each lineup spot. Default is in increasing order of position number.
+            policy (function, optional): Runner send policy, as taken by game_state. Default is the headless default of game.
+            cache (str or None, default 'winprob'): Directory of cached tables, one file per roster hash. None always solves.
+        """
+        positions = [[name if type(name) is str else name.name for name in side] for side in positions]
+        lineups = [list(side) for side in lineups] if lineups is not None else [[0,2,3,4,5,6,7,8,9], [0,2,3,4,5,6,7,8,9]]
+        self.key = roster_key(positions, lineups, policy)
+
+        path = os.path.join(cache, self.key + '.npy') if cache is not None else None
+        if path is not None and os.path.exists(path):
+            self.table = np.load(path)
+            return
+
+        self.table = self.solve(positions, lineups, policy if policy is not None else send_threshold(14))
+        if path is not None:
+            os.makedirs(cache, exist_ok = True)
+            np.save(path, self.table)
+
+    @staticmethod
+    def _transitions(positions, lineups, policy):
+        """Plate appearance transitions of every batter of both teams against the other team's defense.
+
+        Returns:
+            list of numpy.ndarray: For each team, an array of shape (9, 24, 25, max_runs + 1) of the joint transitions of each lineup spot.
+        """
+        cards, lineup = registry.resolve([list(side) for side in positions], lineups)
+        transitions = []
+        for team in [0,1]:
+            model = markov.markov_model(cards[1 - team], policy)
+            speed = int(round(np.mean([B.run for B in lineup[team]])))
+            transitions.append(np.stack([model.batter_run_transitions(B, speed = speed) for B in lineup[team]]))
+        return transitions
+
+    @staticmethod
+    def _half(J, sign, terminal, walk_off):
+        """Solves one half inning.
+
+        Args:
+            J (numpy.ndarray): Transitions of the batting team, as given by _transitions.
+            sign (int): 1 if the home team bats, so runs raise the score difference, or -1 if the away team bats.
+            terminal (numpy.ndarray): Array of shape (2 * max_diff + 1, 9, 9) of the value when the half inning ends, by score difference, batting team's next batter and other team's due up batter.
+            walk_off (bool): Whether or not the game ends as soon as the batting team leads, as in the bottom of the ninth and later.
+
+        Returns:
+            numpy.ndarray: Array of shape (24, 2 * max_diff + 1, 9, 9) of the value of every state of the half inning.
+        """
+        n_diff = 2 * max_diff + 1
+        runs = np.arange(markov.max_runs + 1)
+
+        #Values of every state after a plate appearance, with the end of the half inning as state 24. The batter index is that of the next batter.
+        after = np.zeros((markov.n_states + 1, n_diff, 9, 9))
+        after[markov.end_of_inning] = terminal
+        after[:markov.n_states, 0] = 0 #Decided games
+        after[:markov.n_states, -1] = 1
+        if walk_off:
+            after[:markov.n_states, max_diff + 1:] = 1
+
+        order = _state_order()
+        diffs = range(n_diff - 2, 0, -1) if sign == 1 else range(1, n_diff - 1)
+        for d in diffs:
+            if walk_off and d > max_diff:
+                continue
+            #Score difference after each number of runs, capped at a decided game
+            targets = np.clip(d + sign * runs, 0, n_diff - 1)
+            for s in order:
+                #Values after each new state and number of runs, for batter b + 1 up in place of b
+                following = np.roll(after[:, targets], -1, axis = 2)
+                after[s, d] = np.einsum('btr,trbo->bo', J[:, s], following)
+
+        return after[:markov.n_states]
+
+    def solve(self, positions, lineups, policy, tolerance = 1e-10, max_iterations = 200):
+        """Solves the table.
+
+        Args:
+            positions (list of list of str): Player names at each position for each team.
+            lineups (list of list of int): Position number of each lineup spot for each team.
+            policy (function): Runner send policy.
+            tolerance (float, default 1e-10): Largest change in the extra innings fixed point when it's considered solved.
+            max_iterations (int, default 200): Largest number of extra innings iterations.
+
+        Returns:
+            numpy.ndarray: Win probability table, as described in table.
+        """
+        J = self._transitions(positions, lineups, policy)
+        n_diff = 2 * max_diff + 1
+        table = np.zeros((n_innings, 2, markov.n_states, n_diff, 9, 9))
+        home_leads = (np.arange(n_diff) > max_diff)[:, None, None]
+        away_leads = (np.arange(n_diff) < max_diff)[:, None, None]
+
+        def start(half):
+            #Value at the start of a half inning, by score difference, batter up of the team about to bat (terminal's other) and due up of the team that just batted
+            return half[0].transpose(0, 2, 1)
+
+        #Extra innings: the start of an extra inning (tied) leads back to itself
+        top_start = np.full((n_diff, 9, 9), 0.5)
+        for i in range(max_iterations):
+            bottom = self._half(J[1], 1, np.where(away_leads, 0, top_start), True)
+            top = self._half(J[0], -1, np.where(home_leads, 1, start(bottom)), False)
+            new_start = start(top)
+            change = np.abs(new_start - top_start).max()
+            top_start = new_start
+            if change < tolerance:
+                break
+        table[n_innings - 1] = [top, bottom]
+
+        #Regulation innings, last to first
+        for inning in range(n_innings - 1, 0, -1):
+            bottom = self._half(J[1], 1, start(table[inning, 0]), False)
+            top = self._half(J[0], -1, start(bottom), False)
+            table[inning - 1] = [top, bottom]
+
+        return table
+
+    def lookup(self, inning, half, outs, bases, diff, batter, other):
+        """Home team's win probability from a state.
+
+        Args:
+            inning (int): Inning, from 1.
+            half (int): 0 for the top, 1 for the bottom.
+            outs (int): Outs, 0-2.
+            bases (int): Bitmask of occupied bases (1 for first, 2 for second, 4 for third).
+            diff (int): Home score minus away score.
+            batter (int): Lineup spot (0-8) of the batter up.
+            other (int): Lineup spot (0-8) of the other team's batter due up.
+
+        Returns:
+            float: Win probability.
+        """
+        return self.table[min(inning, n_innings) - 1, half, outs * 8 + bases, min(max(diff, -max_diff), max_diff) + max_diff, batter, other]
+
+    def probability(self, GS):
+        """Home team's win probability from a game state.
+
+        Args:
+            GS (game_state): Current game state.
+
+        Returns:
+            float: Win probability.
+        """
+        team = GS.batting_team
+        return self.lookup(GS.inning, team, GS.outs, GS.bases, GS.score[1] - GS.score[0], GS.lineup_pos[team], GS.lineup_pos[1 - team])